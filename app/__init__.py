@@ -1,3 +1,8 @@
+import time
+from contextlib import contextmanager
+
+_imports_started = time.perf_counter()
+
 from flask import Flask
 from flask_login import LoginManager, current_user
 from app.config import Config, db
@@ -6,47 +11,104 @@ from app.main.routes import main_bp
 from app.assignments.routes import assignments_bp
 from app.courses import courses_bp
 from app.announcements import announcements_bp
+from app.api import api_bp
+from app.admin import admin_bp
 """For login functionality"""
 from app.models import User, Course, Enrollment, Assignment, StudentAssignment, Announcement, Notification
+# registers the course_grades maintenance hooks on the session
+from app import grades
+from app import migrations
+from app import database
+from app import routing
+from app import identity
+from app import notifications
+from app import fragments
+from app import instrumentation
+from app import metrics
+from app import profiler
+from app import hashing
 from flask import render_template
 
+# module import time, reported with the first app's startup phases
+_IMPORT_SECONDS = time.perf_counter() - _imports_started
+
 login_manager = LoginManager()
 login_manager.login_view = "auth.login"
 login_manager.login_message = "Please log in to access this page."
+# the JSON API answers 401 instead of redirecting to the login page
+login_manager.blueprint_login_views["api"] = None
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # id/email/role from the identity cache; the User row loads on demand
+    return identity.load_user(int(user_id))
+
+@contextmanager
+def _phase(timings, name):
+    start = time.perf_counter()
+    yield
+    timings[name] = time.perf_counter() - start
+
 
-def create_app():
-    app = Flask(__name__)
-    app.config.from_object(Config)
+def _ensure_schema(app):
+    # a stored schema version equal to the code's means every table and
+    # migration is in place already, so skip create_all's table reflection
+    if migrations.schema_is_current():
+        return
+    # Create database tables if they don't exist, then bring older
+    # databases up to the current schema (create_all never alters tables)
+    db.create_all()
+    if app.config["AUTO_MIGRATE"]:
+        migrations.upgrade()
 
-    db.init_app(app)
-    login_manager.init_app(app)
+
+def create_app(config_class=Config):
+    timings = {"imports": _IMPORT_SECONDS}
+
+    with _phase(timings, "config"):
+        app = Flask(__name__)
+        app.config.from_object(config_class)
+
+    with _phase(timings, "extensions"):
+        db.init_app(app)
+        routing.init_app(app, db)
+        database.init_app(app)
+        instrumentation.init_app(app)
+        metrics.init_app(app)
+        profiler.init_app(app)
+        hashing.init_app(app)
+        login_manager.init_app(app)
+        identity.init_app(app)
+        notifications.init_app(app)
+        fragments.init_app(app)
 
     # blueprints
-    app.register_blueprint(authentication_bp, url_prefix="/auth")
-    app.register_blueprint(main_bp)  # <-- no prefix, so "/" works
-    app.register_blueprint(assignments_bp, url_prefix="/assignments")
-    app.register_blueprint(courses_bp, url_prefix="/courses")
-    app.register_blueprint(announcements_bp, url_prefix="/announcements")
+    with _phase(timings, "blueprints"):
+        app.register_blueprint(authentication_bp, url_prefix="/auth")
+        app.register_blueprint(main_bp)  # <-- no prefix, so "/" works
+        app.register_blueprint(assignments_bp, url_prefix="/assignments")
+        app.register_blueprint(courses_bp, url_prefix="/courses")
+        app.register_blueprint(announcements_bp, url_prefix="/announcements")
+        app.register_blueprint(api_bp, url_prefix="/api/v1")
+        app.register_blueprint(admin_bp, url_prefix="/admin")
+
+    with _phase(timings, "schema"):
+        with app.app_context():
+            _ensure_schema(app)
+
+    with _phase(timings, "replica"):
+        routing.start_sqlite_replica(app)
 
-    # Create database tables if they don't exist
-    with app.app_context():
-        db.create_all()
+    app.extensions["startup_timings"] = timings
+    app.logger.info("startup phases: %s", ", ".join(
+        f"{name} {seconds * 1000:.1f}ms" for name, seconds in timings.items()))
 
-    # Notifications available to all templates
+    # Unread notification previews available to all templates (cached per
+    # user and notification version, see app/notifications.py)
     @app.context_processor
     def inject_notifications():
         if current_user.is_authenticated:
-            notifications = (Notification.query
-                .filter_by(user_id=current_user.id, is_read=False)
-                .order_by(Notification.created_at.desc())
-                .limit(5)
-                .all()
-            )
-            return dict(notifications=notifications)
+            return dict(notifications=notifications.unread_previews(current_user.id))
         return dict(notifications=[])
 
     # Error handler for 404 - Not Found
@@ -0,0 +1,7 @@
+from flask import Blueprint
+
+# operator pages, mounted at /admin; every view is admin-only
+admin_bp = Blueprint("admin", __name__, template_folder="templates")
+
+# Import routes to register them with the blueprint
+from app.admin import routes
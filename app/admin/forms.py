@@ -0,0 +1,10 @@
+from flask_wtf import FlaskForm
+from wtforms import FloatField, IntegerField, SelectField, SubmitField
+from wtforms.validators import DataRequired, NumberRange
+
+
+class ProfileSamplingForm(FlaskForm):
+    endpoint = SelectField('Endpoint', validators=[DataRequired()])
+    rate = FloatField('Sample rate', default=0.1, validators=[DataRequired(), NumberRange(min=0.001, max=1, message="Between 0.001 and 1")])
+    count = IntegerField('Profiles', default=10, validators=[DataRequired(), NumberRange(min=1, max=100, message="Between 1 and 100")])
+    submit = SubmitField('Start Sampling', render_kw={"class": "btn btn-primary border-primary-subtle"})
@@ -0,0 +1,66 @@
+"""Operator endpoints for admins: metrics for scraping and request profiles."""
+from flask import abort, current_app, flash, redirect, render_template, send_from_directory, url_for
+
+from app import metrics, profiler
+from app.admin import admin_bp
+from app.admin.forms import ProfileSamplingForm
+from app.decorators import roles_required
+from app.models import User
+
+
+@admin_bp.route("/metrics")
+@roles_required(User.ROLE_ADMIN)
+def metrics_endpoint():
+    return metrics.render(current_app), 200, {"Content-Type": metrics.CONTENT_TYPE}
+
+
+# saved profiles, and sampling for one endpoint
+@admin_bp.route("/profiles", methods=["GET", "POST"])
+@roles_required(User.ROLE_ADMIN)
+def profiles():
+    form = ProfileSamplingForm()
+    form.endpoint.choices = sorted(
+        endpoint for endpoint in current_app.view_functions
+        if endpoint != "static" and not endpoint.startswith("admin.")
+    )
+
+    if form.validate_on_submit():
+        profiler.start_sampling(form.endpoint.data, form.rate.data, form.count.data)
+        flash(f'Profiling {form.rate.data:.0%} of {form.endpoint.data} requests, '
+              f'up to {form.count.data} profiles.', 'success')
+        return redirect(url_for('admin.profiles'))
+
+    return render_template(
+        'admin/profiles.html',
+        form=form,
+        sampling=profiler.sampling(),
+        profiles=profiler.list_profiles(),
+        query_arg=current_app.config["PROFILE_QUERY_ARG"],
+        keep=current_app.config["PROFILE_KEEP"],
+    )
+
+
+@admin_bp.route("/profiles/sampling/stop", methods=["POST"])
+@roles_required(User.ROLE_ADMIN)
+def stop_sampling():
+    profiler.stop_sampling()
+    flash('Sampling stopped.', 'secondary')
+    return redirect(url_for('admin.profiles'))
+
+
+@admin_bp.route("/profiles/<name>")
+@roles_required(User.ROLE_ADMIN)
+def profile_detail(name):
+    profile = profiler.load_profile(name)
+    if profile is None:
+        abort(404)
+    return render_template('admin/profile_detail.html', profile=profile)
+
+
+@admin_bp.route("/profiles/<name>/<kind>")
+@roles_required(User.ROLE_ADMIN)
+def profile_download(name, kind):
+    if kind not in profiler.FORMATS or profiler.load_profile(name) is None:
+        abort(404)
+    return send_from_directory(current_app.config["PROFILE_DIR"], name + profiler.FORMATS[kind],
+                               as_attachment=True)
@@ -6,6 +6,7 @@ from app.announcements import announcements_bp
 from app.announcements.announcement_form import AnnouncementForm
 from app.decorators import roles_required
 from app.models import User
+from app.notifications import notify_course
 
 
 # Create new announcement
@@ -37,6 +38,10 @@ def create_announcement(course_id=None):
         db.session.add(new_announcement)
         db.session.commit()
 
+        # every enrolled student hears about it, without holding up the redirect
+        course = course or db.session.get(Course, final_course_id)
+        notify_course(final_course_id, f"New announcement in {course.code}: {new_announcement.title}")
+
         flash('Announcement created!', 'success')
         
         # back to dashboard
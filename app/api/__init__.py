@@ -0,0 +1,7 @@
+from flask import Blueprint
+
+# JSON API, mounted at /api/v1; breaking changes get a new prefix
+api_bp = Blueprint("api", __name__)
+
+# Import routes to register them with the blueprint
+from app.api import routes
@@ -0,0 +1,174 @@
+"""JSON endpoints for the mobile app and integrations.
+
+Each endpoint selects only the columns it returns and turns the result
+rows straight into dicts: no ORM objects per row, no template render.
+Listings are keyset-paginated like the HTML pages (?after= / ?before=)
+and return {"items": [...], "next": cursor, "prev": cursor}. The writes
+are bulk imports: POST /assignments/<id>/grades takes a JSON batch or a
+text/csv body (app/grade_import.py), POST /rosters a text/csv roster
+(app/roster.py). Writes accept no form encodings: they are authenticated
+by the session cookie without a CSRF token, and a browser only sends
+JSON or text/csv cross-site after a CORS preflight this app never
+grants. Errors come back as {"error": ...,
+"status": ...}, and a missing login is a 401 rather than a redirect to
+the login page.
+"""
+from datetime import datetime
+
+from flask import abort, jsonify, request
+from flask_login import current_user, login_required
+from werkzeug.exceptions import HTTPException
+
+from app import grade_import, roster
+from app.api import api_bp
+from app.config import db
+from app.decorators import roles_required
+from app.models import Assignment, Course, CourseGrade, Enrollment, User
+from app.pagination import Keyset, paginate
+
+CATALOG_COLUMNS = (
+    Course.id,
+    Course.code,
+    Course.title,
+    Course.description,
+    Course.credits,
+    Course.format,
+    Course.professor,
+    Course.availability,
+    Course.max_students,
+)
+CATALOG_KEYSET = Keyset(Course.id)
+
+
+def _records(rows):
+    """Result rows as dicts keyed by column name, datetimes in ISO 8601."""
+    return [
+        {key: value.isoformat() if isinstance(value, datetime) else value
+         for key, value in row._asdict().items()}
+        for row in rows
+    ]
+
+
+def _page(page):
+    return jsonify(items=_records(page), next=page.next_cursor, prev=page.prev_cursor)
+
+
+def _can_grade(course):
+    return course.professor_id == current_user.id or current_user.is_admin
+
+
+@api_bp.errorhandler(HTTPException)
+def _json_error(error):
+    return jsonify(error=error.name, status=error.code), error.code
+
+
+# course catalog; is_enrolled is always false when logged out
+@api_bp.route("/courses")
+def courses():
+    user_id = current_user.id if current_user.is_authenticated else None
+    return _page(paginate(Course.get_catalog(user_id, columns=CATALOG_COLUMNS), CATALOG_KEYSET))
+
+
+# the current user's enrolled courses with their course grade
+@api_bp.route("/me/courses")
+@login_required
+def my_courses():
+    rows = (
+        db.session.query(
+            Course.id,
+            Course.code,
+            Course.title,
+            Course.credits,
+            Course.format,
+            Course.professor,
+            Enrollment.enrolled_at,
+            CourseGrade.points_earned,
+            CourseGrade.points_possible,
+            CourseGrade.percentage,
+            CourseGrade.letter,
+        )
+        .join(Enrollment, Enrollment.course_id == Course.id)
+        .outerjoin(
+            CourseGrade,
+            db.and_(
+                CourseGrade.course_id == Course.id,
+                CourseGrade.user_id == Enrollment.user_id,
+            ),
+        )
+        .filter(Enrollment.user_id == current_user.id)
+        .order_by(Course.code)
+    )
+    return jsonify(items=_records(rows))
+
+
+# the dashboard's assignment list with the current user's status and score
+@api_bp.route("/courses/<int:course_id>/assignments")
+@login_required
+def course_assignments(course_id):
+    course = Course.query.get_or_404(course_id)
+    if not (_can_grade(course) or current_user.is_enrolled_in(course)):
+        abort(403)
+    return jsonify(items=_records(course.get_assignment_rows(current_user.id)))
+
+
+# students x assignments gradebook, for the course owner and admins
+@api_bp.route("/courses/<int:course_id>/gradebook")
+@login_required
+def course_gradebook(course_id):
+    course = Course.query.get_or_404(course_id)
+    if not _can_grade(course):
+        abort(403)
+    # NumPy is only imported once a gradebook is actually needed
+    from app.gradebook import Gradebook
+    return jsonify(Gradebook.for_course(course_id).to_dict())
+
+
+# bulk grading: {"grades": [{"student": email or id, "score": n}, ...]} or a
+# "student,score" CSV body; bad rows come back in errors, the rest are saved
+@api_bp.route("/assignments/<int:assignment_id>/grades", methods=["POST"])
+@login_required
+def import_grades(assignment_id):
+    assignment = Assignment.query.get_or_404(assignment_id)
+    if not _can_grade(assignment.course):
+        abort(403)
+    if request.mimetype == "text/csv":
+        rows = grade_import.read_csv(request.stream)   # never held in memory whole
+    elif request.is_json:
+        rows = grade_import.read_batch(request.get_json())
+    else:
+        abort(415)
+
+    try:
+        result = grade_import.import_grades(assignment, rows)
+    except grade_import.ImportFormatError as error:
+        db.session.rollback()
+        return jsonify(error=str(error), status=400), 400
+    db.session.commit()
+    return jsonify(
+        applied=result.applied,
+        errors=[error._asdict() for error in result.errors],
+    )
+
+
+# mass enrollment from an "email,course_code" text/csv body; multipart
+# uploads are refused, a cross-site form could post one (see above)
+@api_bp.route("/rosters", methods=["POST"])
+@roles_required(User.ROLE_ADMIN)
+def import_roster():
+    if request.mimetype != "text/csv":
+        abort(415)
+
+    try:
+        result = roster.import_roster(roster.read_csv(request.stream))
+    except roster.ImportFormatError as error:
+        db.session.rollback()
+        # batches before the bad line are committed; re-sending skips them
+        return jsonify(error=str(error), status=400), 400
+    return jsonify(
+        rows=result.rows,
+        enrolled=result.enrolled,
+        skipped=result.skipped,
+        seconds=round(result.seconds, 3),
+        rows_per_second=round(result.rows_per_second, 1),
+        errors=[error._asdict() for error in result.errors],
+    )
@@ -0,0 +1,8 @@
+from flask_wtf import FlaskForm
+from flask_wtf.file import FileAllowed, FileField, FileRequired
+from wtforms import SubmitField
+
+
+class GradeImportForm(FlaskForm):
+    file = FileField('Grades CSV', validators=[FileRequired(message="Choose a CSV file"), FileAllowed(['csv'], 'CSV files only')])
+    submit = SubmitField('Import Grades', render_kw={"class": "btn btn-primary border-primary-subtle"})
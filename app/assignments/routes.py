@@ -4,49 +4,37 @@ from app.models import Course, User, Assignment, StudentAssignment
 from app.config import db
 from app.assignments.assignment_form import AssignmentForm
 from app.assignments.grade_form import GradeForm
+from app.assignments.grade_import_form import GradeImportForm
+from app import grade_import
 from app.decorators import roles_required
+from app.pagination import Keyset, paginate
+from app.notifications import notify_course
+from app.conditional import ConditionalPage, latest
 
 
 assignments_bp = Blueprint("assignments", __name__, template_folder='templates')
 
+# stable sort keys for the paginated listings
+COURSE_KEYSET = Keyset(Course.id, key=lambda item: (item[0].id,))
+SUBMISSION_KEYSET = Keyset(StudentAssignment.id)
+
 #displays all the assignments by course -- Admins see all courses, students see only their enrolled courses
 @assignments_bp.route('/')
 @login_required
 def index():
+    # one page of the courses visible to this role, joined with their
+    # assignments in a single query
+    page = paginate(Course.visible_to(current_user), COURSE_KEYSET, load=Course.with_assignments)
+
     courses_with_assignments = []
+    for course, assignments in page:
+        courses_with_assignments.append({
+            'course': course,
+            'assignments': assignments,
+            'assignment_count': len(assignments)
+        })
     
-    if current_user.is_admin:
-        # Admins see all courses
-        all_courses = Course.query.all()
-        for course in all_courses:
-            assignments = course.assignments.all()
-            courses_with_assignments.append({
-                'course': course,
-                'assignments': assignments,
-                'assignment_count': len(assignments)
-            })
-    elif current_user.is_student:
-        # Students see only their enrolled courses
-        enrolled_courses = current_user.courses.all()
-        for course in enrolled_courses:
-            assignments = course.assignments.all()
-            courses_with_assignments.append({
-                'course': course,
-                'assignments': assignments,
-                'assignment_count': len(assignments)
-            })
-    else:
-        # Professors see only their courses
-        professor_courses = Course.query.filter_by(professor_id=current_user.id).all()
-        for course in professor_courses:
-            assignments = course.assignments.all()
-            courses_with_assignments.append({
-                'course': course,
-                'assignments': assignments,
-                'assignment_count': len(assignments)
-            })
-    
-    return render_template('assignments/assignments_list.html', courses_with_assignments=courses_with_assignments)
+    return render_template('assignments/assignments_list.html', courses_with_assignments=courses_with_assignments, page=page)
 
 
 #create new assignment route
@@ -78,6 +66,10 @@ def create_assignment(course_id=None):
         db.session.add(new_assignment)
         db.session.commit()
 
+        # every enrolled student hears about it, without holding up the redirect
+        course = course or db.session.get(Course, final_course_id)
+        notify_course(final_course_id, f"New assignment in {course.code}: {new_assignment.title}")
+
         flash('Assignment created!', 'success')
         
         if course_id:
@@ -94,8 +86,15 @@ def create_assignment(course_id=None):
 def assignment_detail(assignment_id):
     assignment = Assignment.query.get_or_404(assignment_id)
     course = assignment.course 
-    
-    return render_template('assignments/assignment_details.html', assignment=assignment, course=course)
+
+    # 304 when neither the assignment nor its course changed
+    page = ConditionalPage(
+        assignment.id, assignment.updated_at, course.id, course.version, course.updated_at,
+        last_modified=latest(assignment.updated_at, course.updated_at),
+    )
+    if page.is_fresh():
+        return page.not_modified()
+    return page.finish(render_template('assignments/assignment_details.html', assignment=assignment, course=course))
 
 
 # deletes assignment
@@ -164,10 +163,12 @@ def assignment_submissions(assignment_id):
         flash("You don't have access to view these submissions.", 'danger')
         return redirect(url_for('courses.course_dashboard', course_id=course.id))
     
-   # all completed assginments 
-    submissions = StudentAssignment.query.filter_by(
-        assignment_id=assignment_id
-    ).all()
+   # all completed assginments, a page at a time with their students
+    submissions = paginate(
+        StudentAssignment.query.filter_by(assignment_id=assignment_id)
+        .options(db.joinedload(StudentAssignment.user)),
+        SUBMISSION_KEYSET,
+    )
     
     return render_template(
         'assignments/assignment_submissions.html',
@@ -177,6 +178,46 @@ def assignment_submissions(assignment_id):
     )
 
 
+# Grade a whole class from one CSV upload
+@assignments_bp.route('/<int:assignment_id>/grades/import', methods=['GET', 'POST'])
+@login_required
+@roles_required(User.ROLE_PROFESSOR, User.ROLE_ADMIN)
+def import_grades(assignment_id):
+    assignment = Assignment.query.get_or_404(assignment_id)
+    course = assignment.course
+
+    if not (course.professor_id == current_user.id or current_user.is_admin):
+        flash("You don't have access to grade this assignment.", 'danger')
+        return redirect(url_for('courses.course_dashboard', course_id=course.id))
+
+    form = GradeImportForm()
+    errors = []
+
+    if form.validate_on_submit():
+        try:
+            # rows are parsed off the upload stream as they are applied
+            result = grade_import.import_grades(
+                assignment, grade_import.read_csv(form.file.data.stream))
+        except grade_import.ImportFormatError as error:
+            db.session.rollback()
+            flash(f'Could not read the file: {error}', 'danger')
+        else:
+            db.session.commit()
+            errors = result.errors
+            flash(f'Imported {result.applied} grades, skipped {len(errors)} rows.',
+                  'warning' if errors else 'success')
+            if not errors:
+                return redirect(url_for('assignments.assignment_submissions', assignment_id=assignment_id))
+
+    return render_template(
+        'assignments/import_grades.html',
+        form=form,
+        assignment=assignment,
+        course=course,
+        errors=errors
+    )
+
+
 # Grade the submissions
 @assignments_bp.route('/<int:assignment_id>/grade/<int:student_id>', methods=['GET', 'POST'])
 @login_required
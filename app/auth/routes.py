@@ -1,6 +1,7 @@
 from flask import render_template, Blueprint, request, flash, redirect, url_for
 from flask_login import login_user, logout_user, login_required, current_user
 from app.models import User
+from app.hashing import HashingBusy
 from app.config import db
 from app.forms import LoginForm, RegistrationForm
 from urllib.parse import urlparse, urljoin
@@ -19,7 +20,11 @@ def register():
     if form.validate_on_submit():
         # new user
         user = User(email=form.email.data, role=form.role.data)
-        user.set_password(form.password.data)
+        try:
+            user.set_password(form.password.data)
+        except HashingBusy:
+            flash('The server is busy. Please try again in a moment.', 'warning')
+            return render_template('auth/register.html', form=form), 503, {"Retry-After": "5"}
 
         # saving to db
         db.session.add(user)
@@ -56,9 +61,17 @@ def login():
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
         # check if user exist and password matches
-        if user is None or not user.check_password(form.password.data):
+        try:
+            valid = user is not None and user.check_password(form.password.data)
+        except HashingBusy:
+            # every hashing worker is taken and the queue is full: shed the login
+            flash('Too many people are signing in right now. Please try again in a moment.', 'warning')
+            return render_template("auth/login.html", form=form), 503, {"Retry-After": "5"}
+        if not valid:
             flash('Invalid username or password', 'danger')
             return redirect(url_for('auth.login'))
+        # a rehash under the current policy is saved with the login
+        db.session.commit()
         # log in user
         login_user(user, remember=form.remember_me.data)
         
@@ -0,0 +1,71 @@
+"""Conditional GET (ETag / Last-Modified) for pages built from a few rows.
+
+A view lists the row versions its page is rendered from (ids, version
+stamps, updated_at values, counts) and asks the ConditionalPage whether
+the client's copy is still current before doing any other work:
+
+    page = ConditionalPage(course.version, course.updated_at, is_enrolled,
+                           last_modified=course.updated_at)
+    if page.is_fresh():
+        return page.not_modified()
+    return page.finish(render_template(...))
+
+Every page also shows who is looking (the navbar, the unread notification
+badge), so the viewer is always part of the ETag, and the response is
+marked private. Freshness is decided on the ETag alone: Last-Modified is
+sent for information, since the per-user parts have no timestamp. While a
+flashed message is waiting the page is rendered and sent without
+validators, so the message can't come back from a cached copy.
+"""
+import hashlib
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+from app import notifications
+
+
+def _viewer():
+    if not current_user.is_authenticated:
+        return (None,)
+    previews = notifications.unread_previews(current_user.id)
+    return (
+        current_user.id,
+        current_user.email,
+        current_user.role,
+        tuple(preview.id for preview in previews),
+    )
+
+
+def latest(*timestamps):
+    """The newest of the timestamps that are set, for Last-Modified."""
+    return max((t for t in timestamps if t is not None), default=None)
+
+
+def page_etag(*parts):
+    return hashlib.sha1(repr(_viewer() + parts).encode()).hexdigest()
+
+
+class ConditionalPage:
+    def __init__(self, *parts, last_modified=None):
+        self.etag = None if session.get("_flashes") else page_etag(*parts)
+        self.last_modified = last_modified
+
+    def is_fresh(self):
+        """Whether the client already holds this version of the page."""
+        return self.etag is not None and request.if_none_match.contains_weak(self.etag)
+
+    def not_modified(self):
+        return self.finish(current_app.response_class(status=304))
+
+    def finish(self, rv):
+        """Turns the view's return value into a response carrying the validators."""
+        response = make_response(rv)
+        if self.etag is not None:
+            response.set_etag(self.etag, weak=True)
+            if self.last_modified is not None:
+                response.last_modified = self.last_modified
+            # the browser keeps it, but asks again every time
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+        return response
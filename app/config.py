@@ -1,7 +1,10 @@
 import os
 from flask_sqlalchemy import SQLAlchemy
 
-db= SQLAlchemy()
+from app.routing import RoutingSession
+
+# RoutingSession sends read-only requests to the replica, if one is configured
+db= SQLAlchemy(session_options={'class_': RoutingSession})
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
@@ -11,9 +14,112 @@ class Config:
     SECRET_KEY = 'you-will-never-guess'
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # apply pending schema migrations (app/migrations.py) in create_app
+    AUTO_MIGRATE = True
     # flask--login config
     LOGIN_VIEW = 'auth.login'
     LOGIN_MESSAGE = 'Please log in to access this page.'
     LOGIN_MESSAGE_CATEGORY = 'info'
+    # logged-in identities cached by the user loader (app/identity.py)
+    USER_CACHE_SIZE = 4096
+    # other worker processes keep an old role for at most this long
+    USER_CACHE_TTL = 5  # seconds
+    # unread notification previews per (user, version) (app/notifications.py)
+    NOTIFICATION_CACHE_SIZE = 4096
+    NOTIFICATION_CACHE_TTL = 60  # seconds
+    # rendered course HTML per (course, version) (app/fragments.py)
+    FRAGMENT_CACHE_SIZE = 4096
+    FRAGMENT_CACHE_BYTES = 8 * 1024 * 1024
+    FRAGMENT_CACHE_TTL = 600  # seconds
+    # course-wide notifications are inserted on a background pool
+    NOTIFICATION_ASYNC = True
+    NOTIFICATION_WORKERS = 2
+    # rows per page on paginated listings
+    PER_PAGE = 20
+    # PRAGMAs run on every new SQLite connection (app/database.py)
+    SQLITE_PRAGMAS = {}
+    # read replica for GET requests (app/routing.py); off when unset
+    REPLICA_DATABASE_URI = os.environ.get('REPLICA_DATABASE_URL')
+    REPLICA_ENGINE_OPTIONS = {}
+    # after writing, a user reads from the primary for this long
+    READ_YOUR_WRITES_SECONDS = 10
+    # keep a SQLite replica file copied from a SQLite primary (local testing)
+    SQLITE_REPLICA_REFRESH_SECONDS = None
+    # per-request SQL counts/timings in logs, and in headers for admins and
+    # with app.debug (app/instrumentation.py)
+    SQL_INSTRUMENTATION = True
+    # a statement shape run more often than this in one request is flagged
+    SQL_REPEAT_THRESHOLD = 5
+    # SQL panel at the bottom of every page (always on with app.debug)
+    SQL_DEBUG_PANEL = False
+    # per-endpoint request metrics at /admin/metrics (app/metrics.py)
+    METRICS_ENABLED = True
+    # latency histogram bucket bounds, in seconds
+    METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    # admin request profiles (app/profiler.py): ?_profile=1 or an X-Profile header
+    PROFILE_DIR = os.path.join(basedir, 'profiles')
+    PROFILE_HEADER = 'X-Profile'
+    PROFILE_QUERY_ARG = '_profile'
+    PROFILE_TOP_FUNCTIONS = 20
+    # older profiles are deleted once PROFILE_DIR holds this many
+    PROFILE_KEEP = 200
+    # password hashes (app/hashing.py): a Werkzeug method with its costs,
+    # e.g. 'pbkdf2:sha256:600000'; older hashes are redone at login
+    PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+    PASSWORD_HASH_WORKERS = os.cpu_count() or 1
+    # hashes waiting for a worker, and how long a login waits for a place
+    PASSWORD_HASH_QUEUE = 64
+    PASSWORD_HASH_WAIT = 10  # seconds
+
+
+class SQLiteConfig(Config):
+    """SQLite tuned for concurrent writers: WAL lets readers carry on while
+    one connection writes, and the busy timeout queues writers instead of
+    failing them with "database is locked"."""
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',    # durable at checkpoints; safe with WAL
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,   # negative = KiB, i.e. 64 MiB
+    }
+
+
+class SQLiteReplicaConfig(SQLiteConfig):
+    """SQLite profile plus a copy of app.db, refreshed every few seconds,
+    standing in for a read replica."""
+    REPLICA_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'app-replica.db')
+    SQLITE_REPLICA_REFRESH_SECONDS = 2
+    READ_YOUR_WRITES_SECONDS = 5
+
+
+class ServerConfig(Config):
+    """A pooled client/server database (e.g. PostgreSQL) from DATABASE_URL."""
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'postgresql://localhost/lms')
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_pre_ping': True,  # drop connections the server has closed
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    }
+    REPLICA_ENGINE_OPTIONS = SQLALCHEMY_ENGINE_OPTIONS
+
+
+PROFILES = {
+    'default': Config,
+    'sqlite': SQLiteConfig,
+    'sqlite-replica': SQLiteReplicaConfig,
+    'server': ServerConfig,
+}
+
+
+def config_for(name=None):
+    """The config class for a profile name, or for $LMS_CONFIG."""
+    name = name or os.environ.get('LMS_CONFIG', 'default')
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"unknown config profile {name!r}, expected one of {sorted(PROFILES)}")
 
 
@@ -5,26 +5,31 @@ from app.models import Course, User, Assignment, Enrollment, StudentAssignment,
 from app.config import db
 from app.courses.course_form import CourseForm
 from app.courses import courses_bp
+from app.grades import get_course_grade
+from app.pagination import Keyset, paginate
+from app.conditional import ConditionalPage, latest
+
+
+# stable sort keys for the paginated listings
+CATALOG_KEYSET = Keyset(Course.id, key=lambda row: (row[0].id,))
+ANNOUNCEMENT_KEYSET = Keyset(Announcement.created_at, Announcement.id, descending=True)
 
 
 # gets all available courses
 @courses_bp.route('/')
 def courses_list():
-    all_courses = Course.query.all()
-    
-    # checking if current user is enrolled
-    courses_with_status = []
-    for course in all_courses:
-        is_enrolled = False
-        if current_user.is_authenticated:
-            is_enrolled = current_user.is_enrolled_in(course)
+    user_id = current_user.id if current_user.is_authenticated else None
 
-            courses_with_status.append({
-                'course': course,
-                'is_enrolled': is_enrolled,
-                'available_spots': course.max_students - course.get_student_count() if course.max_students else None
-            })
-    return render_template('courses/courses_list.html', courses=courses_with_status)
+    # enrollment counts and the current user's status come back with each course
+    page = paginate(Course.get_catalog(user_id), CATALOG_KEYSET)
+    # the course markup itself comes from the fragment cache (app/fragments.py)
+    courses_with_status = []
+    for course, enrolled_count, is_enrolled in page:
+        courses_with_status.append({
+            'course': course,
+            'is_enrolled': is_enrolled,
+        })
+    return render_template('courses/courses_list.html', courses=courses_with_status, page=page)
 
 
 # Gets all the current user's enrolled courses
@@ -51,24 +56,18 @@ def my_created_courses():
 def enroll_course(course_id):
     # get course
     course = Course.query.get_or_404(course_id)
+    title = course.title
+
+    # claims a seat and enrolls in one transaction
+    result = course.reserve_seat(current_user.id)
 
-    # redirect if not available
-    if not course.is_available():
+    if result == Course.RESERVE_UNAVAILABLE:
         flash('This course is not available for enrollment.', 'danger')
-        return redirect(url_for('courses.courses_list'))
-    
-    # redirect if already enrolled
-    if current_user.is_enrolled_in(course):
-        flash(f'You are already enrolled in {course.title}', 'warning')
-        return redirect(url_for('courses.courses_list'))
-    
-    # enroll in course
-    if current_user.enroll_in_course(course):
-        db.session.commit()
-        flash(f'You enrolled in {course.title}', 'success')
+    elif result == Course.RESERVE_DUPLICATE:
+        flash(f'You are already enrolled in {title}', 'warning')
     else:
-        flash(f'You could not enroll in {course.title}', 'danger')
-    
+        flash(f'You enrolled in {title}', 'success')
+
     return redirect(url_for('courses.courses_list'))
 
     
@@ -100,13 +99,15 @@ def course_detail(course_id):
     is_enrolled = False
     if current_user.is_authenticated:
         is_enrolled = current_user.is_enrolled_in(course)
-    
-    enrolled_count = course.get_student_count()
-    available_spots = None
-    if course.max_students:
-        available_spots = course.max_students - enrolled_count
-    
-    return render_template('courses/course_detail.html', course=course, is_enrolled=is_enrolled, enrolled_count=enrolled_count, available_spots=available_spots)
+
+    # 304 unless the course (edits, seat counts) or the viewer's status changed
+    page = ConditionalPage(course.id, course.version, course.updated_at, is_enrolled,
+                           last_modified=course.updated_at)
+    if page.is_fresh():
+        return page.not_modified()
+
+    # course info and seat counts are rendered from the fragment cache
+    return page.finish(render_template('courses/course_detail.html', course=course, is_enrolled=is_enrolled))
 
 
 # toggles assignment status for student
@@ -167,71 +168,51 @@ def course_dashboard(course_id, tab='assignments'):
     if not (is_enrolled or is_course_owner or current_user.is_admin):
         flash('You must be enrolled in this course to view the dashboard.', 'warning')
         return redirect(url_for('courses.course_detail', course_id=course_id))
-    
-    enrolled_count = course.get_student_count()
-    enrolled_students = course.get_enrolled_students()
-    assignments_query = Assignment.query.filter_by(course_id=course_id).order_by(Assignment.due_date).all()
-    
-    assignments = []
-    for assignment in assignments_query:
-        student_assignment = StudentAssignment.query.filter_by(
-            assignment_id=assignment.id,
-            user_id=current_user.id
-        ).first()
-        
-        status = student_assignment.status if student_assignment else 'Not Started'
-        score = student_assignment.score if student_assignment else None
-        
-        assignment_data = {
-            'id': assignment.id,
-            'title': assignment.title,
-            'description': assignment.description,
-            'due_date': assignment.due_date,
-            'max_points': assignment.max_points,
-            'status': status,
-            'score': score
-        }
-        assignments.append(type('Assignment', (), assignment_data)())
-    
-    # grades based on student's completed assignments
-    total_points_possible = sum(a.max_points for a in assignments_query) if assignments_query else 0
-    total_points_earned = sum(
-        sa.score for sa in StudentAssignment.query.filter_by(user_id=current_user.id).all()
-        if sa.score is not None and sa.assignment.course_id == course_id
+
+    # every tab is built from these rows; owners see everyone's progress
+    can_grade = is_course_owner or current_user.is_admin
+    versions = course.get_row_versions(None if can_grade else current_user.id)
+    page = ConditionalPage(
+        tab, course.version, course.updated_at, is_enrolled, is_course_owner, *versions,
+        last_modified=latest(course.updated_at, *versions[1::2]),
     )
-    current_grade = (total_points_earned / total_points_possible * 100) if total_points_possible > 0 else 0
-    
-    # Calculate letter grade
-    if current_grade >= 90:
-        letter_grade = 'A'
-    elif current_grade >= 80:
-        letter_grade = 'B'
-    elif current_grade >= 70:
-        letter_grade = 'C'
-    elif current_grade >= 60:
-        letter_grade = 'D'
-    else:
-        letter_grade = 'F'
+    if page.is_fresh():
+        return page.not_modified()
+
+    enrolled_count = course.get_student_count()
+    # roster rows carry each student's materialized grade
+    roster = course.get_roster()
+    enrolled_students = [student for student, _ in roster]
+    # assignments with this user's status/score
+    assignments = course.get_assignment_rows(current_user.id)
+
+    # current grade is one precomputed course_grades row
+    grade = get_course_grade(current_user.id, course_id) if is_enrolled else None
+    total_points_earned = grade.points_earned if grade else 0
+    total_points_possible = grade.points_possible if grade else 0
+    current_grade = grade.percentage if grade else 0
+    letter_grade = grade.letter if grade else 'F'
     
-    # Get announcements for this course from the database
-    announcements = Announcement.query.filter_by(course_id=course_id).order_by(Announcement.created_at.desc()).all()
+    # newest announcements first, one page at a time
+    announcements = None
+    if tab == 'announcements':
+        announcements = paginate(Announcement.query.filter_by(course_id=course_id), ANNOUNCEMENT_KEYSET)
     
-    # Get all student submissions for this course 
-    student_submissions = {}
-    if is_course_owner or current_user.is_admin:
-        all_submissions = StudentAssignment.query.join(Assignment).filter(
-            Assignment.course_id == course_id
-        ).all()
-        for submission in all_submissions:
-            student_submissions[(submission.assignment_id, submission.user_id)] = submission
+    # students x assignments matrix, only built for the submissions tab
+    gradebook = None
+    if tab == 'submissions' and can_grade:
+        # NumPy is only imported once a gradebook is actually needed
+        from app.gradebook import Gradebook
+        gradebook = Gradebook.for_course(course_id)
     
-    return render_template(
+    return page.finish(render_template(
         'courses/course_dashboard.html',
         course=course,
         is_enrolled=is_enrolled,
         is_course_owner=is_course_owner,
         enrolled_count=enrolled_count,
         enrolled_students=enrolled_students,
+        roster=roster,
         assignments=assignments,
         active_tab=tab,
         total_points_earned=total_points_earned,
@@ -239,8 +220,8 @@ def course_dashboard(course_id, tab='assignments'):
         current_grade=round(current_grade, 1),
         letter_grade=letter_grade,
         announcements=announcements,
-        student_submissions=student_submissions
-    )
+        gradebook=gradebook
+    ))
 
 
 # New courses route
@@ -338,6 +319,7 @@ def update_course(course_id):
        course_info.availability = course_form.availability.data
        course_info.format = course_form.format.data
        course_info.max_students = course_form.max_students.data
+       course_info.touch()
        db.session.add(course_info)
        db.session.commit()
 
@@ -0,0 +1,36 @@
+"""Streaming reader for the CSV uploads (grades, rosters).
+
+Rows are decoded and parsed straight off a binary stream (an upload or a
+request body), so a file is never held in memory whole.
+"""
+import codecs
+import csv
+
+
+class ImportFormatError(ValueError):
+    """The input as a whole can't be read (bad header, not a JSON batch)."""
+
+
+def read_csv(stream, columns, encoding="utf-8-sig"):
+    """Yields (line number, *fields) for each non-blank row under the header.
+
+    The header must start with columns (case-insensitive); missing fields
+    come back as empty strings, extra ones are ignored.
+    """
+    reader = csv.reader(codecs.iterdecode(stream, encoding))
+    try:
+        header = [name.strip().lower() for name in next(reader)]
+    except StopIteration:
+        return
+    except UnicodeDecodeError as error:
+        raise ImportFormatError("the file is not UTF-8 text") from error
+    if header[:len(columns)] != list(columns):
+        raise ImportFormatError(f'the first line must be the header "{",".join(columns)}"')
+    try:
+        for record in reader:
+            if not any(field.strip() for field in record):
+                continue
+            fields = (record + [""] * len(columns))[:len(columns)]
+            yield (reader.line_num, *(field.strip() for field in fields))
+    except (csv.Error, UnicodeDecodeError) as error:
+        raise ImportFormatError(f"line {reader.line_num}: {error}") from error
@@ -0,0 +1,31 @@
+"""Per-connection database settings from the active config profile."""
+from sqlalchemy import event
+
+from app import routing
+from app.config import db
+
+
+def _pragma_setter(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+    return set_pragmas
+
+
+def init_app(app):
+    """Runs SQLITE_PRAGMAS on every new connection of the app's SQLite engines.
+
+    Call after routing.init_app(), so a replica engine gets them too.
+    """
+    pragmas = app.config.get("SQLITE_PRAGMAS")
+    if not pragmas:
+        return
+    with app.app_context():
+        engines = list(db.engines.values())
+    if routing.replica_engine(app) is not None:
+        engines.append(routing.replica_engine(app))
+    for engine in engines:
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _pragma_setter(pragmas))
@@ -0,0 +1,51 @@
+"""Rendered per-course HTML, shared by every visitor.
+
+The catalog cards and the course detail page render the same course
+markup for everyone; only the enrolled badge, the link target and the
+action buttons depend on who is looking. The shared part lives in its
+own template under courses/fragments/, rendered with nothing but the
+course in its context, and the page stitches the per-user parts around
+it.
+
+Entries are keyed on (template, course id, course.version). The version
+is a column bumped by every seat change and by Course.touch() on edits,
+and it is read with the course row itself, so a stale entry is simply
+never looked up again; the LRU (bounded by entries and by bytes) ages it
+out, and any worker sees another worker's edits on its next page view.
+"""
+from flask import current_app
+from markupsafe import Markup
+
+from app.cache import LRUCache
+
+_CACHE_KEY = "fragment_cache"
+
+
+def _html_bytes(html):
+    return len(html.encode("utf-8"))
+
+
+def init_app(app):
+    app.extensions[_CACHE_KEY] = LRUCache(
+        app.config["FRAGMENT_CACHE_SIZE"],
+        app.config["FRAGMENT_CACHE_TTL"],
+        maxbytes=app.config["FRAGMENT_CACHE_BYTES"],
+        sizeof=_html_bytes,
+    )
+    app.add_template_global(course_fragment)
+
+
+def fragment_cache():
+    return current_app.extensions[_CACHE_KEY]
+
+
+def course_fragment(template, course):
+    """The rendered template for course, from the cache when current."""
+    key = (template, course.id, course.version)
+    cache = fragment_cache()
+    html = cache.get(key)
+    if html is None:
+        # straight through jinja: no context processors, no current_user
+        html = Markup(current_app.jinja_env.get_template(template).render(course=course))
+        cache.set(key, html)
+    return html
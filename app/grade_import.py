@@ -0,0 +1,190 @@
+"""Bulk grading: many (student, score) pairs for one assignment at once.
+
+Rows come from a CSV file (a "student,score" header, then one row per
+student; student is an email or a user id) or from a JSON batch. CSV is
+read straight off the upload stream and rows are applied in chunks, so
+memory stays flat however large the file is; only the course roster and
+the ids already seen are kept.
+
+Every row is validated in the same pass: the student must be enrolled in
+the course and appear once, and the score must be a whole number from 0
+to the assignment's max_points. Bad rows are reported back with their row
+number and skipped; good rows go to student_assignments as one batched
+INSERT ... ON CONFLICT DO UPDATE per chunk (new rows are marked
+Completed, existing ones only get the new score, like grade_submission);
+databases without an upsert get an UPDATE and an INSERT per chunk.
+Re-importing a fixed file is therefore safe.
+
+The upsert bypasses the ORM, so course_grades is rebuilt for the course
+afterwards. The caller commits.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app import csv_rows
+from app.config import db
+from app.grades import rebuild_course_grades
+from app.models import Enrollment, StudentAssignment, User
+
+CHUNK_SIZE = 500
+CSV_COLUMNS = ("student", "score")
+
+RowError = namedtuple("RowError", "row student error")
+ImportResult = namedtuple("ImportResult", "applied errors")
+
+# raised by the readers for input that can't be read at all
+ImportFormatError = csv_rows.ImportFormatError
+
+
+# ---------- parsing: each yields (row number, student, score) ----------
+
+def read_csv(stream):
+    """Rows of a binary "student,score" CSV stream, parsed incrementally."""
+    return csv_rows.read_csv(stream, CSV_COLUMNS)
+
+
+def read_batch(payload):
+    """Rows of a JSON batch: {"grades": [{"student": ..., "score": ...}, ...]}."""
+    items = payload.get("grades") if isinstance(payload, dict) else None
+    if not isinstance(items, list):
+        raise ImportFormatError('expected {"grades": [{"student": ..., "score": ...}, ...]}')
+    for number, item in enumerate(items, start=1):
+        if isinstance(item, dict):
+            yield number, item.get("student"), item.get("score")
+        else:
+            yield number, None, None
+
+
+# ---------- validation and upsert ----------
+
+def _parse_score(value, max_points):
+    if isinstance(value, bool):
+        return None, "score must be a whole number"
+    if isinstance(value, str):
+        try:
+            value = int(value)
+        except ValueError:
+            return None, "score must be a whole number"
+    elif isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if not isinstance(value, int):
+        return None, "score is required" if value is None else "score must be a whole number"
+    if not 0 <= value <= max_points:
+        return None, f"score must be between 0 and {max_points}"
+    return value, None
+
+
+def _roster(course_id):
+    """Enrolled students as ({email: id}, {id}), in one query."""
+    rows = (
+        db.session.query(User.id, User.email)
+        .join(Enrollment, Enrollment.user_id == User.id)
+        .filter(Enrollment.course_id == course_id)
+    )
+    by_email = {email.lower(): user_id for user_id, email in rows}
+    return by_email, set(by_email.values())
+
+
+def _upsert_statement(dialect):
+    """The dialect's INSERT ... ON CONFLICT/DUPLICATE KEY UPDATE, or None."""
+    table = StudentAssignment.__table__
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(
+            score=stmt.inserted.score, updated_at=stmt.inserted.updated_at
+        )
+    insert = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}.get(dialect)
+    if insert is None:
+        return None
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.assignment_id],
+        set_={"score": stmt.excluded.score, "updated_at": stmt.excluded.updated_at},
+    )
+
+
+def _update_then_insert(conn, chunk):
+    """Portable upsert: UPDATE the rows that exist, INSERT the others.
+
+    For dialects without a native upsert. A concurrent import inserting the
+    same rows between the two statements fails on the unique key instead
+    of being merged.
+    """
+    table = StudentAssignment.__table__
+    assignment_id = chunk[0]["assignment_id"]
+    existing = set(conn.execute(
+        db.select(table.c.user_id).where(
+            table.c.assignment_id == assignment_id,
+            table.c.user_id.in_([row["user_id"] for row in chunk]),
+        )
+    ).scalars())
+    updates = [row for row in chunk if row["user_id"] in existing]
+    inserts = [row for row in chunk if row["user_id"] not in existing]
+    if updates:
+        conn.execute(
+            db.update(table)
+            .where(table.c.user_id == db.bindparam("b_user_id"),
+                   table.c.assignment_id == db.bindparam("b_assignment_id"))
+            .values(score=db.bindparam("b_score"), updated_at=db.bindparam("b_updated_at")),
+            [{f"b_{key}": row[key] for key in ("user_id", "assignment_id", "score", "updated_at")}
+             for row in updates],
+        )
+    if inserts:
+        conn.execute(db.insert(table), inserts)
+
+
+def import_grades(assignment, rows, chunk_size=CHUNK_SIZE):
+    """Validates and applies (row, student, score) rows; returns an ImportResult."""
+    by_email, enrolled = _roster(assignment.course_id)
+    max_points = assignment.max_points or 0
+    conn = db.session.connection()
+    upsert = _upsert_statement(conn.dialect.name)
+    now = datetime.utcnow()
+
+    seen, errors, chunk = set(), [], []
+    applied = 0
+
+    def flush_chunk():
+        if not chunk:
+            return
+        if upsert is None:
+            _update_then_insert(conn, chunk)
+        else:
+            conn.execute(upsert, chunk)
+        chunk.clear()
+
+    for number, student, raw_score in rows:
+        key = str(student).strip().lower() if student is not None else ""
+        user_id = by_email.get(key)
+        if user_id is None and key.isdigit() and int(key) in enrolled:
+            user_id = int(key)
+        if user_id is None:
+            errors.append(RowError(number, student, "student is not enrolled in this course"))
+            continue
+        if user_id in seen:
+            errors.append(RowError(number, student, "student appears more than once"))
+            continue
+        score, error = _parse_score(raw_score, max_points)
+        if error:
+            errors.append(RowError(number, student, error))
+            continue
+
+        seen.add(user_id)
+        chunk.append({
+            "user_id": user_id,
+            "assignment_id": assignment.id,
+            "status": StudentAssignment.STATUS_COMPLETED,
+            "score": score,
+            "completed_at": now,
+            "updated_at": now,
+        })
+        applied += 1
+        if len(chunk) >= chunk_size:
+            flush_chunk()
+    flush_chunk()
+
+    if applied:
+        rebuild_course_grades([assignment.course_id])
+    return ImportResult(applied, errors)
@@ -0,0 +1,184 @@
+"""Instructor gradebook for one course as a dense students x assignments matrix.
+
+Scores are loaded column-wise (three narrow queries, no ORM objects) into
+NumPy arrays. Cells without a StudentAssignment row are masked out, and the
+per-student totals, per-assignment means and completion rates are all
+computed as array operations instead of dict lookups in the template.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from app.config import db
+from app.models import User, Enrollment, Assignment, StudentAssignment
+
+# status strings <-> small integer codes stored in the matrix
+STATUS_LABELS = (
+    StudentAssignment.STATUS_NOT_STARTED,
+    StudentAssignment.STATUS_IN_PROGRESS,
+    StudentAssignment.STATUS_COMPLETED,
+)
+NOT_STARTED, IN_PROGRESS, COMPLETED = range(len(STATUS_LABELS))
+
+Cell = namedtuple("Cell", "student_id email status score")
+Column = namedtuple("Column", "assignment mean completion_rate cells")
+StudentTotal = namedtuple("StudentTotal", "student_id email points_earned percentage")
+
+
+def _index_of(ids, values):
+    """Positions of values within ids (any order) and a mask of those found."""
+    order = np.argsort(ids)
+    positions = np.searchsorted(ids, values, sorter=order)
+    positions = np.clip(positions, 0, len(ids) - 1)
+    found = ids[order[positions]] == values
+    return order[positions], found
+
+
+class Gradebook:
+    def __init__(self, students, assignments, scores, status, submitted):
+        self.students = students          # rows of (id, email), sorted by email
+        self.assignments = assignments    # rows of (id, title, max_points), by due date
+        self.scores = scores              # float [S, A], NaN where ungraded
+        self.status = status              # int8 [S, A] status codes
+        self.submitted = submitted        # bool [S, A], a StudentAssignment exists
+
+    @classmethod
+    def for_course(cls, course_id):
+        students = (
+            db.session.query(User.id, User.email)
+            .join(Enrollment, Enrollment.user_id == User.id)
+            .filter(Enrollment.course_id == course_id)
+            .order_by(User.email)
+            .all()
+        )
+        assignments = (
+            db.session.query(Assignment.id, Assignment.title, Assignment.max_points)
+            .filter(Assignment.course_id == course_id)
+            .order_by(Assignment.due_date, Assignment.id)
+            .all()
+        )
+        status_code = db.case(
+            *[(StudentAssignment.status == label, code)
+              for code, label in enumerate(STATUS_LABELS)],
+            else_=NOT_STARTED,
+        )
+        cells = (
+            db.session.query(
+                StudentAssignment.user_id,
+                StudentAssignment.assignment_id,
+                StudentAssignment.score,
+                status_code,
+            )
+            .join(Assignment, Assignment.id == StudentAssignment.assignment_id)
+            .filter(Assignment.course_id == course_id)
+            .all()
+        )
+
+        shape = (len(students), len(assignments))
+        scores = np.full(shape, np.nan)
+        status = np.zeros(shape, dtype=np.int8)
+        submitted = np.zeros(shape, dtype=bool)
+
+        if cells and students and assignments:
+            user_ids, assignment_ids, raw_scores, codes = zip(*cells)
+            rows, row_found = _index_of(
+                np.fromiter((s.id for s in students), np.int64, len(students)),
+                np.asarray(user_ids, dtype=np.int64),
+            )
+            cols, col_found = _index_of(
+                np.fromiter((a.id for a in assignments), np.int64, len(assignments)),
+                np.asarray(assignment_ids, dtype=np.int64),
+            )
+            # submissions from students who have since dropped are skipped
+            keep = row_found & col_found
+            rows, cols = rows[keep], cols[keep]
+
+            values = np.array(
+                [np.nan if s is None else s for s in raw_scores], dtype=float
+            )
+            scores[rows, cols] = values[keep]
+            status[rows, cols] = np.asarray(codes, dtype=np.int8)[keep]
+            submitted[rows, cols] = True
+
+        return cls(students, assignments, scores, status, submitted)
+
+    # ---- vectorized statistics ----
+    @property
+    def max_points(self):
+        return np.array([a.max_points or 0 for a in self.assignments], dtype=float)
+
+    @property
+    def points_possible(self):
+        return self.max_points.sum()
+
+    def student_totals(self):
+        return np.nansum(self.scores, axis=1)
+
+    def assignment_means(self):
+        graded = ~np.isnan(self.scores)
+        counts = graded.sum(axis=0)
+        sums = np.where(graded, self.scores, 0.0).sum(axis=0)
+        return np.divide(sums, counts, out=np.full(counts.shape, np.nan), where=counts > 0)
+
+    def completion_rates(self):
+        if not self.students:
+            return np.zeros(len(self.assignments))
+        return (self.status == COMPLETED).sum(axis=0) / len(self.students)
+
+    # ---- rendering helpers (plain Python values for Jinja) ----
+    def columns(self):
+        means = self.assignment_means().tolist()
+        rates = self.completion_rates().tolist()
+        emails = [s.email for s in self.students]
+        ids = [s.id for s in self.students]
+        for j, assignment in enumerate(self.assignments):
+            labels = [STATUS_LABELS[code] for code in self.status[:, j].tolist()]
+            scores = [None if s != s else int(s) for s in self.scores[:, j].tolist()]
+            yield Column(
+                assignment,
+                None if means[j] != means[j] else round(means[j], 1),
+                rates[j],
+                [Cell(*cell) for cell in zip(ids, emails, labels, scores)],
+            )
+
+    def totals(self):
+        earned = self.student_totals()
+        possible = self.points_possible
+        percentages = earned / possible * 100 if possible > 0 else np.zeros_like(earned)
+        return [
+            StudentTotal(s.id, s.email, int(e), round(p, 1))
+            for s, e, p in zip(self.students, earned.tolist(), percentages.tolist())
+        ]
+
+    # ---- JSON (app/api): one row of scores/statuses per student ----
+    def to_dict(self):
+        means = self.assignment_means().tolist()
+        rates = self.completion_rates().tolist()
+        earned = self.student_totals().tolist()
+        possible = self.points_possible
+        scores = self.scores.tolist()
+        status = self.status.tolist()
+        return {
+            "points_possible": int(possible),
+            "assignments": [
+                {
+                    "id": a.id,
+                    "title": a.title,
+                    "max_points": a.max_points,
+                    "mean": None if mean != mean else round(mean, 1),
+                    "completion_rate": rate,
+                }
+                for a, mean, rate in zip(self.assignments, means, rates)
+            ],
+            "students": [
+                {
+                    "id": s.id,
+                    "email": s.email,
+                    "points_earned": int(e),
+                    "percentage": round(e / possible * 100, 1) if possible > 0 else 0.0,
+                    "scores": [None if x != x else int(x) for x in row_scores],
+                    "statuses": [STATUS_LABELS[code] for code in row_status],
+                }
+                for s, e, row_scores, row_status in zip(self.students, earned, scores, status)
+            ],
+        }
@@ -0,0 +1,268 @@
+"""Keeps the course_grades table current.
+
+Every flush is inspected for changes that move a student's course total:
+StudentAssignment scores, Assignment max_points (and assignments being
+added or removed) and enrollments. Changed and deleted rows are turned
+into deltas before the flush and new rows right after it (once their
+foreign keys are set), and the deltas are applied as a few UPDATE
+statements, so a dashboard only ever reads one CourseGrade row.
+
+add_course_grades() adds the rows of enrollments bulk-inserted outside the
+ORM. rebuild_course_grades() recomputes the table from scratch and is the
+repair path (see app/scripts/rebuild_grades.py).
+"""
+from collections import Counter
+
+from sqlalchemy import event
+
+from app.config import db
+from app.models import Assignment, CourseGrade, Enrollment, StudentAssignment
+
+# (letter, minimum percentage), checked in order; anything lower is an F
+GRADE_CUTOFFS = (("A", 90), ("B", 80), ("C", 70), ("D", 60))
+
+_PENDING_KEY = "course_grade_deltas"
+
+grades = CourseGrade.__table__
+
+
+def letter_grade(percentage):
+    for letter, cutoff in GRADE_CUTOFFS:
+        if percentage >= cutoff:
+            return letter
+    return "F"
+
+
+def _percentage_expr():
+    return db.case(
+        (grades.c.points_possible > 0,
+         grades.c.points_earned * 100.0 / grades.c.points_possible),
+        else_=0.0,
+    )
+
+
+def _letter_expr(percentage):
+    return db.case(
+        *[(percentage >= cutoff, letter) for letter, cutoff in GRADE_CUTOFFS],
+        else_="F",
+    )
+
+
+def _refresh(conn, *criteria):
+    """Recomputes percentage and letter for the matching rows."""
+    percentage = _percentage_expr()
+    conn.execute(
+        db.update(grades)
+        .where(*criteria)
+        .values(percentage=percentage, letter=_letter_expr(percentage))
+    )
+
+
+def _totals_select(*criteria):
+    """Enrollment rows with their points computed from scratch."""
+    earned = (
+        db.select(db.func.coalesce(db.func.sum(StudentAssignment.score), 0))
+        .join(Assignment, Assignment.id == StudentAssignment.assignment_id)
+        .where(
+            Assignment.course_id == Enrollment.course_id,
+            StudentAssignment.user_id == Enrollment.user_id,
+        )
+        .scalar_subquery()
+    )
+    possible = (
+        db.select(db.func.coalesce(db.func.sum(Assignment.max_points), 0))
+        .where(Assignment.course_id == Enrollment.course_id)
+        .scalar_subquery()
+    )
+    return db.select(
+        Enrollment.user_id, Enrollment.course_id, earned, possible
+    ).where(*criteria)
+
+
+def _insert_from_enrollments(conn, *criteria):
+    conn.execute(
+        db.insert(grades).from_select(
+            ["user_id", "course_id", "points_earned", "points_possible"],
+            _totals_select(*criteria),
+        )
+    )
+
+
+def rebuild_course_grades(course_ids=None):
+    """Recomputes course_grades from enrollments and scores; caller commits.
+
+    Limited to course_ids when given, otherwise the whole table is rebuilt.
+    """
+    conn = db.session.connection()
+    if course_ids is None:
+        conn.execute(db.delete(grades))
+        _insert_from_enrollments(conn)
+        _refresh(conn)
+    else:
+        course_ids = list(course_ids)
+        conn.execute(db.delete(grades).where(grades.c.course_id.in_(course_ids)))
+        _insert_from_enrollments(conn, Enrollment.course_id.in_(course_ids))
+        _refresh(conn, grades.c.course_id.in_(course_ids))
+
+
+def add_course_grades(enrollments):
+    """Grade rows for (user_id, course_id) enrollments inserted outside the
+    ORM; pairs that already have a row are left alone. Caller commits.
+
+    One INSERT ... SELECT and one refresh per course, so only the new
+    students' rows are touched however large the course is.
+    """
+    by_course = {}
+    for user_id, course_id in enrollments:
+        by_course.setdefault(course_id, set()).add(user_id)
+    conn = db.session.connection()
+    for course_id, user_ids in by_course.items():
+        has_row = (
+            db.select(grades.c.id)
+            .where(grades.c.user_id == Enrollment.user_id, grades.c.course_id == Enrollment.course_id)
+            .exists()
+        )
+        _insert_from_enrollments(
+            conn, Enrollment.course_id == course_id, Enrollment.user_id.in_(user_ids), ~has_row
+        )
+        _refresh(conn, grades.c.course_id == course_id, grades.c.user_id.in_(user_ids))
+
+
+def get_course_grade(user_id, course_id):
+    """The student's grade row, or None before the course_grades backfill.
+
+    Rows are written with the enrollment (see _apply_grade_deltas) or by
+    rebuild_course_grades, so a page read never writes.
+    """
+    return CourseGrade.query.filter_by(user_id=user_id, course_id=course_id).first()
+
+
+# ---------- incremental maintenance ----------
+
+class GradeDeltas:
+    def __init__(self):
+        self.earned = Counter()     # (user_id, course_id) -> points
+        self.possible = Counter()   # course_id -> points
+        self.enrolled = set()       # (user_id, course_id)
+        self.dropped = set()
+
+    def __bool__(self):
+        return bool(self.earned or self.possible or self.enrolled or self.dropped)
+
+
+def _stored_value(session, obj, column):
+    """The value of column as it is in the database, before this flush."""
+    history = db.inspect(obj).attrs[column.key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    # set (or expired) without being loaded first
+    with session.no_autoflush:
+        return session.execute(
+            db.select(column).where(column.table.c.id == obj.id)
+        ).scalar()
+
+
+def _course_id_for(session, assignment_id):
+    if assignment_id is None:
+        return None
+    with session.no_autoflush:
+        assignment = session.get(Assignment, assignment_id)
+    return assignment.course_id if assignment is not None else None
+
+
+def _default_max_points():
+    return Assignment.__table__.c.max_points.default.arg
+
+
+def _collect_new_rows(session, deltas):
+    # after the INSERTs: an object built through its relationships, e.g.
+    # Assignment(course=course), only has its foreign keys from the flush on
+    for obj in session.new:
+        if isinstance(obj, StudentAssignment) and obj.score is not None:
+            course_id = _course_id_for(session, obj.assignment_id)
+            deltas.earned[(obj.user_id, course_id)] += obj.score
+        elif isinstance(obj, Assignment):
+            points = obj.max_points if obj.max_points is not None else _default_max_points()
+            deltas.possible[obj.course_id] += points or 0
+        elif isinstance(obj, Enrollment):
+            deltas.enrolled.add((obj.user_id, obj.course_id))
+
+
+@event.listens_for(db.session, "before_flush")
+def _collect_grade_deltas(session, flush_context, instances):
+    # changed and deleted rows are read before the flush overwrites them;
+    # new rows are collected by _apply_grade_deltas
+    deltas = session.info.setdefault(_PENDING_KEY, GradeDeltas())
+
+    for obj in session.dirty:
+        if isinstance(obj, StudentAssignment):
+            if db.inspect(obj).attrs.score.history.has_changes():
+                old = _stored_value(session, obj, StudentAssignment.score) or 0
+                course_id = _course_id_for(session, obj.assignment_id)
+                deltas.earned[(obj.user_id, course_id)] += (obj.score or 0) - old
+        elif isinstance(obj, Assignment):
+            if db.inspect(obj).attrs.max_points.history.has_changes():
+                old = _stored_value(session, obj, Assignment.max_points) or 0
+                deltas.possible[obj.course_id] += (obj.max_points or 0) - old
+
+    for obj in session.deleted:
+        if isinstance(obj, StudentAssignment):
+            score = _stored_value(session, obj, StudentAssignment.score)
+            if score:
+                course_id = _course_id_for(session, obj.assignment_id)
+                deltas.earned[(obj.user_id, course_id)] -= score
+        elif isinstance(obj, Assignment):
+            deltas.possible[obj.course_id] -= (
+                _stored_value(session, obj, Assignment.max_points) or 0
+            )
+        elif isinstance(obj, Enrollment):
+            deltas.dropped.add((obj.user_id, obj.course_id))
+
+
+@event.listens_for(db.session, "after_flush")
+def _apply_grade_deltas(session, flush_context):
+    deltas = session.info.pop(_PENDING_KEY, None) or GradeDeltas()
+    # session.new still lists the rows this flush inserted
+    _collect_new_rows(session, deltas)
+    if not deltas:
+        return
+    conn = session.connection()
+
+    for course_id, points in deltas.possible.items():
+        if points:
+            conn.execute(
+                db.update(grades)
+                .where(grades.c.course_id == course_id)
+                .values(points_possible=grades.c.points_possible + points)
+            )
+            _refresh(conn, grades.c.course_id == course_id)
+
+    for (user_id, course_id), points in deltas.earned.items():
+        if points and course_id is not None:
+            pair = (grades.c.user_id == user_id, grades.c.course_id == course_id)
+            conn.execute(
+                db.update(grades)
+                .where(*pair)
+                .values(points_earned=grades.c.points_earned + points)
+            )
+            _refresh(conn, *pair)
+
+    for user_id, course_id in deltas.dropped | deltas.enrolled:
+        conn.execute(
+            db.delete(grades)
+            .where(grades.c.user_id == user_id, grades.c.course_id == course_id)
+        )
+
+    # new enrollments start from whatever is already recorded for them
+    for user_id, course_id in deltas.enrolled - deltas.dropped:
+        _insert_from_enrollments(
+            conn, Enrollment.user_id == user_id, Enrollment.course_id == course_id
+        )
+        _refresh(conn, grades.c.user_id == user_id, grades.c.course_id == course_id)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _discard_grade_deltas(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
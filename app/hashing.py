@@ -0,0 +1,101 @@
+"""Password hashing policy and the worker pool that runs it.
+
+PASSWORD_HASH_METHOD is a Werkzeug method string with its cost
+parameters, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000". A stored
+hash made under any other method or cost is still accepted, and replaced
+with one made under the current policy on the user's next successful
+login, so raising (or, during an exam rush, lowering) the cost needs no
+migration.
+
+Hashing runs on a pool of PASSWORD_HASH_WORKERS threads (hashlib's scrypt
+and pbkdf2 release the GIL, so they hash in parallel without starving the
+threads serving other pages). At most PASSWORD_HASH_QUEUE hashes wait for
+a worker; beyond that a login waits up to PASSWORD_HASH_WAIT seconds for
+a place in the queue and then gets HashingBusy, which auth.login answers
+with a 503 and Retry-After instead of piling more work on a saturated CPU.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+_POOL_KEY = "password_hasher"
+
+
+class HashingBusy(Exception):
+    """No room in the hashing queue within PASSWORD_HASH_WAIT seconds."""
+
+
+class HashingPool:
+    def __init__(self, workers, queue_size, wait):
+        self.wait = wait
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="password-hash")
+        # running + waiting hashes
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def run(self, fn, *args):
+        """fn(*args) on a worker; raises HashingBusy when the queue stays full."""
+        if not self._slots.acquire(timeout=self.wait):
+            self.rejected += 1
+            raise HashingBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def init_app(app):
+    app.extensions[_POOL_KEY] = HashingPool(
+        app.config["PASSWORD_HASH_WORKERS"],
+        app.config["PASSWORD_HASH_QUEUE"],
+        app.config["PASSWORD_HASH_WAIT"],
+    )
+
+
+@lru_cache(maxsize=8)
+def _stored_method(method):
+    # Werkzeug fills in default costs ("scrypt" -> "scrypt:32768:8:1"); a
+    # throwaway hash shows the exact prefix a policy hash is stored with
+    return generate_password_hash("", method, salt_length=1).split("$", 1)[0]
+
+
+def needs_rehash(password_hash, method):
+    """Whether password_hash was made under another method or cost."""
+    return password_hash.split("$", 1)[0] != _stored_method(method)
+
+
+def _verify(password_hash, password, method):
+    if not check_password_hash(password_hash, password):
+        return False, None
+    if needs_rehash(password_hash, method):
+        return True, generate_password_hash(password, method)
+    return True, None
+
+
+def _run(fn, *args):
+    # scripts outside an app context hash inline
+    if not has_app_context():
+        return fn(*args)
+    return current_app.extensions[_POOL_KEY].run(fn, *args)
+
+
+def _method():
+    return current_app.config["PASSWORD_HASH_METHOD"] if has_app_context() else "scrypt"
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, _method())
+
+
+def verify_password(password_hash, password):
+    """(matches, replacement hash under the current policy or None)."""
+    return _run(_verify, password_hash, password, _method())
@@ -0,0 +1,109 @@
+"""Cached login identities for Flask-Login.
+
+load_user() answers from a per-app LRU of (id, email, role, avatar_url)
+instead of loading the User row on every request. CachedUser carries what
+the decorators and templates read about the logged-in user; anything else
+(relationships, the enroll/drop helpers) loads the ORM User on first use,
+so only views that work with the user row pay for it.
+
+An entry is dropped once a change to the user's role, email, avatar or
+password (or the user's deletion) has been committed, but only in the
+process that committed it: every worker keeps its own cache. The other
+workers keep a revoked role or a deleted account until the entry expires,
+so USER_CACHE_TTL (5 seconds by default) bounds how long a change goes
+unseen there; a user clicking through pages still hits the cache on most
+requests. Misses are read from the primary, so a lagging replica can't
+refill a dropped entry.
+"""
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event
+
+from app.cache import LRUCache
+from app.config import db
+from app.models import RoleMixin, User
+from app.routing import on_primary
+
+_CACHE_KEY = "user_cache"
+_PENDING_KEY = "stale_user_ids"
+
+# columns copied into the cache; a change to any of them invalidates it
+_IDENTITY_COLUMNS = (User.id, User.email, User.role, User.avatar_url)
+_WATCHED = ("email", "role", "avatar_url", "password_hash")
+
+
+class CachedUser(RoleMixin, UserMixin):
+    def __init__(self, id, email, role, avatar_url):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.avatar_url = avatar_url
+        self._model = None
+
+    @property
+    def model(self):
+        """The ORM User for this identity, loaded on first use."""
+        if self._model is None:
+            self._model = db.session.get(User, self.id)
+        return self._model
+
+    def __getattr__(self, name):
+        # only reached for attributes CachedUser doesn't carry itself
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def __repr__(self):
+        return f"<CachedUser {self.email}>"
+
+
+def init_app(app):
+    app.extensions[_CACHE_KEY] = LRUCache(
+        app.config["USER_CACHE_SIZE"], app.config["USER_CACHE_TTL"]
+    )
+
+
+def user_cache():
+    return current_app.extensions[_CACHE_KEY]
+
+
+def load_user(user_id):
+    cache = user_cache()
+    row = cache.get(user_id)
+    if row is None:
+        row = db.session.execute(
+            db.select(*_IDENTITY_COLUMNS).where(User.id == user_id), bind_arguments=on_primary()
+        ).first()
+        if row is None:
+            return None
+        row = tuple(row)
+        cache.set(user_id, row)
+    return CachedUser(*row)
+
+
+# ---------- invalidation ----------
+
+@event.listens_for(db.session, "after_flush")
+def _collect_stale_users(session, flush_context):
+    stale = {
+        obj.id for obj in session.dirty
+        if isinstance(obj, User)
+        and any(db.inspect(obj).attrs[name].history.has_changes() for name in _WATCHED)
+    }
+    stale.update(obj.id for obj in session.deleted if isinstance(obj, User))
+    if stale:
+        session.info.setdefault(_PENDING_KEY, set()).update(stale)
+
+
+@event.listens_for(db.session, "after_commit")
+def _invalidate_stale_users(session):
+    stale = session.info.pop(_PENDING_KEY, None)
+    if stale and has_app_context() and _CACHE_KEY in current_app.extensions:
+        cache = user_cache()
+        for user_id in stale:
+            cache.delete(user_id)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _discard_stale_users(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
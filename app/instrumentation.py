@@ -0,0 +1,174 @@
+"""Per-request SQL statement counts, timings and N+1 detection.
+
+Engine events time every statement a request sends. Statements are grouped
+by shape: the SQL text with literals and IN-lists folded, so the same
+query for different ids is one shape. A shape run more than
+SQL_REPEAT_THRESHOLD times in one request is flagged as repeated, which is
+what an N+1 (a lazy load or helper query inside a loop) looks like.
+
+Each request then gets:
+  - for admins, or any user while app.debug is on, X-SQL-Statements,
+    X-SQL-Time-Ms and X-SQL-Repeated headers, plus a Server-Timing "sql"
+    entry for the browser's network panel (everyone else would learn
+    how the pages query the database);
+  - one JSON log line on the app.instrumentation logger, at WARNING when
+    a shape repeated and at DEBUG otherwise;
+  - with SQL_DEBUG_PANEL (or app.debug), a panel at the bottom of
+    base.html listing the shapes seen while the page rendered.
+
+Statements outside a request (scripts, the notification pool) aren't
+counted.
+"""
+import json
+import logging
+import re
+import time
+from collections import namedtuple
+
+from flask import g, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event
+
+from app import routing
+from app.config import db
+
+_STATS_KEY = "_sql_stats"
+_START_KEY = "_sql_start"
+
+log = logging.getLogger(__name__)
+
+Shape = namedtuple("Shape", "sql count seconds")
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)|\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(sql):
+    """The statement with literals and IN-lists folded and whitespace collapsed."""
+    sql = _LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("(?, ...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+class RequestSQL:
+    """Statements seen during one request, grouped by shape."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.count = 0
+        self.seconds = 0.0
+        # raw statement text -> [count, seconds]; shapes are folded on read
+        self._statements = {}
+
+    def record(self, sql, seconds):
+        self.count += 1
+        self.seconds += seconds
+        entry = self._statements.get(sql)
+        if entry is None:
+            self._statements[sql] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def shapes(self):
+        """Every shape, most frequent first."""
+        folded = {}
+        for sql, (count, seconds) in self._statements.items():
+            entry = folded.setdefault(statement_shape(sql), [0, 0.0])
+            entry[0] += count
+            entry[1] += seconds
+        found = [Shape(sql, count, seconds) for sql, (count, seconds) in folded.items()]
+        found.sort(key=lambda shape: (-shape.count, -shape.seconds))
+        return found
+
+    def repeated(self):
+        """Shapes run more than threshold times."""
+        return [shape for shape in self.shapes() if shape.count > self.threshold]
+
+
+def request_sql():
+    """This request's RequestSQL, or None outside an instrumented request."""
+    if not has_request_context():
+        return None
+    return g.get(_STATS_KEY)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info[_START_KEY] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop(_START_KEY, None)
+    stats = request_sql()
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _listen(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _log_record(stats, repeated, response):
+    return {
+        "event": "request_sql",
+        "method": request.method,
+        "path": request.path,
+        "endpoint": request.endpoint,
+        "status": response.status_code,
+        "statements": stats.count,
+        "sql_ms": round(stats.seconds * 1000, 2),
+        "repeated": [{"sql": shape.sql, "count": shape.count,
+                      "ms": round(shape.seconds * 1000, 2)} for shape in repeated],
+    }
+
+
+def _headers_allowed(app):
+    return app.debug or (current_user.is_authenticated and current_user.is_admin)
+
+
+def init_app(app):
+    """Hooks the app's engines and adds the per-request headers and log line.
+
+    Call after routing.init_app(), so a replica engine is counted too.
+    """
+    if not app.config["SQL_INSTRUMENTATION"]:
+        return
+    with app.app_context():
+        engines = list(db.engines.values())
+    if routing.replica_engine(app) is not None:
+        engines.append(routing.replica_engine(app))
+    for engine in engines:
+        _listen(engine)
+
+    threshold = app.config["SQL_REPEAT_THRESHOLD"]
+
+    @app.before_request
+    def _start_counting():
+        g.setdefault(_STATS_KEY, RequestSQL(threshold))
+
+    @app.after_request
+    def _report(response):
+        stats = request_sql()
+        if stats is None:
+            return response
+        # checked first: it may load the user, which belongs in the count
+        allowed = _headers_allowed(app)
+        repeated = stats.repeated()
+        if allowed:
+            sql_ms = stats.seconds * 1000
+            response.headers["X-SQL-Statements"] = str(stats.count)
+            response.headers["X-SQL-Time-Ms"] = f"{sql_ms:.2f}"
+            response.headers["X-SQL-Repeated"] = str(len(repeated))
+            response.headers.add("Server-Timing", f'sql;dur={sql_ms:.2f};desc="{stats.count} statements"')
+        level = logging.WARNING if repeated else logging.DEBUG
+        if log.isEnabledFor(level):
+            log.log(level, json.dumps(_log_record(stats, repeated, response)))
+        return response
+
+    @app.context_processor
+    def _inject_panel():
+        # app.debug is read per request: run.py may turn it on after create_app
+        shown = app.config["SQL_DEBUG_PANEL"] or app.debug
+        return dict(sql_panel=request_sql() if shown else None)
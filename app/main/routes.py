@@ -94,14 +94,15 @@ def gpa_calculator():
 
     if request.method == "GET":
         # pull courses from DB for this user
-        db_courses = current_user.get_enrolled_courses() 
+        db_courses = current_user.get_enrolled_courses_with_grades()
         courses = [
             {
                 "name": f"{c.code} - {c.title}",
                 "units": c.credits,
-                "grade": "",  # TODO dynamically update with current grade
+                # current letter from the course_grades table
+                "grade": grade.letter if grade else "",
             }
-            for c in db_courses
+            for c, grade in db_courses
         ]
 
     else:  # POST
@@ -0,0 +1,233 @@
+"""Request metrics in the Prometheus text format, served at /admin/metrics.
+
+Per blueprint endpoint (courses.course_dashboard, api.gradebook, ...):
+  - lms_request_duration_seconds  latency histogram
+  - lms_requests_in_flight        requests being handled right now
+  - lms_request_errors_total      5xx responses and unhandled exceptions
+plus, read at scrape time, connection pool gauges per engine and hit/miss
+counters and the hit ratio of every LRUCache on app.extensions.
+
+The hot path takes no lock: each thread counts into its own shard
+(endpoint -> EndpointStats, created the first time that thread sees the
+endpoint) and a scrape sums the shards. When a thread ends its shard is
+folded into a shared total and dropped, so a server that starts a thread
+per request keeps a bounded number of shards. Recording a request is a
+perf_counter() call, a bisect into the bucket bounds and a few integer
+increments; see benchmarks/bench_metrics.py for the overhead.
+"""
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from flask import current_app, g, request
+
+from app import routing
+from app.cache import LRUCache
+from app.config import db
+
+_METRICS_KEY = "request_metrics"
+_START_KEY = "_metrics_start"
+_STATUS_KEY = "_metrics_status"
+
+UNMATCHED = "unmatched"   # endpoint label for URLs no route matched
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class EndpointStats:
+    __slots__ = ("buckets", "seconds", "in_flight", "errors")
+
+    def __init__(self, size):
+        self.buckets = [0] * size   # per bucket, not cumulative; last is +Inf
+        self.seconds = 0.0
+        self.in_flight = 0
+        self.errors = 0
+
+
+class _ShardOwner:
+    """Kept in the thread-local next to a shard; collected when the thread ends."""
+    __slots__ = ("__weakref__",)
+
+
+def _add(totals, endpoint, stats, size):
+    total = totals.get(endpoint)
+    if total is None:
+        total = totals[endpoint] = EndpointStats(size)
+    for i, count in enumerate(stats.buckets):
+        total.buckets[i] += count
+    total.seconds += stats.seconds
+    total.in_flight += stats.in_flight
+    total.errors += stats.errors
+
+
+class RequestMetrics:
+    """Per-endpoint latency histograms, in-flight gauges and error counters."""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(sorted(bounds))
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}              # counts of threads that have ended
+        self._lock = threading.Lock()   # taken when a thread makes or drops its shard
+
+    def _stats(self, endpoint):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            owner = self._local.owner = _ShardOwner()
+            with self._lock:
+                self._shards.append(shard)
+            weakref.finalize(owner, self._retire, shard).atexit = False
+        stats = shard.get(endpoint)
+        if stats is None:
+            stats = shard[endpoint] = EndpointStats(len(self.bounds) + 1)
+        return stats
+
+    def _retire(self, shard):
+        # the thread is gone: fold its counts into _retired and drop the shard,
+        # so short-lived threads don't each leave one behind
+        with self._lock:
+            self._shards.remove(shard)
+            for endpoint, stats in shard.items():
+                _add(self._retired, endpoint, stats, len(self.bounds) + 1)
+
+    def started(self, endpoint):
+        self._stats(endpoint).in_flight += 1
+
+    def finished(self, endpoint, seconds, error=False):
+        stats = self._stats(endpoint)
+        stats.in_flight -= 1
+        stats.buckets[bisect_left(self.bounds, seconds)] += 1
+        stats.seconds += seconds
+        if error:
+            stats.errors += 1
+
+    def snapshot(self):
+        """{endpoint: EndpointStats} summed over every thread's shard."""
+        size = len(self.bounds) + 1
+        totals = {}
+        with self._lock:
+            shards = list(self._shards)
+            for endpoint, stats in self._retired.items():
+                _add(totals, endpoint, stats, size)
+        for shard in shards:
+            for endpoint, stats in list(shard.items()):
+                _add(totals, endpoint, stats, size)
+        return totals
+
+
+def request_metrics():
+    return current_app.extensions[_METRICS_KEY]
+
+
+def init_app(app):
+    if not app.config["METRICS_ENABLED"]:
+        return
+    metrics = app.extensions[_METRICS_KEY] = RequestMetrics(app.config["METRICS_BUCKETS"])
+
+    @app.before_request
+    def _start_timer():
+        setattr(g, _START_KEY, time.perf_counter())
+        metrics.started(request.endpoint or UNMATCHED)
+
+    @app.after_request
+    def _keep_status(response):
+        setattr(g, _STATUS_KEY, response.status_code)
+        return response
+
+    # teardown also runs when an exception escapes the view
+    @app.teardown_request
+    def _stop_timer(exc):
+        started = g.get(_START_KEY)
+        if started is None:
+            return
+        status = g.get(_STATUS_KEY, 500)
+        metrics.finished(request.endpoint or UNMATCHED, time.perf_counter() - started,
+                         exc is not None or status >= 500)
+
+
+# ---------- exposition ----------
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _header(lines, name, kind, help):
+    lines.append(f"# HELP {name} {help}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _request_lines(lines, metrics):
+    totals = sorted(metrics.snapshot().items())
+    bounds = [repr(float(bound)) for bound in metrics.bounds] + ["+Inf"]
+
+    name = "lms_request_duration_seconds"
+    _header(lines, name, "histogram", "Request latency by endpoint.")
+    for endpoint, stats in totals:
+        label = _label(endpoint)
+        cumulative = 0
+        for bound, count in zip(bounds, stats.buckets):
+            cumulative += count
+            lines.append(f'{name}_bucket{{endpoint="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{endpoint="{label}"}} {stats.seconds!r}')
+        lines.append(f'{name}_count{{endpoint="{label}"}} {cumulative}')
+
+    _header(lines, "lms_requests_in_flight", "gauge", "Requests being handled, by endpoint.")
+    for endpoint, stats in totals:
+        lines.append(f'lms_requests_in_flight{{endpoint="{_label(endpoint)}"}} {stats.in_flight}')
+
+    _header(lines, "lms_request_errors_total", "counter",
+            "5xx responses and unhandled exceptions, by endpoint.")
+    for endpoint, stats in totals:
+        lines.append(f'lms_request_errors_total{{endpoint="{_label(endpoint)}"}} {stats.errors}')
+
+
+def _engines(app):
+    with app.app_context():
+        found = [("primary" if key is None else key, engine) for key, engine in db.engines.items()]
+    if routing.replica_engine(app) is not None:
+        found.append(("replica", routing.replica_engine(app)))
+    return found
+
+
+def _pool_lines(lines, app):
+    # only QueuePool (file and server databases) can report its usage
+    pools = [(name, engine.pool) for name, engine in _engines(app)
+             if hasattr(engine.pool, "checkedout")]
+    for name, help, read in (
+        ("lms_db_pool_size", "Connections the pool keeps open.", lambda pool: pool.size()),
+        ("lms_db_pool_checked_out", "Connections in use.", lambda pool: pool.checkedout()),
+        ("lms_db_pool_overflow", "Connections open beyond the pool size.",
+         lambda pool: max(pool.overflow(), 0)),
+    ):
+        _header(lines, name, "gauge", help)
+        for engine, pool in pools:
+            lines.append(f'{name}{{engine="{_label(engine)}"}} {read(pool)}')
+
+
+def _cache_lines(lines, app):
+    caches = sorted((key, cache) for key, cache in app.extensions.items()
+                    if isinstance(cache, LRUCache))
+    for name, kind, help, read in (
+        ("lms_cache_hits_total", "counter", "Cache lookups that found an entry.",
+         lambda cache: cache.hits),
+        ("lms_cache_misses_total", "counter", "Cache lookups that missed.",
+         lambda cache: cache.misses),
+        ("lms_cache_hit_ratio", "gauge", "Hits over lookups since startup.",
+         lambda cache: cache.hits / (cache.hits + cache.misses) if cache.hits + cache.misses else 0.0),
+        ("lms_cache_entries", "gauge", "Entries held.", len),
+    ):
+        _header(lines, name, kind, help)
+        for key, cache in caches:
+            lines.append(f'{name}{{cache="{_label(key)}"}} {read(cache)}')
+
+
+def render(app):
+    """Every metric of app in the Prometheus text exposition format."""
+    lines = []
+    if _METRICS_KEY in app.extensions:
+        _request_lines(lines, app.extensions[_METRICS_KEY])
+    _pool_lines(lines, app)
+    _cache_lines(lines, app)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,147 @@
+"""Versioned schema migrations.
+
+db.create_all() only creates missing tables; it never adds a column or an
+index to a table that already exists. Each migration below moves an
+existing database forward one step, and is written so that it is a no-op
+on a database create_all() has just built from the current models. The
+version a database has reached is kept in the one-row schema_version table.
+
+    python -m app.scripts.migrate            # apply pending migrations
+    python -m app.scripts.migrate --status   # show applied / pending
+"""
+from collections import namedtuple
+
+from app.config import db
+from app.models import CourseGrade
+
+Migration = namedtuple("Migration", "version description apply")
+
+MIGRATIONS = []
+
+schema_version = db.Table(
+    "schema_version",
+    db.metadata,
+    db.Column("version", db.Integer, nullable=False),
+)
+
+
+def migration(version, description):
+    """Registers fn(conn) as the step up to version."""
+    def register(fn):
+        MIGRATIONS.append(Migration(version, description, fn))
+        return fn
+    return register
+
+
+def _has_column(conn, table, column):
+    return column in {c["name"] for c in db.inspect(conn).get_columns(table)}
+
+
+def _add_column_sql(dialect, table, name, type_):
+    """ALTER TABLE ... ADD COLUMN with type_ spelled for dialect."""
+    return f"ALTER TABLE {table} ADD COLUMN {name} {type_.compile(dialect=dialect)}"
+
+
+def _create_indexes(conn, *names):
+    indexes = {index.name: index for table in db.metadata.tables.values()
+               for index in table.indexes}
+    for name in names:
+        indexes[name].create(conn, checkfirst=True)
+
+
+# ---------- migrations, oldest first ----------
+
+@migration(1, "courses.seats_taken enrollment counter")
+def _add_seats_taken(conn):
+    if not _has_column(conn, "courses", "seats_taken"):
+        conn.execute(db.text(
+            "ALTER TABLE courses ADD COLUMN seats_taken INTEGER NOT NULL DEFAULT 0"
+        ))
+    # plain SQL: the Course model's later columns don't exist yet here
+    conn.execute(db.text(
+        "UPDATE courses SET seats_taken = "
+        "(SELECT count(*) FROM enrollments WHERE enrollments.course_id = courses.id)"
+    ))
+
+
+@migration(2, "course_grades table")
+def _add_course_grades(conn):
+    # imported here: app.grades registers session hooks on import
+    from app.grades import rebuild_course_grades
+
+    CourseGrade.__table__.create(conn, checkfirst=True)
+    rebuild_course_grades()
+
+
+@migration(3, "indexes for the hot lookups")
+def _add_lookup_indexes(conn):
+    _create_indexes(
+        conn,
+        "ix_notifications_user_unread",
+        "ix_announcements_course_created",
+        "ix_assignments_course_due",
+        "ix_enrollments_course_user",
+        "ix_student_assignments_assignment_user",
+    )
+
+
+@migration(4, "courses.version stamp for the fragment cache")
+def _add_course_version(conn):
+    if not _has_column(conn, "courses", "version"):
+        conn.execute(db.text(
+            "ALTER TABLE courses ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+        ))
+
+
+@migration(5, "updated_at on courses, assignments and announcements")
+def _add_updated_at(conn):
+    for table in ("courses", "assignments", "announcements"):
+        if not _has_column(conn, table, "updated_at"):
+            conn.execute(db.text(_add_column_sql(conn.dialect, table, "updated_at", db.DateTime())))
+            conn.execute(db.text(
+                f"UPDATE {table} SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)"
+            ))
+
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# ---------- runner ----------
+
+def current_version(conn=None):
+    conn = conn if conn is not None else db.session.connection()
+    if not db.inspect(conn).has_table(schema_version.name):
+        return 0
+    return conn.execute(db.select(schema_version.c.version)).scalar() or 0
+
+
+def schema_is_current(conn=None):
+    """Whether the database has already reached LATEST_VERSION."""
+    return current_version(conn) == LATEST_VERSION
+
+
+def _stamp(conn, version):
+    conn.execute(db.delete(schema_version))
+    conn.execute(db.insert(schema_version).values(version=version))
+
+
+def pending_migrations(conn=None):
+    version = current_version(conn)
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def upgrade():
+    """Applies every pending migration, each in its own transaction.
+
+    Returns the migrations that ran. Call inside an app context.
+    """
+    applied = []
+    for step in pending_migrations():
+        conn = db.session.connection()
+        schema_version.create(conn, checkfirst=True)
+        step.apply(conn)
+        _stamp(conn, step.version)
+        db.session.commit()
+        applied.append(step)
+    db.session.commit()
+    return applied
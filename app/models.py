@@ -1,22 +1,38 @@
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.exc import IntegrityError
 from app.config import db
+from app import hashing
 from datetime import datetime
 
 
-# User Model
-class User(UserMixin, db.Model):
-    __tablename__ = 'users'
-
+# role names and helpers, shared by User and the cached login identity
+class RoleMixin:
     ROLE_STUDENT = "student"
     ROLE_PROFESSOR = "professor"
     ROLE_ADMIN = "admin"
 
+    @property
+    def is_student(self):
+        return self.role == self.ROLE_STUDENT
+
+    @property
+    def is_professor(self):
+        return self.role == self.ROLE_PROFESSOR
+
+    @property
+    def is_admin(self):
+        return self.role == self.ROLE_ADMIN
+
+
+# User Model
+class User(RoleMixin, UserMixin, db.Model):
+    __tablename__ = 'users'
+
     id = db.Column(db.Integer, primary_key=True)
     password_hash = db.Column(db.String(255), nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=False)
     avatar_url = db.Column(db.String(400), nullable=True)
-    role = db.Column(db.String(32), default=ROLE_STUDENT, nullable=False)
+    role = db.Column(db.String(32), default=RoleMixin.ROLE_STUDENT, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     # many-to-many student side
@@ -28,23 +44,15 @@ class User(UserMixin, db.Model):
     )
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hashing.hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-
-    # ---- role helpers ----
-    @property
-    def is_student(self):
-        return self.role == self.ROLE_STUDENT
-
-    @property
-    def is_professor(self):
-        return self.role == self.ROLE_PROFESSOR
-
-    @property
-    def is_admin(self):
-        return self.role == self.ROLE_ADMIN
+        # a match under an outdated hash policy swaps in a current hash;
+        # the caller commits it with the login
+        matches, upgraded = hashing.verify_password(self.password_hash, password)
+        if upgraded is not None:
+            self.password_hash = upgraded
+        return matches
 
     # ---- course enrollment helpers (student) ----
     def enroll_in_course(self, course):
@@ -52,6 +60,7 @@ class User(UserMixin, db.Model):
         if not self.is_enrolled_in(course):
             enrollment = Enrollment(user_id=self.id, course_id=course.id)
             db.session.add(enrollment)
+            course.adjust_seats(1)
             return True
         return False
 
@@ -63,6 +72,7 @@ class User(UserMixin, db.Model):
         ).first()
         if enrollment:
             db.session.delete(enrollment)
+            course.adjust_seats(-1)
             return True
         return False
 
@@ -79,6 +89,23 @@ class User(UserMixin, db.Model):
             Enrollment.user_id == self.id
         ).all()
 
+    # enrolled courses paired with the materialized grade row (or None)
+    def get_enrolled_courses_with_grades(self):
+        from app.models import Course, Enrollment, CourseGrade
+        return (
+            db.session.query(Course, CourseGrade)
+            .join(Enrollment, Enrollment.course_id == Course.id)
+            .outerjoin(
+                CourseGrade,
+                db.and_(
+                    CourseGrade.course_id == Course.id,
+                    CourseGrade.user_id == Enrollment.user_id,
+                ),
+            )
+            .filter(Enrollment.user_id == self.id)
+            .all()
+        )
+
     def get_enrolled_courses_count(self):
         from app.models import Enrollment
         return Enrollment.query.filter_by(user_id=self.id).count()
@@ -91,6 +118,11 @@ class User(UserMixin, db.Model):
 class Course(db.Model):
     __tablename__ = 'courses'
 
+    # seat reservation results
+    RESERVE_OK = "ok"
+    RESERVE_UNAVAILABLE = "unavailable"
+    RESERVE_DUPLICATE = "duplicate"
+
     id = db.Column(db.Integer, primary_key=True)
     code = db.Column(db.String(32), unique=True, nullable=False)
     title = db.Column(db.String(128), nullable=False)
@@ -111,7 +143,13 @@ class Course(db.Model):
     availability = db.Column(db.Boolean, default=True)
     format = db.Column(db.String(32), default='online')
     max_students = db.Column(db.Integer)
+    # maintained enrollment counter, see reserve_seat / adjust_seats
+    seats_taken = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # bumped on every edit and seat change; keys the rendered-fragment cache
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # onupdate also applies to the seat counter's UPDATE statements
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     enrollments_rel = db.relationship(
         'Enrollment',
@@ -134,13 +172,37 @@ class Course(db.Model):
         cascade='all,delete-orphan'
     )
 
+    grades_rel = db.relationship(
+        'CourseGrade',
+        back_populates='course',
+        lazy='dynamic',
+        cascade='all,delete-orphan'
+    )
+
     def get_enrolled_students(self):
         return User.query.join(Enrollment).filter(
             Enrollment.course_id == self.id
         ).all()
 
+    # enrolled students with their materialized grade row (or None)
+    def get_roster(self):
+        return (
+            db.session.query(User, CourseGrade)
+            .join(Enrollment, Enrollment.user_id == User.id)
+            .outerjoin(
+                CourseGrade,
+                db.and_(
+                    CourseGrade.user_id == User.id,
+                    CourseGrade.course_id == Enrollment.course_id,
+                ),
+            )
+            .filter(Enrollment.course_id == self.id)
+            .order_by(User.email)
+            .all()
+        )
+
     def get_student_count(self):
-        return self.enrollments_rel.count()
+        return self.seats_taken
 
     def is_available(self):
         return self.availability and (
@@ -148,6 +210,163 @@ class Course(db.Model):
             or self.get_student_count() < self.max_students
         )
 
+    def reserve_seat(self, user_id):
+        """Claims a seat and enrolls the user in one transaction (commits).
+
+        The conditional UPDATE only matches while the course is open and has
+        room, so concurrent requests can never push seats_taken past
+        max_students. A duplicate enrollment rolls back and frees the seat.
+        """
+        claimed = db.session.execute(
+            db.update(Course)
+            .where(
+                Course.id == self.id,
+                Course.availability.is_(True),
+                db.or_(
+                    Course.max_students.is_(None),
+                    Course.seats_taken < Course.max_students,
+                ),
+            )
+            .values(seats_taken=Course.seats_taken + 1, version=Course.version + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            return self.RESERVE_UNAVAILABLE
+
+        try:
+            db.session.add(Enrollment(user_id=user_id, course_id=self.id))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return self.RESERVE_DUPLICATE
+        return self.RESERVE_OK
+
+    def adjust_seats(self, delta):
+        """Moves the counter by delta in SQL; the caller commits."""
+        db.session.execute(
+            db.update(Course)
+            .where(Course.id == self.id, Course.seats_taken + delta >= 0)
+            .values(seats_taken=Course.seats_taken + delta, version=Course.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.expire(self, ['seats_taken', 'version'])
+
+    def touch(self):
+        """Bumps the version stamp in SQL; call on any edit to the course."""
+        self.version = Course.version + 1
+
+    # repairs seats_taken from the enrollments table
+    @classmethod
+    def recount_seats(cls):
+        counts = (
+            db.select(db.func.count(Enrollment.id))
+            .where(Enrollment.course_id == cls.id)
+            .scalar_subquery()
+        )
+        db.session.execute(db.update(cls).values(seats_taken=counts, version=cls.version + 1))
+
+    # what the dashboard shows, as (count, newest updated_at) per table in
+    # one query: counts catch deletes, timestamps catch inserts and edits.
+    # Progress rows are one student's when user_id is given, else everyone's.
+    def get_row_versions(self, user_id=None):
+        def version(model, *where):
+            # scalar subqueries: a SELECT of plain subqueries is a cartesian FROM
+            return (
+                db.select(db.func.count(model.id)).where(*where).scalar_subquery(),
+                db.select(db.func.max(model.updated_at)).where(*where).scalar_subquery(),
+            )
+
+        assignments = version(Assignment, Assignment.course_id == self.id)
+        announcements = version(Announcement, Announcement.course_id == self.id)
+        mine = () if user_id is None else (StudentAssignment.user_id == user_id,)
+        progress = version(
+            StudentAssignment,
+            StudentAssignment.assignment_id.in_(
+                db.select(Assignment.id).where(Assignment.course_id == self.id)
+            ),
+            *mine,
+        )
+        return tuple(db.session.execute(
+            db.select(*assignments, *announcements, *progress)
+        ).one())
+
+    # dashboard rows for one student: assignment columns with their
+    # status/score from one outer join (totals live in course_grades)
+    def get_assignment_rows(self, user_id):
+        progress = db.aliased(StudentAssignment)
+        return (
+            db.session.query(
+                Assignment.id,
+                Assignment.title,
+                Assignment.description,
+                Assignment.due_date,
+                Assignment.max_points,
+                db.func.coalesce(
+                    progress.status, StudentAssignment.STATUS_NOT_STARTED
+                ).label('status'),
+                progress.score,
+            )
+            .outerjoin(
+                progress,
+                db.and_(
+                    progress.assignment_id == Assignment.id,
+                    progress.user_id == user_id,
+                ),
+            )
+            .filter(Assignment.course_id == self.id)
+            .order_by(Assignment.due_date)
+            .all()
+        )
+
+    # courses a user can browse: every course for admins, their own for
+    # professors, enrolled ones for students
+    @classmethod
+    def visible_to(cls, user):
+        if user.is_admin:
+            return cls.query
+        if user.is_student:
+            return cls.query.join(Enrollment, Enrollment.course_id == cls.id).filter(
+                Enrollment.user_id == user.id
+            )
+        return cls.query.filter(cls.professor_id == user.id)
+
+    # (course, [assignments by due date]) for every course course_query
+    # returns, from one outer join (course_query becomes a subquery)
+    @classmethod
+    def with_assignments(cls, course_query):
+        ids = course_query.with_entities(cls.id).subquery()
+        rows = (
+            db.session.query(cls, Assignment)
+            .join(ids, ids.c.id == cls.id)
+            .outerjoin(Assignment, Assignment.course_id == cls.id)
+            .order_by(cls.id, Assignment.due_date, Assignment.id)
+            .all()
+        )
+        grouped = {}
+        for course, assignment in rows:
+            assignments = grouped.setdefault(course, [])
+            if assignment is not None:
+                assignments.append(assignment)
+        return list(grouped.items())
+
+    # catalog query of (course, enrolled_count, is_enrolled) rows; pass
+    # columns to get those instead of the Course entity (no ORM objects)
+    @classmethod
+    def get_catalog(cls, user_id=None, columns=None):
+        query = db.session.query(*(columns or (cls,)), cls.seats_taken.label('enrolled_count'))
+
+        if user_id is not None:
+            # the current user's own enrollment row, if any
+            mine = db.aliased(Enrollment)
+            query = query.outerjoin(
+                mine, db.and_(mine.course_id == cls.id, mine.user_id == user_id)
+            ).add_columns(mine.id.isnot(None).label('is_enrolled'))
+        else:
+            query = query.add_columns(db.literal(False).label('is_enrolled'))
+
+        return query.order_by(cls.id)
+
     def __repr__(self):
         return f'<Course {self.code}: {self.title}>'
 
@@ -167,6 +386,8 @@ class Enrollment(db.Model):
     # to avoid duplicates
     __table_args__ = (
         db.UniqueConstraint('user_id', "course_id", name='unique_user_course'),
+        # roster and seat counts look enrollments up by course
+        db.Index('ix_enrollments_course_user', 'course_id', 'user_id'),
     )
 
     def __repr__(self):
@@ -185,10 +406,16 @@ class Assignment(db.Model):
     description = db.Column(db.Text, nullable=False)
     due_date = db.Column(db.DateTime, default=datetime.utcnow)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     max_points = db.Column(db.Integer, default=100)
 
     # relationship back to Course
     course = db.relationship('Course', back_populates='assignments')
+
+    # a course's assignments are always listed by due date
+    __table_args__ = (
+        db.Index('ix_assignments_course_due', 'course_id', 'due_date'),
+    )
     
     # relationship to student progress
     student_assignments = db.relationship(
@@ -235,6 +462,8 @@ class StudentAssignment(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('user_id', 'assignment_id', name='unique_user_assignment'),
+        # submissions and the gradebook read by assignment
+        db.Index('ix_student_assignments_assignment_user', 'assignment_id', 'user_id'),
     )
 
     # status functions
@@ -259,6 +488,31 @@ class StudentAssignment(db.Model):
     def __repr__(self):
         return f'<StudentAssignment: User {self.user_id} -> Assignment {self.assignment_id} ({self.status})>'
 
+# Materialized per-student course totals, kept current by app/grades.py
+class CourseGrade(db.Model):
+    __tablename__ = "course_grades"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
+
+    points_earned = db.Column(db.Integer, default=0, nullable=False)
+    points_possible = db.Column(db.Integer, default=0, nullable=False)
+    percentage = db.Column(db.Float, default=0.0, nullable=False)
+    letter = db.Column(db.String(2), default='F', nullable=False)
+
+    # relationships
+    user = db.relationship('User')
+    course = db.relationship('Course', back_populates='grades_rel')
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'course_id', name='unique_user_course_grade'),
+    )
+
+    def __repr__(self):
+        return f'<CourseGrade: User {self.user_id} -> Course {self.course_id} ({self.letter})>'
+
+
 class Notification(db.Model):
     __tablename__ = "notifications"
     id = db.Column(db.Integer, primary_key=True)
@@ -267,6 +521,11 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_read = db.Column(db.Boolean, default=False)
 
+    # unread notifications for a user, newest first
+    __table_args__ = (
+        db.Index('ix_notifications_user_unread', 'user_id', 'is_read', 'created_at'),
+    )
+
 
 # Announcement model
 class Announcement(db.Model):
@@ -277,9 +536,15 @@ class Announcement(db.Model):
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationship back to Course
     course = db.relationship('Course', back_populates='announcements')
 
+    # a course's announcements, newest first
+    __table_args__ = (
+        db.Index('ix_announcements_course_created', 'course_id', 'created_at'),
+    )
+
     def __repr__(self):
         return f'<Announcement {self.title} for Course {self.course_id}>'
@@ -0,0 +1,168 @@
+"""Unread notification previews for every page, cached per user.
+
+Each user has a notification version, bumped after a commit that inserts
+one of their notifications, changes its is_read flag or deletes it.
+Previews are cached under (user_id, version), so rendering a page for a
+user with nothing new costs no queries, and a bump makes the old entry
+unreachable (it ages out of the LRU). A request that read the version
+before a concurrent bump can only ever fill the old, unreachable key.
+
+Versions live in-process next to the cache, so the TTL bounds how long
+another worker's writes can go unseen. Previews are read from the primary:
+rows from a lagging replica would sit under the freshly bumped version. Code that writes notifications
+with bulk statements, bypassing the ORM events, calls bump_versions().
+
+notify_course() fans a message out to every student enrolled in a course
+with a single INSERT ... SELECT from enrollments, on a small thread pool
+so the request that triggered it doesn't wait for it.
+"""
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+from app.cache import LRUCache
+from app.config import db
+from app.models import Enrollment, Notification
+from app.routing import on_primary
+
+PREVIEW_LIMIT = 5
+
+_VERSIONS_KEY = "notification_versions"
+_CACHE_KEY = "notification_cache"
+_EXECUTOR_KEY = "notification_executor"
+_PENDING_KEY = "notified_user_ids"
+
+NotificationPreview = namedtuple("NotificationPreview", "id message created_at")
+
+
+class NotificationVersions:
+    def __init__(self):
+        self._versions = {}   # user_id -> int
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        return self._versions.get(user_id, 0)
+
+    def bump(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+
+def init_app(app):
+    app.extensions[_VERSIONS_KEY] = NotificationVersions()
+    app.extensions[_CACHE_KEY] = LRUCache(
+        app.config["NOTIFICATION_CACHE_SIZE"], app.config["NOTIFICATION_CACHE_TTL"]
+    )
+    app.extensions[_EXECUTOR_KEY] = ThreadPoolExecutor(
+        max_workers=app.config["NOTIFICATION_WORKERS"],
+        thread_name_prefix="notify",
+    )
+
+
+def notification_cache():
+    return current_app.extensions[_CACHE_KEY]
+
+
+def bump_versions(user_ids):
+    current_app.extensions[_VERSIONS_KEY].bump(user_ids)
+
+
+def unread_previews(user_id):
+    """The newest unread notifications for user_id, at most PREVIEW_LIMIT."""
+    version = current_app.extensions[_VERSIONS_KEY].get(user_id)
+    cache = notification_cache()
+    previews = cache.get((user_id, version))
+    if previews is None:
+        rows = db.session.execute(
+            db.select(Notification.id, Notification.message, Notification.created_at)
+            .filter_by(user_id=user_id, is_read=False)
+            .order_by(Notification.created_at.desc())
+            .limit(PREVIEW_LIMIT),
+            bind_arguments=on_primary(),
+        ).all()
+        previews = tuple(NotificationPreview(*row) for row in rows)
+        cache.set((user_id, version), previews)
+    return previews
+
+
+# ---------- fan-out ----------
+
+def fan_out(course_id, message):
+    """Notifies every student enrolled in course_id; caller commits.
+
+    One INSERT ... SELECT however large the course. Returns the ids of the
+    users notified, for bump_versions() once the insert has committed.
+    """
+    message = message[:Notification.message.type.length]
+    user_ids = [
+        user_id for user_id, in
+        db.session.query(Enrollment.user_id).filter(Enrollment.course_id == course_id)
+    ]
+    if user_ids:
+        db.session.execute(
+            db.insert(Notification).from_select(
+                ["user_id", "message"],
+                db.select(Enrollment.user_id, db.literal(message))
+                .where(Enrollment.course_id == course_id),
+            )
+        )
+    return user_ids
+
+
+def _run_fan_out(app, course_id, message):
+    with app.app_context():
+        try:
+            user_ids = fan_out(course_id, message)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("notification fan-out failed for course %s", course_id)
+            raise
+        bump_versions(user_ids)
+        return len(user_ids)
+
+
+def notify_course(course_id, message):
+    """Queues fan_out() for course_id off the request thread.
+
+    Call after the change being announced has committed. Returns a Future
+    for the number of students notified; with NOTIFICATION_ASYNC off (tests)
+    the fan-out has already run when this returns.
+    """
+    app = current_app._get_current_object()
+    if app.config["NOTIFICATION_ASYNC"]:
+        return app.extensions[_EXECUTOR_KEY].submit(_run_fan_out, app, course_id, message)
+
+    future = Future()
+    future.set_result(_run_fan_out(app, course_id, message))
+    return future
+
+
+# ---------- version bumps from ORM writes ----------
+
+@event.listens_for(db.session, "after_flush")
+def _collect_notified_users(session, flush_context):
+    touched = {obj.user_id for obj in session.new if isinstance(obj, Notification)}
+    touched.update(
+        obj.user_id for obj in session.dirty
+        if isinstance(obj, Notification) and db.inspect(obj).attrs.is_read.history.has_changes()
+    )
+    touched.update(obj.user_id for obj in session.deleted if isinstance(obj, Notification))
+    if touched:
+        session.info.setdefault(_PENDING_KEY, set()).update(touched)
+
+
+@event.listens_for(db.session, "after_commit")
+def _bump_notified_users(session):
+    touched = session.info.pop(_PENDING_KEY, None)
+    if touched and has_app_context() and _VERSIONS_KEY in current_app.extensions:
+        bump_versions(touched)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _discard_notified_users(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
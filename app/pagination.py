@@ -0,0 +1,150 @@
+"""Cursor-based (keyset) pagination for list pages.
+
+A listing is ordered by a fixed set of key columns that ends in a unique
+column (usually the primary key). Instead of OFFSET, the next page starts
+strictly after the last row already shown, so each page costs one indexed
+range scan no matter how deep the user has paged or how large the table is.
+
+Cursors are opaque url-safe strings holding the key values of the row the
+page starts after (?after=...) or before (?before=...).
+"""
+import base64
+import json
+from datetime import datetime
+
+from flask import abort, current_app, request
+
+from app.config import db
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Page:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class Keyset:
+    """Sort keys for one listing; the last column must be unique.
+
+    e.g. Keyset(Announcement.created_at, Announcement.id, descending=True)
+    key extracts the key values from a result item; by default each column
+    is read as an attribute of the item (use it for multi-entity rows).
+    """
+
+    def __init__(self, *columns, descending=False, key=None):
+        self.columns = columns
+        self.descending = descending
+        self.key = key or (lambda item: tuple(getattr(item, c.key) for c in columns))
+
+    # ---- cursors ----
+    def encode(self, item):
+        values = [v.isoformat() if isinstance(v, datetime) else v for v in self.key(item)]
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    def decode(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values = json.loads(raw)
+        except (ValueError, TypeError) as error:
+            raise InvalidCursor(cursor) from error
+        if not isinstance(values, list) or len(values) != len(self.columns):
+            raise InvalidCursor(cursor)
+        try:
+            return [
+                datetime.fromisoformat(v) if isinstance(c.type, db.DateTime) else v
+                for c, v in zip(self.columns, values)
+            ]
+        except (ValueError, TypeError) as error:
+            raise InvalidCursor(cursor) from error
+
+    # ---- query building ----
+    def _beyond(self, values, forward):
+        """Rows strictly past values in the given direction, as OR-ed prefixes.
+
+        (a, b) > (x, y) is written out as a > x OR (a = x AND b > y) so it
+        works on every backend.
+        """
+        greater = forward != self.descending
+        clauses = []
+        for i, column in enumerate(self.columns):
+            equal = [c == v for c, v in zip(self.columns[:i], values[:i])]
+            step = column > values[i] if greater else column < values[i]
+            clauses.append(db.and_(*equal, step))
+        return db.or_(*clauses)
+
+    def _order(self, forward):
+        ascending = forward != self.descending
+        return [c.asc() if ascending else c.desc() for c in self.columns]
+
+    def window(self, query, per_page, after=None, before=None):
+        """The ordered, limited query for one page (fetches one extra row)."""
+        forward = before is None
+        cursor = after if forward else before
+        if cursor is not None:
+            query = query.filter(self._beyond(self.decode(cursor), forward))
+        return query.order_by(None).order_by(*self._order(forward)).limit(per_page + 1)
+
+    def page(self, rows, per_page, after=None, before=None):
+        """Builds the Page (and its cursors) from the rows window() returned."""
+        forward = before is None
+        more = len(rows) > per_page
+        items = list(rows[:per_page])
+        if not forward:
+            items.reverse()
+        if not items:
+            return Page(items)
+
+        next_cursor = prev_cursor = None
+        if forward:
+            next_cursor = self.encode(items[-1]) if more else None
+            prev_cursor = self.encode(items[0]) if after is not None else None
+        else:
+            prev_cursor = self.encode(items[0]) if more else None
+            next_cursor = self.encode(items[-1])
+        return Page(items, next_cursor, prev_cursor)
+
+    def paginate(self, query, per_page, after=None, before=None, load=None):
+        """One page of query.
+
+        load(window) may replace window.all() to fetch the page's rows some
+        other way (e.g. joined with their children); its items can come back
+        in any order and are sorted into window order by key.
+        """
+        window = self.window(query, per_page, after, before)
+        if load is None:
+            rows = window.all()
+        else:
+            ascending = (before is None) != self.descending
+            rows = sorted(load(window), key=self.key, reverse=not ascending)
+        return self.page(rows, per_page, after, before)
+
+
+def paginate(query, keyset, per_page=None, load=None):
+    """Paginates query for the current request's ?after= / ?before= cursor."""
+    per_page = per_page or current_app.config["PER_PAGE"]
+    after = request.args.get("after")
+    before = request.args.get("before")
+    try:
+        return keyset.paginate(query, per_page, after=after, before=before, load=load)
+    except InvalidCursor:
+        abort(400)
@@ -0,0 +1,272 @@
+"""On-demand CPU profiles of single requests.
+
+An admin profiles one request by sending it with the X-Profile header or
+the ?_profile=1 query flag (PROFILE_HEADER / PROFILE_QUERY_ARG). From
+/admin/profiles an admin can also arm sampling for one endpoint: that
+endpoint's requests, whoever makes them, are profiled at the given rate
+until the requested number of profiles has been taken.
+
+cProfile runs from before_request to after_request, so the view, its
+queries and the template render are all inside the profile. Each profile
+is written to PROFILE_DIR as
+  - <name>.prof       pstats, for python -m pstats or snakeviz;
+  - <name>.collapsed  "frame;frame;frame microseconds" stacks, for
+                      flamegraph.pl or speedscope, rebuilt from
+                      cProfile's caller edges (so, like any deterministic
+                      profile, shared callees are apportioned by time);
+  - <name>.json       the summary the admin page lists: top functions and
+                      the split of time between SQL, Jinja rendering and
+                      Python code.
+When the request was made by an admin, the response names its profile in
+the X-Profile-Id header. Only the newest PROFILE_KEEP profiles are kept.
+
+Sampling is armed on app.extensions, so it only applies to the worker
+process that handled the admin's form; under a multi-process server the
+other workers keep serving unprofiled.
+"""
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import secrets
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from flask import current_app, g, request
+from flask_login import current_user
+
+_SAMPLING_KEY = "profile_sampling"
+_ACTIVE_KEY = "_profile"
+
+PROFILE_NAME = re.compile(r"^[\w.\-]+$")
+FORMATS = {"prof": ".prof", "collapsed": ".collapsed"}
+
+# where a stack's time is counted: under SQL execution, else under a
+# template render, else it is Python code (the view and everything else)
+_SQL_FUNCTIONS = (os.path.join("sqlalchemy", "engine", "default.py"),
+                  frozenset(("do_execute", "do_executemany", "do_execute_no_params")))
+_TEMPLATE_FUNCTIONS = (os.path.join("jinja2", "environment.py"), frozenset(("render",)))
+
+_MIN_SECONDS = 1e-6    # stacks below a microsecond are left out
+
+
+class Sampling:
+    """Profiles rate of endpoint's requests until remaining runs out."""
+
+    def __init__(self, endpoint, rate, remaining):
+        self.endpoint = endpoint
+        self.rate = rate
+        self.remaining = remaining
+        self._lock = threading.Lock()
+
+    def take(self):
+        if random.random() >= self.rate:
+            return False
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+def sampling():
+    return current_app.extensions.get(_SAMPLING_KEY)
+
+
+def start_sampling(endpoint, rate, count):
+    current_app.extensions[_SAMPLING_KEY] = Sampling(endpoint, rate, count)
+
+
+def stop_sampling():
+    current_app.extensions[_SAMPLING_KEY] = None
+
+
+def _requested(app):
+    flag = request.headers.get(app.config["PROFILE_HEADER"]) or \
+        request.args.get(app.config["PROFILE_QUERY_ARG"])
+    if flag:
+        return current_user.is_authenticated and current_user.is_admin
+    armed = app.extensions.get(_SAMPLING_KEY)
+    return armed is not None and armed.endpoint == request.endpoint and armed.take()
+
+
+def init_app(app):
+    app.extensions[_SAMPLING_KEY] = None
+
+    @app.before_request
+    def _start_profile():
+        if not _requested(app):
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return  # another profiler already runs on this thread
+        g.setdefault(_ACTIVE_KEY, (profile, time.perf_counter()))
+
+    @app.after_request
+    def _save_profile(response):
+        active = g.pop(_ACTIVE_KEY, None)
+        if active is None:
+            return response
+        profile, started = active
+        profile.disable()
+        name = save(profile, time.perf_counter() - started, response.status_code)
+        # sampled requests are anyone's; only admins learn they were profiled
+        if current_user.is_authenticated and current_user.is_admin:
+            response.headers["X-Profile-Id"] = name
+        return response
+
+    # the view raised: stop profiling, there is nothing worth keeping
+    @app.teardown_request
+    def _drop_profile(exc):
+        active = g.pop(_ACTIVE_KEY, None)
+        if active is not None:
+            active[0].disable()
+
+
+# ---------- reading a profile ----------
+
+def _matches(func, functions):
+    filename, _, name = func
+    suffix, names = functions
+    return name in names and filename.endswith(suffix)
+
+
+def _label(func):
+    filename, line, name = func
+    if filename == "~":
+        return name.replace(";", ",")    # a builtin, e.g. <method 'execute' ...>
+    parts = filename.replace("\\", "/").split("/")
+    if "site-packages" in parts:
+        parts = parts[parts.index("site-packages") + 1:]
+    elif "app" in parts:
+        parts = parts[len(parts) - 1 - parts[::-1].index("app"):]
+    return f"{'/'.join(parts)}:{line}({name})".replace(";", ",")
+
+
+def stacks(stats):
+    """{(func, ...): own seconds} for every call path, root first.
+
+    A child's time is split between its callers by the cumulative time of
+    each caller edge, and passed down each path in that proportion.
+    """
+    children = defaultdict(list)
+    roots = []
+    for func, (_, _, _, _, callers) in stats.items():
+        if not callers:
+            roots.append(func)
+        for caller in callers:
+            children[caller].append(func)
+
+    found = defaultdict(float)
+    # (func, path, seconds of func's cumulative time spent on this path)
+    pending = [(root, (root,), stats[root][3]) for root in roots]
+    while pending:
+        func, path, seconds = pending.pop()
+        _, _, own, cumulative, _ = stats[func]
+        share = seconds / cumulative if cumulative else 0.0
+        if own * share >= _MIN_SECONDS:
+            found[path] += own * share
+        for child in children[func]:
+            if child in path:
+                continue  # recursion: cProfile already folds it into the outer call
+            edge = stats[child][4][func][3] * share
+            if edge >= _MIN_SECONDS:
+                pending.append((child, path + (child,), edge))
+    return found
+
+
+def split_time(paths):
+    """Seconds under SQL execution, under template rendering, and the rest."""
+    sql = templates = python = 0.0
+    for path, seconds in paths.items():
+        if any(_matches(func, _SQL_FUNCTIONS) for func in path):
+            sql += seconds
+        elif any(_matches(func, _TEMPLATE_FUNCTIONS) for func in path):
+            templates += seconds
+        else:
+            python += seconds
+    return {"sql": sql, "templates": templates, "python": python}
+
+
+def top_functions(stats, limit):
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [{"function": _label(func), "calls": nc, "own": own, "cumulative": cumulative}
+            for func, (_, nc, own, cumulative, _) in rows]
+
+
+def save(profile, seconds, status):
+    """Writes the three files for profile; returns the profile's name."""
+    directory = current_app.config["PROFILE_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    created = datetime.now(timezone.utc)
+    name = f"{created:%Y%m%dT%H%M%S}-{request.endpoint or 'unmatched'}-{secrets.token_hex(3)}"
+    base = os.path.join(directory, name)
+
+    profile.dump_stats(base + FORMATS["prof"])
+    stats = pstats.Stats(profile).stats
+    paths = stacks(stats)
+    with open(base + FORMATS["collapsed"], "w") as f:
+        for path, own in sorted(paths.items()):
+            f.write(f"{';'.join(_label(func) for func in path)} {round(own * 1e6)}\n")
+
+    summary = {
+        "name": name,
+        "created": created.isoformat(),
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "endpoint": request.endpoint,
+        "status": status,
+        "seconds": seconds,
+        "split": split_time(paths),
+        "top": top_functions(stats, current_app.config["PROFILE_TOP_FUNCTIONS"]),
+    }
+    with open(base + ".json", "w") as f:
+        json.dump(summary, f)
+    _prune(directory, current_app.config["PROFILE_KEEP"])
+    return name
+
+
+def _prune(directory, keep):
+    """Deletes all but the newest keep profiles in directory."""
+    summaries = [entry for entry in os.scandir(directory) if entry.name.endswith(".json")]
+    if len(summaries) <= keep:
+        return
+    summaries.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+    for entry in summaries[keep:]:
+        base = os.path.join(directory, entry.name[:-len(".json")])
+        for extension in (*FORMATS.values(), ".json"):
+            try:
+                os.remove(base + extension)
+            except FileNotFoundError:
+                pass   # another request pruned it first
+
+
+def list_profiles():
+    """Summaries of the saved profiles, newest first."""
+    directory = current_app.config["PROFILE_DIR"]
+    if not os.path.isdir(directory):
+        return []
+    summaries = []
+    for filename in os.listdir(directory):
+        if filename.endswith(".json"):
+            with open(os.path.join(directory, filename)) as f:
+                summaries.append(json.load(f))
+    summaries.sort(key=lambda summary: summary["created"], reverse=True)
+    return summaries
+
+
+def load_profile(name):
+    """The summary of profile name, or None if there is no such profile."""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = os.path.join(current_app.config["PROFILE_DIR"], name + ".json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,216 @@
+"""Mass enrollment from a roster of (email, course_code) pairs.
+
+Users and courses are resolved through maps loaded once at the start
+(two queries however long the roster is), and rows are processed in
+batches. Per batch:
+
+  1. one query finds the pairs that are already enrolled (skipped),
+  2. one query reads the seats_taken / max_students of the batch's
+     courses, and each course's seats are claimed with one conditional
+     UPDATE (like Course.reserve_seat, so a concurrent enrollment can't
+     overbook it); rows beyond the seats claimed are rejected,
+  3. one executemany INSERT adds the rest, ignoring any that conflict
+     with unique_user_course (a concurrent web enrollment),
+  4. course_grades rows are added for the new pairs (the bulk INSERT
+     bypasses the ORM hooks that would add them),
+  5. one UPDATE recounts seats_taken for the courses touched,
+
+and the batch is committed, so the live site keeps working in between
+and a re-run after a failure picks up where it stopped. Importing is an
+admin action: course availability (which closes self-enrollment) isn't
+checked, only capacity.
+
+    python -m app.scripts.import_roster roster.csv
+"""
+import time
+from collections import Counter, namedtuple
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app import csv_rows
+from app.config import db
+from app.grades import add_course_grades
+from app.models import Course, Enrollment, User
+
+BATCH_SIZE = 1000
+CSV_COLUMNS = ("email", "course_code")
+
+# raised by read_csv for a file that can't be read at all
+ImportFormatError = csv_rows.ImportFormatError
+
+RosterError = namedtuple("RosterError", "row email course_code error")
+
+
+class RosterResult(namedtuple("RosterResult", "rows enrolled skipped errors seconds")):
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def read_csv(stream):
+    """Rows of a binary "email,course_code" CSV stream, parsed incrementally."""
+    return csv_rows.read_csv(stream, CSV_COLUMNS)
+
+
+def _insert_ignore(dialect):
+    table = Enrollment.__table__
+    if dialect == "mysql":
+        return mysql.insert(table).prefix_with("IGNORE")
+    insert = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}.get(dialect)
+    if insert is None:
+        # the batch already left out the enrolled pairs, so a plain INSERT
+        # only conflicts with a web enrollment made since, and fails the batch
+        return db.insert(table)
+    return insert(table).on_conflict_do_nothing(
+        index_elements=[table.c.user_id, table.c.course_id]
+    )
+
+
+def _recount(course_ids):
+    counts = (
+        db.select(db.func.count(Enrollment.id))
+        .where(Enrollment.course_id == Course.id)
+        .scalar_subquery()
+    )
+    db.session.execute(
+        db.update(Course)
+        .where(Course.id.in_(course_ids))
+        .values(seats_taken=counts, version=Course.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _claim_seats(course_id, wanted, free):
+    """Claims up to wanted seats of course_id; returns how many it got.
+
+    The conditional UPDATE of Course.reserve_seat, for several seats at
+    once: it only matches while they are still free, so a concurrent
+    enrollment or import can't push seats_taken past max_students. free is
+    the caller's (possibly stale) count; a miss re-reads it and retries.
+    """
+    wanted = wanted if free is None else min(wanted, free)
+    while wanted > 0:
+        claimed = db.session.execute(
+            db.update(Course)
+            .where(
+                Course.id == course_id,
+                db.or_(
+                    Course.max_students.is_(None),
+                    Course.seats_taken + wanted <= Course.max_students,
+                ),
+            )
+            .values(seats_taken=Course.seats_taken + wanted, version=Course.version + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed:
+            return wanted
+        max_students, seats_taken = db.session.execute(
+            db.select(Course.max_students, Course.seats_taken).where(Course.id == course_id)
+        ).one()
+        wanted = min(wanted, max_students - seats_taken)
+    return 0
+
+
+class _Batch:
+    def __init__(self, insert, errors):
+        self.insert = insert
+        self.errors = errors
+        self.rows = []      # (row, email, code, user_id, course_id)
+
+    def apply(self):
+        """Enrolls the batch's rows; returns (enrolled, skipped)."""
+        if not self.rows:
+            return 0, 0
+        user_ids = {row[3] for row in self.rows}
+        course_ids = {row[4] for row in self.rows}
+
+        enrolled = {
+            (user_id, course_id)
+            for user_id, course_id in db.session.execute(
+                db.select(Enrollment.user_id, Enrollment.course_id).where(
+                    Enrollment.course_id.in_(course_ids), Enrollment.user_id.in_(user_ids)
+                )
+            )
+        }
+        free = {
+            course_id: None if max_students is None else max_students - seats_taken
+            for course_id, max_students, seats_taken in db.session.execute(
+                db.select(Course.id, Course.max_students, Course.seats_taken)
+                .where(Course.id.in_(course_ids))
+            )
+        }
+
+        skipped, candidates = 0, []
+        for row in self.rows:
+            if (row[3], row[4]) in enrolled:
+                skipped += 1
+            else:
+                candidates.append(row)
+        wanted = Counter(row[4] for row in candidates)
+        seats = {course_id: _claim_seats(course_id, count, free[course_id])
+                 for course_id, count in wanted.items()}
+
+        accepted = []
+        for number, email, code, user_id, course_id in candidates:
+            if seats[course_id] > 0:
+                seats[course_id] -= 1
+                accepted.append((user_id, course_id))
+            else:
+                self.errors.append(RosterError(number, email, code, "course is full"))
+
+        if accepted:
+            db.session.execute(
+                self.insert, [{"user_id": user_id, "course_id": course_id}
+                              for user_id, course_id in accepted]
+            )
+            add_course_grades(accepted)
+            # exact again if the INSERT ignored a pair enrolled meanwhile
+            _recount({course_id for _, course_id in accepted})
+        db.session.commit()
+        self.rows = []
+        return len(accepted), skipped
+
+
+def import_roster(rows, batch_size=BATCH_SIZE):
+    """Enrolls (row, email, course_code) rows in batches; commits each batch."""
+    started = time.perf_counter()
+    students = {
+        email.lower(): user_id
+        for user_id, email in db.session.query(User.id, User.email)
+        .filter(User.role == User.ROLE_STUDENT)
+    }
+    courses = {
+        code.strip().upper(): course_id
+        for course_id, code in db.session.query(Course.id, Course.code)
+    }
+
+    errors = []
+    batch = _Batch(_insert_ignore(db.session.connection().dialect.name), errors)
+    seen = set()
+    total = enrolled = skipped = 0
+
+    def flush():
+        nonlocal enrolled, skipped
+        added, already = batch.apply()
+        enrolled += added
+        skipped += already
+
+    for number, email, code in rows:
+        total += 1
+        user_id = students.get((email or "").strip().lower())
+        course_id = courses.get((code or "").strip().upper())
+        if user_id is None:
+            errors.append(RosterError(number, email, code, "no student with this email"))
+        elif course_id is None:
+            errors.append(RosterError(number, email, code, "no course with this code"))
+        elif (user_id, course_id) in seen:
+            skipped += 1
+        else:
+            seen.add((user_id, course_id))
+            batch.rows.append((number, email, code, user_id, course_id))
+            if len(batch.rows) >= batch_size:
+                flush()
+    flush()
+
+    errors.sort()
+    return RosterResult(total, enrolled, skipped, errors, time.perf_counter() - started)
@@ -0,0 +1,144 @@
+"""Read/write routing between the primary database and a read replica.
+
+When REPLICA_DATABASE_URI is set, the app gets a replica engine and
+RoutingSession sends the SELECTs of safe (GET/HEAD/OPTIONS) requests
+there. (It is a plain engine rather than a Flask-SQLAlchemy bind: binds
+own their own tables, and the replica only mirrors the primary's.) Everything else goes to the primary: flushes, INSERT/UPDATE/DELETE,
+raw connections, and every statement of the request after its first
+write.
+
+Read-your-writes: a request that wrote, or any non-GET request, marks the
+user's session cookie, and that browser reads from the primary for the
+next READ_YOUR_WRITES_SECONDS, however far the replica is behind.
+
+For local testing, SQLITE_REPLICA_REFRESH_SECONDS keeps a SQLite copy of
+a SQLite primary (via the backup API) as the replica.
+"""
+import logging
+import sqlite3
+import threading
+import time
+
+from flask import current_app, request, session as cookie
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, create_engine
+from sqlalchemy.engine import make_url
+
+_ENGINE_KEY = "replica_engine"
+
+_READ_KEY = "read_from_replica"
+_WROTE_KEY = "wrote_to_primary"
+_STICKY_COOKIE = "_primary_until"
+_SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+log = logging.getLogger(__name__)
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that can send plain SELECTs to the replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get(_READ_KEY) and not self.info.get(_WROTE_KEY):
+            if not self._flushing and isinstance(clause, Select):
+                return current_app.extensions[_ENGINE_KEY]
+            # a write, or a statement we can't vouch for: primary from here on
+            self.info[_WROTE_KEY] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_engine(app):
+    return app.extensions.get(_ENGINE_KEY)
+
+
+def on_primary():
+    """bind_arguments that keep one statement on the primary.
+
+    For reads that fill a cache invalidated on commit (app.identity,
+    app.notifications): rows from a replica that hasn't caught up would be
+    cached after the invalidation and served until the entry's TTL.
+    """
+    return {"bind": current_app.extensions["sqlalchemy"].engine}
+
+
+def init_app(app, db):
+    """Creates the replica engine and registers the per-request routing hooks."""
+    uri = app.config.get("REPLICA_DATABASE_URI")
+    if not uri:
+        return
+    app.extensions[_ENGINE_KEY] = create_engine(uri, **app.config["REPLICA_ENGINE_OPTIONS"])
+
+    @app.before_request
+    def _route_reads_to_replica():
+        if request.method in _SAFE_METHODS and cookie.get(_STICKY_COOKIE, 0) < time.time():
+            db.session.info[_READ_KEY] = True
+
+    @app.after_request
+    def _stick_to_primary_after_writes(response):
+        if request.method not in _SAFE_METHODS or db.session.info.get(_WROTE_KEY):
+            cookie[_STICKY_COOKIE] = time.time() + app.config["READ_YOUR_WRITES_SECONDS"]
+        return response
+
+
+# ---------- local stand-in replica ----------
+
+def _sqlite_path(uri):
+    url = make_url(uri)
+    if url.get_backend_name() != "sqlite" or not url.database:
+        raise ValueError(f"{uri!r} is not a SQLite file database")
+    return url.database
+
+
+def refresh_sqlite_replica(primary_uri, replica_uri):
+    """Copies the primary SQLite database over the replica file."""
+    source = sqlite3.connect(_sqlite_path(primary_uri))
+    target = sqlite3.connect(_sqlite_path(replica_uri))
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+class ReplicaRefresher:
+    """Background thread re-copying a SQLite primary every interval seconds."""
+
+    def __init__(self, primary_uri, replica_uri, interval):
+        self.primary_uri = primary_uri
+        self.replica_uri = replica_uri
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="replica-refresh", daemon=True)
+
+    def refresh(self):
+        refresh_sqlite_replica(self.primary_uri, self.replica_uri)
+
+    def start(self):
+        self.refresh()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except sqlite3.Error:
+                log.exception("replica refresh failed")
+
+
+def start_sqlite_replica(app):
+    """Starts the refresher if the config asks for a local SQLite replica.
+
+    Call after the primary schema is in place, so the first copy has it.
+    """
+    interval = app.config.get("SQLITE_REPLICA_REFRESH_SECONDS")
+    if not interval or not app.config.get("REPLICA_DATABASE_URI"):
+        return None
+    refresher = ReplicaRefresher(
+        app.config["SQLALCHEMY_DATABASE_URI"], app.config["REPLICA_DATABASE_URI"], interval
+    )
+    refresher.start()
+    app.extensions["replica_refresher"] = refresher
+    return refresher
@@ -0,0 +1,386 @@
+"""Synthetic LMS data at any scale, for load tests and benchmarks.
+
+    python -m app.scripts.generate_data --preset load
+    python -m app.scripts.generate_data --students 20000 --courses 800 --seed 7
+    python -m app.scripts.generate_data --preset load --database sqlite:////tmp/load.db
+
+The target database is emptied first (like populate_db). The same seed and
+scale always give the same rows (apart from password salts): ids are
+assigned here (on PostgreSQL the id sequences are then moved past them),
+and timestamps are offsets from a fixed term start rather than from now.
+
+Passwords are hashed once per distinct password (--passwords, default 1,
+so every generated user logs in with DEFAULT_PASSWORD) and, when there
+are several, across a process pool. Rows are generated lazily and written
+with executemany INSERTs of --batch-size rows, one transaction per table.
+"""
+import argparse
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from werkzeug.security import generate_password_hash
+
+from app import create_app, migrations
+from app.config import config_for, db
+from app.grades import rebuild_course_grades
+from app.models import (
+    Announcement, Assignment, Course, Enrollment, Notification, StudentAssignment, User,
+)
+
+DEFAULT_PASSWORD = "password123"
+TERM_START = datetime(2025, 1, 13, 9, 0)
+TERM_DAYS = 112
+BATCH_SIZE = 10_000
+
+Scale = namedtuple(
+    "Scale",
+    "students professors courses assignments_per_course courses_per_student "
+    "student_assignments announcements_per_course notifications",
+)
+
+PRESETS = {
+    "demo": Scale(200, 10, 20, 8, (2, 5), 3_000, 3, 1_000),
+    "medium": Scale(10_000, 150, 500, 10, (3, 5), 100_000, 3, 100_000),
+    "load": Scale(100_000, 1_250, 5_000, 10, (3, 5), 1_000_000, 3, 1_000_000),
+}
+
+DEPARTMENTS = ("CMPE", "CS", "MATH", "PHYS", "CHEM", "BIOL", "ENGL", "HIST", "ECON", "PSYC")
+SUBJECTS = (
+    "Algorithms", "Calculus", "Mechanics", "Organic Chemistry", "Genetics", "Composition",
+    "World History", "Microeconomics", "Cognition", "Databases", "Statistics", "Optics",
+)
+LEVELS = ("Introduction to", "Principles of", "Topics in", "Advanced", "Applied")
+FIRST_NAMES = ("Ana", "Ben", "Chen", "Dana", "Eli", "Fatima", "Gus", "Hana", "Ivan", "Jo")
+LAST_NAMES = ("Lopez", "Smith", "Nguyen", "Patel", "Kim", "Okafor", "Rossi", "Cohen")
+CAPACITIES = (40, 60, 120, 250, None)
+
+
+def hash_passwords(passwords, workers=None, method="scrypt"):
+    """Hashes each distinct password once, in parallel when there are several."""
+    distinct = sorted(set(passwords))
+    methods = [method] * len(distinct)
+    if len(distinct) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            hashes = list(pool.map(generate_password_hash, distinct, methods))
+    else:
+        hashes = [generate_password_hash(p, method) for p in distinct]
+    return dict(zip(distinct, hashes))
+
+
+def _advance_sequence(table):
+    """Moves table's id sequence past the rows written here (PostgreSQL only).
+
+    Inserting explicit ids leaves a serial column's sequence untouched, so
+    the app's next INSERT would be handed an id that is already taken.
+    """
+    if db.session.get_bind().dialect.name != "postgresql":
+        return
+    db.session.execute(
+        db.select(db.func.setval(
+            db.func.pg_get_serial_sequence(table.name, "id"),
+            db.select(db.func.coalesce(db.func.max(table.c.id), 0) + 1).scalar_subquery(),
+            False,
+        ))
+    )
+
+
+def _insert(model, rows, batch_size):
+    """Writes an iterable of row dicts in executemany batches; returns the count."""
+    table = model.__table__
+    count, batch = 0, []
+    explicit_ids = False
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            explicit_ids = explicit_ids or "id" in batch[0]
+            db.session.execute(db.insert(table), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        explicit_ids = explicit_ids or "id" in batch[0]
+        db.session.execute(db.insert(table), batch)
+        count += len(batch)
+    if explicit_ids:
+        _advance_sequence(table)
+    db.session.commit()
+    return count
+
+
+def _moment(rng, start_day=0, end_day=TERM_DAYS):
+    return TERM_START + timedelta(days=rng.uniform(start_day, end_day))
+
+
+class Generator:
+    def __init__(self, scale, seed=131, passwords=1, workers=None, batch_size=BATCH_SIZE):
+        self.scale = scale
+        self.seed = seed
+        self.batch_size = batch_size
+        self.password_pool = [DEFAULT_PASSWORD] + [f"{DEFAULT_PASSWORD}-{i}" for i in range(1, passwords)]
+        self.workers = workers
+        self.counts = {}
+        self.timings = {}
+
+    def _rng(self, table):
+        # one stream per table, so changing one table's scale leaves the others alone
+        return random.Random(f"{self.seed}:{table}")
+
+    def _step(self, name, model, rows):
+        start = time.perf_counter()
+        self.counts[name] = _insert(model, rows, self.batch_size)
+        self.timings[name] = time.perf_counter() - start
+
+    # ---------- tables ----------
+
+    def users(self):
+        rng = self._rng("users")
+        hashes = hash_passwords(self.password_pool, self.workers,
+                                current_app.config["PASSWORD_HASH_METHOD"])
+        pool = [hashes[p] for p in self.password_pool]
+        s = self.scale
+        self.admin_ids = [1]
+        self.professor_ids = list(range(2, 2 + s.professors))
+        self.student_ids = list(range(2 + s.professors, 2 + s.professors + s.students))
+
+        def rows():
+            yield self._user(1, "admin@generated.test", User.ROLE_ADMIN, pool[0], rng)
+            for n, user_id in enumerate(self.professor_ids):
+                yield self._user(user_id, f"professor{n:05d}@generated.test",
+                                 User.ROLE_PROFESSOR, rng.choice(pool), rng)
+            for n, user_id in enumerate(self.student_ids):
+                yield self._user(user_id, f"student{n:06d}@generated.test",
+                                 User.ROLE_STUDENT, rng.choice(pool), rng)
+
+        self._step("users", User, rows())
+
+    @staticmethod
+    def _user(user_id, email, role, password_hash, rng):
+        return {
+            "id": user_id,
+            "email": email,
+            "role": role,
+            "password_hash": password_hash,
+            "avatar_url": f"https://ui-avatars.com/api/?name={email}",
+            "created_at": _moment(rng, -365, 0),
+        }
+
+    def courses(self):
+        rng = self._rng("courses")
+        self.capacity = {}
+
+        def rows():
+            for n in range(self.scale.courses):
+                course_id = n + 1
+                professor_id = rng.choice(self.professor_ids)
+                capacity = rng.choice(CAPACITIES)
+                self.capacity[course_id] = capacity
+                created = _moment(rng, -60, -7)
+                yield {
+                    "id": course_id,
+                    "code": f"{DEPARTMENTS[n % len(DEPARTMENTS)]}{100 + n}",
+                    "title": f"{rng.choice(LEVELS)} {rng.choice(SUBJECTS)}",
+                    "description": f"Generated course {n} for load testing. " * rng.randint(1, 4),
+                    "credits": rng.choice((1, 2, 3, 3, 4)),
+                    "professor": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    "professor_id": professor_id,
+                    "availability": rng.random() < 0.9,
+                    "format": rng.choice(("online", "in-person")),
+                    "max_students": capacity,
+                    "seats_taken": 0,   # recounted after enrollments
+                    "version": 1,
+                    "created_at": created,
+                    "updated_at": created,
+                }
+
+        self._step("courses", Course, rows())
+
+    def enrollments(self):
+        rng = self._rng("enrollments")
+        low, high = self.scale.courses_per_student
+        course_ids = list(self.capacity)
+        free = {cid: cap for cid, cap in self.capacity.items()}
+        self.enrolled = []   # (user_id, course_id), used by student_assignments
+
+        def rows():
+            for user_id in self.student_ids:
+                wanted = min(rng.randint(low, high), len(course_ids))
+                for course_id in rng.sample(course_ids, wanted):
+                    if free[course_id] is not None:
+                        if free[course_id] <= 0:
+                            continue   # full: this student takes one course fewer
+                        free[course_id] -= 1
+                    self.enrolled.append((user_id, course_id))
+                    yield {
+                        "user_id": user_id,
+                        "course_id": course_id,
+                        "enrolled_at": _moment(rng, -14, 7),
+                    }
+
+        self._step("enrollments", Enrollment, rows())
+        # counters from the rows just written; updated_at stays at created_at
+        counts = (
+            db.select(db.func.count(Enrollment.id))
+            .where(Enrollment.course_id == Course.id)
+            .scalar_subquery()
+        )
+        db.session.execute(db.update(Course).values(seats_taken=counts, updated_at=Course.created_at))
+        db.session.commit()
+
+    def assignments(self):
+        rng = self._rng("assignments")
+        self.course_assignments = {}   # course_id -> [(assignment_id, max_points, due)]
+        next_id = 1
+
+        def rows():
+            nonlocal next_id
+            per_course = self.scale.assignments_per_course
+            for course_id in self.capacity:
+                listed = []
+                for n in range(rng.randint(max(per_course // 2, 1), per_course * 3 // 2)):
+                    due = TERM_START + timedelta(days=7 * (n + 1), hours=rng.choice((17, 23)))
+                    max_points = rng.choice((10, 20, 50, 100))
+                    listed.append((next_id, max_points, due))
+                    created = due - timedelta(days=rng.randint(7, 14))
+                    yield {
+                        "id": next_id,
+                        "course_id": course_id,
+                        "title": f"Homework {n + 1}",
+                        "description": f"Problem set {n + 1}. " * rng.randint(2, 6),
+                        "due_date": due,
+                        "max_points": max_points,
+                        "created_at": created,
+                        "updated_at": created,
+                    }
+                    next_id += 1
+                self.course_assignments[course_id] = listed
+
+        self._step("assignments", Assignment, rows())
+
+    def student_assignments(self):
+        rng = self._rng("student_assignments")
+        cells = sum(len(self.course_assignments[cid]) for _, cid in self.enrolled)
+        fill = min(1.0, self.scale.student_assignments / cells) if cells else 0.0
+
+        def rows():
+            for user_id, course_id in self.enrolled:
+                for assignment_id, max_points, due in self.course_assignments[course_id]:
+                    if rng.random() >= fill:
+                        continue
+                    roll = rng.random()
+                    touched = due - timedelta(hours=rng.uniform(1, 96))
+                    if roll < 0.75:
+                        yield {
+                            "user_id": user_id, "assignment_id": assignment_id,
+                            "status": StudentAssignment.STATUS_COMPLETED,
+                            "score": rng.randint(max_points * 2 // 5, max_points),
+                            "completed_at": touched, "updated_at": touched,
+                        }
+                    else:
+                        yield {
+                            "user_id": user_id, "assignment_id": assignment_id,
+                            "status": StudentAssignment.STATUS_IN_PROGRESS
+                            if roll < 0.9 else StudentAssignment.STATUS_NOT_STARTED,
+                            "score": None, "completed_at": None, "updated_at": touched,
+                        }
+
+        self._step("student_assignments", StudentAssignment, rows())
+
+    def announcements(self):
+        rng = self._rng("announcements")
+
+        def rows():
+            for course_id in self.capacity:
+                for n in range(rng.randint(0, self.scale.announcements_per_course * 2)):
+                    posted = _moment(rng)
+                    yield {
+                        "course_id": course_id,
+                        "title": f"Update {n + 1}",
+                        "content": "Generated announcement. " * rng.randint(1, 5),
+                        "created_at": posted,
+                        "updated_at": posted,
+                    }
+
+        self._step("announcements", Announcement, rows())
+
+    def notifications(self):
+        rng = self._rng("notifications")
+
+        def rows():
+            for _ in range(self.scale.notifications):
+                yield {
+                    "user_id": rng.choice(self.student_ids),
+                    "message": f"New announcement in course {rng.randint(1, self.scale.courses)}",
+                    "created_at": _moment(rng),
+                    "is_read": rng.random() < 0.7,
+                }
+
+        self._step("notifications", Notification, rows())
+
+    def course_grades(self):
+        start = time.perf_counter()
+        rebuild_course_grades()
+        db.session.commit()
+        self.timings["course_grades"] = time.perf_counter() - start
+
+    def run(self):
+        """Fills an empty schema; returns {table: rows written}."""
+        self.users()
+        self.courses()
+        self.enrollments()
+        self.assignments()
+        self.student_assignments()
+        self.announcements()
+        self.notifications()
+        self.course_grades()
+        return self.counts
+
+
+def _arguments():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--preset", choices=PRESETS, default="demo")
+    for field in Scale._fields:
+        if field != "courses_per_student":
+            parser.add_argument("--" + field.replace("_", "-"), type=int, dest=field)
+    parser.add_argument("--seed", type=int, default=131)
+    parser.add_argument("--passwords", type=int, default=1, help="distinct passwords to hash")
+    parser.add_argument("--workers", type=int, help="hashing processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--database", help="database URI (default: the app's)")
+    return parser.parse_args()
+
+
+def generate_data():
+    args = _arguments()
+    overrides = {f: getattr(args, f) for f in Scale._fields if getattr(args, f, None) is not None}
+    scale = PRESETS[args.preset]._replace(**overrides)
+
+    config = config_for()
+    if args.database:
+        config = type("GenerateConfig", (config,), {"SQLALCHEMY_DATABASE_URI": args.database})
+    app = create_app(config)
+
+    with app.app_context():
+        print(f"Resetting {app.config['SQLALCHEMY_DATABASE_URI']}")
+        db.drop_all()
+        db.create_all()
+        migrations.upgrade()   # stamps the fresh schema as current
+
+        started = time.perf_counter()
+        generator = Generator(scale, args.seed, args.passwords, args.workers, args.batch_size)
+        counts = generator.run()
+        elapsed = time.perf_counter() - started
+
+        for name, seconds in generator.timings.items():
+            rows = counts.get(name)
+            rate = f"{rows / seconds:10.0f} rows/s" if rows else ""
+            print(f"  {name:<22} {rows if rows is not None else '':>10}  {seconds:7.2f}s  {rate}")
+        total = sum(counts.values())
+        print(f"{total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s), seed {args.seed}.")
+        if args.passwords == 1:
+            print(f"Every user's password is '{DEFAULT_PASSWORD}'.")
+
+if __name__ == "__main__":
+    generate_data()
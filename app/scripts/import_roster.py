@@ -0,0 +1,31 @@
+import sys
+
+from app import create_app
+from app.roster import ImportFormatError, import_roster, read_csv
+
+
+def import_roster_file(path, batch_size=None):
+    """Enrolls every (email, course_code) row of a roster CSV."""
+    app = create_app()
+
+    with app.app_context(), open(path, "rb") as roster:
+        options = {"batch_size": batch_size} if batch_size else {}
+        try:
+            result = import_roster(read_csv(roster), **options)
+        except ImportFormatError as error:
+            sys.exit(f"Could not read {path}: {error} (batches before it were kept)")
+
+        for error in result.errors:
+            print(f"  line {error.row}: {error.email}, {error.course_code}: {error.error}")
+        print(
+            f"{result.rows} rows in {result.seconds:.2f}s ({result.rows_per_second:.0f} rows/s): "
+            f"{result.enrolled} enrolled, {result.skipped} already enrolled, "
+            f"{len(result.errors)} rejected."
+        )
+
+
+if __name__ == "__main__":
+    # python -m app.scripts.import_roster roster.csv [batch_size]
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m app.scripts.import_roster roster.csv [batch_size]")
+    import_roster_file(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
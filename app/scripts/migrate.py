@@ -0,0 +1,31 @@
+import sys
+
+from app import create_app
+from app.config import Config
+from app.migrations import MIGRATIONS, current_version, upgrade
+
+
+class MigrateConfig(Config):
+    # report the schema as found instead of upgrading it on startup
+    AUTO_MIGRATE = False
+
+
+def migrate(status_only=False):
+    """Shows the schema version and applies any pending migrations."""
+    app = create_app(MigrateConfig)
+
+    with app.app_context():
+        version = current_version()
+        for step in MIGRATIONS:
+            state = "applied" if step.version <= version else "pending"
+            print(f"  {step.version:>3}  {state:<8} {step.description}")
+        if status_only:
+            return
+
+        applied = upgrade()
+        print(f"Schema is at version {current_version()}. {len(applied)} migrations applied.")
+
+
+if __name__ == "__main__":
+    # python -m app.scripts.migrate [--status]
+    migrate(status_only="--status" in sys.argv[1:])
@@ -3,6 +3,7 @@ import random
 from app import create_app
 from app.config import db
 from app.models import User, Course, Enrollment
+from app.grades import rebuild_course_grades
 
 def populate_courses():
     # Each entry has course fields & a professor email that links to that professor's User
@@ -172,24 +173,27 @@ def populate_courses():
         courses = Course.query.filter_by(availability=True).all()
         students = User.query.filter_by(role=User.ROLE_STUDENT).all()
 
-        total_enrollments = 0
+        # existing pairs are loaded once instead of checked per row
+        # (avoids duplicates due to UniqueConstraint)
+        existing = set(db.session.execute(db.select(Enrollment.user_id, Enrollment.course_id)).all())
+        new_enrollments = []
 
         for student in students:
             num_courses = random.randint(2, 5)
             selected_courses = random.sample(courses, num_courses)
 
             for course in selected_courses:
-                # avoid duplicates due to UniqueConstraint
-                if not Enrollment.query.filter_by(
-                    user_id=student.id, course_id=course.id
-                ).first():
-                    enrollment = Enrollment(
-                        user_id=student.id,
-                        course_id=course.id,
-                    )
-                    db.session.add(enrollment)
-                    total_enrollments += 1
+                if (student.id, course.id) not in existing:
+                    existing.add((student.id, course.id))
+                    new_enrollments.append({"user_id": student.id, "course_id": course.id})
+
+        if new_enrollments:
+            db.session.execute(db.insert(Enrollment), new_enrollments)
+        total_enrollments = len(new_enrollments)
 
+        # keep the maintained seat counters and grades in sync with the new rows
+        Course.recount_seats()
+        rebuild_course_grades()
         db.session.commit()
         print(f"Random enrollment complete. {total_enrollments} enrollments added.")
 
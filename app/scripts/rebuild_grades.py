@@ -0,0 +1,27 @@
+import sys
+
+from app import create_app
+from app.config import db
+from app.grades import rebuild_course_grades
+from app.models import CourseGrade
+
+
+def rebuild_grades(course_ids=None):
+    """Recomputes course_grades from scratch (all courses, or the given ids)."""
+    app = create_app()
+
+    with app.app_context():
+        rebuild_course_grades(course_ids)
+        db.session.commit()
+
+        if course_ids:
+            rows = CourseGrade.query.filter(CourseGrade.course_id.in_(course_ids)).count()
+        else:
+            rows = CourseGrade.query.count()
+        print(f"Course grades rebuilt. {rows} rows written.")
+
+
+if __name__ == "__main__":
+    # python -m app.scripts.rebuild_grades [course_id ...]
+    ids = [int(arg) for arg in sys.argv[1:]] or None
+    rebuild_grades(ids)
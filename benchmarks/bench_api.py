@@ -0,0 +1,88 @@
+"""Throughput of the JSON API against the HTML pages it replaces.
+
+Each pair serves the same data: the catalog page, a student's courses,
+the dashboard assignment list and the instructor gradebook. Requests go
+through the test client, so the numbers include routing, the user
+loader, queries and serialization or template rendering.
+
+    python -m benchmarks.bench_api [students assignments requests]
+"""
+import random
+import sys
+import time
+
+from app.config import db
+from app.models import User, Course, Enrollment, Assignment, StudentAssignment
+
+from benchmarks.common import bench_app, report
+
+CATALOG_COURSES = 20   # one page at the default PER_PAGE
+
+
+def seed(students, assignments, seed=131):
+    rng = random.Random(seed)
+    professor = User(email="prof@bench.test", password_hash="x", role=User.ROLE_PROFESSOR)
+    db.session.add(professor)
+    db.session.flush()
+    db.session.execute(db.insert(Course), [
+        {"code": f"BENCH{i}", "title": f"Benchmark course {i}", "credits": 3,
+         "professor": "Prof", "professor_id": professor.id, "max_students": None,
+         "seats_taken": students if i == 0 else 0, "description": "d" * 200}
+        for i in range(CATALOG_COURSES)
+    ])
+    course_id = db.session.query(Course.id).filter_by(code="BENCH0").scalar()
+
+    db.session.execute(db.insert(User), [
+        {"email": f"student{i:05d}@bench.test", "password_hash": "x", "role": User.ROLE_STUDENT}
+        for i in range(students)
+    ])
+    student_ids = [i for i, in db.session.query(User.id).filter_by(role=User.ROLE_STUDENT)]
+    db.session.execute(db.insert(Enrollment), [
+        {"user_id": uid, "course_id": course_id} for uid in student_ids
+    ])
+    db.session.execute(db.insert(Assignment), [
+        {"course_id": course_id, "title": f"HW{j}", "description": "d" * 200, "max_points": 100}
+        for j in range(assignments)
+    ])
+    assignment_ids = [i for i, in db.session.query(Assignment.id)]
+    db.session.execute(db.insert(StudentAssignment), [
+        {"user_id": uid, "assignment_id": aid, "status": "Completed", "score": rng.randint(40, 100)}
+        for uid in student_ids for aid in assignment_ids if rng.random() < 0.8
+    ])
+    db.session.commit()
+    return professor.id, student_ids[0], course_id
+
+
+def throughput(client, url, requests):
+    client.get(url)  # warm caches
+    start = time.perf_counter()
+    for _ in range(requests):
+        assert client.get(url).status_code == 200
+    elapsed = time.perf_counter() - start
+    return elapsed / requests, requests / elapsed
+
+
+def main(students, assignments, requests):
+    with bench_app() as app:
+        professor_id, student_id, course_id = seed(students, assignments)
+        student = app.test_client(user=db.session.get(User, student_id))
+        professor = app.test_client(user=db.session.get(User, professor_id))
+        pairs = [
+            ("catalog", student, "/courses/", "/api/v1/courses"),
+            ("my courses", student, "/courses/my-courses", "/api/v1/me/courses"),
+            ("assignment list", student, f"/courses/{course_id}/dashboard/assignments",
+             f"/api/v1/courses/{course_id}/assignments"),
+            ("gradebook", professor, f"/courses/{course_id}/dashboard/submissions",
+             f"/api/v1/courses/{course_id}/gradebook"),
+        ]
+        print(f"{students} students, {assignments} assignments, {requests} requests each")
+        for label, client, html_url, api_url in pairs:
+            html, html_rps = throughput(client, html_url, requests)
+            api, api_rps = throughput(client, api_url, requests)
+            report(f"{label}: HTML", html, f"{html_rps:8.1f} req/s")
+            report(f"{label}: JSON", api, f"{api_rps:8.1f} req/s  ({html / api:.1f}x)")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    main(*(args if len(args) == 3 else (200, 20, 50)))
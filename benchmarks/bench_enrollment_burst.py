@@ -0,0 +1,61 @@
+"""Enrollment burst: many students enrolling in one capped course at once.
+
+Each request claims a seat with the conditional UPDATE in
+Course.reserve_seat; the burst checks the course never overbooks and
+reports the request rate. Runs against a fresh SQLite file, since the
+requests come from several threads.
+
+    python -m benchmarks.bench_enrollment_burst [requests capacity workers]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import db
+from app.models import User, Course, Enrollment
+
+from benchmarks.common import BenchConfig, Student, bench_app
+
+
+def seed(requests, capacity):
+    db.session.execute(db.insert(User), [
+        {"email": f"student{i:05d}@bench.test", "password_hash": "x", "role": User.ROLE_STUDENT}
+        for i in range(requests)
+    ])
+    course = Course(code="HOT101", title="Hot course", credits=3, max_students=capacity)
+    db.session.add(course)
+    db.session.commit()
+    return course.id, [i for i, in db.session.query(User.id)]
+
+
+def main(requests, capacity, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        class BurstConfig(BenchConfig):
+            SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tmp, "burst.db")
+            SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 30}}
+
+        with bench_app(BurstConfig) as app:
+            course_id, students = seed(requests, capacity)
+
+            def enroll(user_id):
+                client = app.test_client(user=Student(user_id))
+                return client.post(f"/courses/{course_id}/enroll").status_code
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                statuses = list(pool.map(enroll, students))
+            elapsed = time.perf_counter() - start
+
+            enrolled = Enrollment.query.filter_by(course_id=course_id).count()
+            print(f"{requests} enroll requests, {workers} threads, capacity {capacity}")
+            print(f"  {requests / elapsed:8.1f} req/s   {elapsed:6.2f}s   enrolled {enrolled}"
+                  f"   non-302 {sum(status != 302 for status in statuses)}")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    main(*(args if len(args) == 3 else (2000, 150, 32)))
@@ -0,0 +1,90 @@
+"""Course-wide notification fan-out against course size.
+
+Compares one ORM Notification object per enrolled student with the
+INSERT ... SELECT in app.notifications.fan_out, and times the professor's
+"new announcement" POST (which only queues the fan-out) against the time
+until the notifications are actually committed.
+
+Runs on a temporary SQLite file so the background pool uses real
+connections of its own.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from app.config import db
+from app.models import User, Course, Enrollment, Notification
+from app.notifications import fan_out
+
+from benchmarks.common import BenchConfig, bench_app, timed, report
+
+
+def seed(students):
+    professor = User(email="prof@bench.test", password_hash="x", role=User.ROLE_PROFESSOR)
+    db.session.add(professor)
+    db.session.flush()
+    course = Course(code="BENCH1", title="Benchmark course", credits=3,
+                    professor_id=professor.id, max_students=None, seats_taken=students)
+    db.session.add(course)
+    db.session.flush()
+    db.session.execute(db.insert(User), [
+        {"email": f"student{i:06d}@bench.test", "password_hash": "x", "role": User.ROLE_STUDENT}
+        for i in range(students)
+    ])
+    db.session.execute(
+        db.insert(Enrollment).from_select(
+            ["user_id", "course_id"],
+            db.select(User.id, db.literal(course.id)).where(User.role == User.ROLE_STUDENT),
+        )
+    )
+    db.session.commit()
+    return professor.id, course.id
+
+
+def per_row(course_id):
+    enrollments = Enrollment.query.filter_by(course_id=course_id).all()
+    for enrollment in enrollments:
+        db.session.add(Notification(user_id=enrollment.user_id, message="per row"))
+    db.session.commit()
+    return len(enrollments)
+
+
+def set_based(course_id):
+    count = len(fan_out(course_id, "set based"))
+    db.session.commit()
+    return count
+
+
+def main(sizes):
+    with tempfile.TemporaryDirectory() as tmp:
+        class FanoutConfig(BenchConfig):
+            SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tmp, "bench.db")
+            NOTIFICATION_WORKERS = 1  # so a queued no-op waits for the fan-out
+
+        for students in sizes:
+            with bench_app(FanoutConfig) as app:
+                professor_id, course_id = seed(students)
+                print(f"course with {students} students")
+
+                orm, n = timed(lambda: per_row(course_id), repeat=3)
+                report("ORM object per student", orm, f"{n} rows")
+                bulk, n = timed(lambda: set_based(course_id), repeat=3)
+                report("INSERT ... SELECT", bulk, f"({orm / bulk:.1f}x)")
+
+                client = app.test_client(user=db.session.get(User, professor_id))
+                executor = app.extensions["notification_executor"]
+                start = time.perf_counter()
+                resp = client.post(f"/announcements/new/{course_id}", data={
+                    "course_id": course_id, "title": "Bench", "content": "c"})
+                posted = time.perf_counter() - start
+                executor.submit(lambda: None).result()
+                delivered = time.perf_counter() - start
+                assert resp.status_code == 302
+                report("announcement POST (returns)", posted)
+                report("announcement POST (all delivered)", delivered)
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.bench_fanout [students ...]
+    main([int(arg) for arg in sys.argv[1:]] or [50, 500, 5000])
@@ -0,0 +1,103 @@
+"""Instructor gradebook at realistic course sizes.
+
+Compares the old submissions-tab path (every StudentAssignment loaded as an
+ORM object into a dict keyed by (assignment_id, user_id), then a lookup per
+student x assignment) with the NumPy Gradebook, and times the full
+submissions tab render.
+"""
+import random
+import sys
+
+from app.config import db
+from app.gradebook import Gradebook
+from app.models import User, Course, Enrollment, Assignment, StudentAssignment
+
+from benchmarks.common import bench_app, timed, report
+
+
+def seed(students, assignments, fill=0.85, seed=131):
+    rng = random.Random(seed)
+    professor = User(email="prof@bench.test", password_hash="x", role=User.ROLE_PROFESSOR)
+    db.session.add(professor)
+    db.session.flush()
+    course = Course(code="BENCH1", title="Benchmark course", credits=3,
+                    professor_id=professor.id, max_students=students, seats_taken=students)
+    db.session.add(course)
+    db.session.flush()
+
+    db.session.execute(db.insert(User), [
+        {"email": f"student{i:05d}@bench.test", "password_hash": "x", "role": User.ROLE_STUDENT}
+        for i in range(students)
+    ])
+    student_ids = [i for i, in db.session.query(User.id).filter_by(role=User.ROLE_STUDENT)]
+    db.session.execute(db.insert(Enrollment), [
+        {"user_id": uid, "course_id": course.id} for uid in student_ids
+    ])
+    db.session.execute(db.insert(Assignment), [
+        {"course_id": course.id, "title": f"HW{j}", "description": "d", "max_points": 100}
+        for j in range(assignments)
+    ])
+    assignment_ids = [i for i, in db.session.query(Assignment.id)]
+    rows = []
+    for uid in student_ids:
+        for aid in assignment_ids:
+            if rng.random() < fill:
+                done = rng.random() < 0.8
+                rows.append({
+                    "user_id": uid, "assignment_id": aid,
+                    "status": "Completed" if done else "In Progress",
+                    "score": rng.randint(40, 100) if done else None,
+                })
+    db.session.execute(db.insert(StudentAssignment), rows)
+    db.session.commit()
+    return professor, course
+
+
+def legacy_grid(course):
+    submissions = {}
+    for sub in StudentAssignment.query.join(Assignment).filter(Assignment.course_id == course.id).all():
+        submissions[(sub.assignment_id, sub.user_id)] = sub
+    students = course.get_enrolled_students()
+    cells = 0
+    for assignment in Assignment.query.filter_by(course_id=course.id).all():
+        for student in students:
+            sub = submissions.get((assignment.id, student.id))
+            cells += 1 if sub is not None and sub.score is not None else 0
+    db.session.expunge_all()
+    return cells
+
+
+def gradebook_grid(course_id):
+    book = Gradebook.for_course(course_id)
+    book.student_totals(), book.assignment_means(), book.completion_rates()
+    cells = sum(1 for column in book.columns() for cell in column.cells if cell.score is not None)
+    return cells
+
+
+def main(sizes):
+    for students, assignments in sizes:
+        with bench_app() as app:
+            professor, course = seed(students, assignments)
+            course_id, professor_id = course.id, professor.id
+            print(f"{students} students x {assignments} assignments")
+
+            legacy, legacy_cells = timed(lambda: legacy_grid(course), repeat=3)
+            course = db.session.get(Course, course_id)
+            matrix, matrix_cells = timed(lambda: gradebook_grid(course_id), repeat=3)
+            assert legacy_cells == matrix_cells
+            report("ORM dict + per-cell lookups", legacy)
+            report("NumPy gradebook + stats + columns", matrix, f"({legacy / matrix:.1f}x)")
+
+            client = app.test_client(user=db.session.get(User, professor_id))
+            url = f"/courses/{course_id}/dashboard/submissions"
+            render, resp = timed(lambda: client.get(url), repeat=3)
+            assert resp.status_code == 200
+            report("submissions tab request", render, f"{len(resp.data) // 1024} KiB")
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.bench_gradebook [students assignments]
+    if len(sys.argv) == 3:
+        main([(int(sys.argv[1]), int(sys.argv[2]))])
+    else:
+        main([(40, 10), (400, 60)])
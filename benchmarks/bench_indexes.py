@@ -0,0 +1,144 @@
+"""Query plans and latencies of the hot lookups without and with the
+secondary indexes added by schema migration 3.
+
+Seeds a large synthetic database, drops the indexes to recreate the old
+schema, records EXPLAIN QUERY PLAN and the median latency of each query,
+then applies migration 3 itself (only that step, so later migrations
+don't change what is measured) and measures again.
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+
+from app.config import db
+from app.migrations import MIGRATIONS
+from app.models import (User, Course, Enrollment, Assignment, StudentAssignment,
+                        Announcement, Notification)
+from app.pagination import Keyset
+
+from benchmarks.common import bench_app, timed, report
+
+INDEX_VERSION = 3
+HOT_INDEXES = (
+    "ix_notifications_user_unread",
+    "ix_announcements_course_created",
+    "ix_assignments_course_due",
+    "ix_enrollments_course_user",
+    "ix_student_assignments_assignment_user",
+)
+
+
+def seed(students, courses, per_student=5, assignments=20, seed=131):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    db.session.execute(db.insert(User), [
+        {"email": f"user{i:06d}@bench.test", "password_hash": "x", "role": User.ROLE_STUDENT}
+        for i in range(students)
+    ])
+    student_ids = [i for i, in db.session.query(User.id)]
+    db.session.execute(db.insert(Course), [
+        {"code": f"C{i:05d}", "title": f"Course {i}", "credits": 3, "max_students": None}
+        for i in range(courses)
+    ])
+    course_ids = [i for i, in db.session.query(Course.id)]
+
+    enrollments = [
+        {"user_id": uid, "course_id": cid}
+        for uid in student_ids for cid in rng.sample(course_ids, per_student)
+    ]
+    db.session.execute(db.insert(Enrollment), enrollments)
+    db.session.execute(db.insert(Assignment), [
+        {"course_id": cid, "title": f"HW{j}", "description": "d", "max_points": 100,
+         "due_date": start + timedelta(days=rng.randint(0, 120))}
+        for cid in course_ids for j in range(assignments)
+    ])
+    by_course = {}
+    for aid, cid in db.session.query(Assignment.id, Assignment.course_id):
+        by_course.setdefault(cid, []).append(aid)
+
+    db.session.execute(db.insert(StudentAssignment), [
+        {"user_id": row["user_id"], "assignment_id": aid, "status": "Completed",
+         "score": rng.randint(40, 100)}
+        for row in enrollments for aid in by_course[row["course_id"]]
+        if rng.random() < 0.7
+    ])
+    db.session.execute(db.insert(Announcement), [
+        {"course_id": cid, "title": "a", "content": "c",
+         "created_at": start + timedelta(hours=rng.randint(0, 3000))}
+        for cid in course_ids for _ in range(30)
+    ])
+    db.session.execute(db.insert(Notification), [
+        {"user_id": uid, "message": "m", "is_read": rng.random() < 0.8,
+         "created_at": start + timedelta(hours=rng.randint(0, 3000))}
+        for uid in student_ids for _ in range(20)
+    ])
+    db.session.commit()
+    return student_ids, course_ids, by_course
+
+
+def hot_queries(student_id, course_id, assignment_id):
+    announcements = Keyset(Announcement.created_at, Announcement.id, descending=True)
+    return {
+        "unread notifications": (Notification.query
+            .filter_by(user_id=student_id, is_read=False)
+            .order_by(Notification.created_at.desc())
+            .limit(5)),
+        "announcements page": announcements.window(
+            Announcement.query.filter_by(course_id=course_id), 20),
+        "assignments by due date": (Assignment.query
+            .filter_by(course_id=course_id)
+            .order_by(Assignment.due_date)),
+        "course roster": (User.query
+            .join(Enrollment, Enrollment.user_id == User.id)
+            .filter(Enrollment.course_id == course_id)),
+        "assignment submissions": StudentAssignment.query.filter_by(assignment_id=assignment_id),
+    }
+
+
+def query_plan(query):
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.session.connection().exec_driver_sql(
+        "EXPLAIN QUERY PLAN " + str(compiled), params
+    )
+    return [row[-1] for row in rows]
+
+
+def measure(queries, label):
+    print(label)
+    for name, query in queries.items():
+        seconds, _ = timed(lambda: query.all(), repeat=15)
+        report(name, seconds)
+        for step in query_plan(query):
+            print(f"      {step}")
+
+
+def main(students, courses):
+    with bench_app():
+        student_ids, course_ids, by_course = seed(students, courses)
+        rows = {name: db.session.query(table).count() for name, table in (
+            ("enrollments", Enrollment), ("student_assignments", StudentAssignment),
+            ("notifications", Notification), ("announcements", Announcement))}
+        print(f"{students} students, {courses} courses: {rows}")
+
+        # the indexes as they were before migration 3
+        for name in HOT_INDEXES:
+            db.session.execute(db.text(f"DROP INDEX {name}"))
+        db.session.commit()
+
+        course_id = course_ids[len(course_ids) // 2]
+        queries = lambda: hot_queries(student_ids[-1], course_id, by_course[course_id][0])
+        measure(queries(), "without indexes")
+
+        step = next(m for m in MIGRATIONS if m.version == INDEX_VERSION)
+        step.apply(db.session.connection())
+        db.session.commit()
+        measure(queries(), "after migration 3")
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.bench_indexes [students courses]
+    if len(sys.argv) == 3:
+        main(int(sys.argv[1]), int(sys.argv[2]))
+    else:
+        main(5000, 300)
@@ -0,0 +1,135 @@
+"""A login storm: many students signing in at once, as at the start of an exam.
+
+Login threads post /auth/login back to back while reader threads keep
+loading the catalog as an already logged-in student. Each profile runs
+against a fresh SQLite file whose users were hashed under that profile's
+policy, so no rehashing is mixed in:
+  - the default policy with a pool as large as the storm, which is how
+    logins behaved before the hashing pool (every login hashes at once);
+  - the default policy with the pool bounded to the CPU count;
+  - the same bounded pool with a cheaper exam-time policy.
+Reported: logins/s, login p50/p95, logins shed with a 503, and the p95
+of the catalog page during the storm.
+
+    python -m benchmarks.bench_login_storm [login_threads readers seconds]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from werkzeug.security import generate_password_hash
+
+from app.config import SQLiteConfig, db
+from app.models import User, Course
+
+from benchmarks.common import BenchConfig, bench_app
+
+PASSWORD = "exam-day-password"
+EXAM_POLICY = "scrypt:16384:8:1"
+STUDENTS = 2000
+
+
+def seed(students, method):
+    # the login form's email validator rejects reserved domains like .test
+    password_hash = generate_password_hash(PASSWORD, method)
+    db.session.execute(db.insert(User), [
+        {"email": f"student{i:05d}@bench.example.edu", "password_hash": password_hash,
+         "role": User.ROLE_STUDENT}
+        for i in range(students)
+    ])
+    db.session.execute(db.insert(Course), [
+        {"code": f"EXAM{i}", "title": f"Exam course {i}", "credits": 3, "max_students": None}
+        for i in range(20)
+    ])
+    db.session.commit()
+
+
+def p95(samples):
+    return statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else 0.0
+
+
+def storm(app, logins, readers, seconds):
+    stop = time.perf_counter() + seconds
+    lock = threading.Lock()
+    login_latencies, page_latencies, shed, failed = [], [], [0], [0]
+    next_student = iter(range(10 ** 9))
+
+    def login():
+        while time.perf_counter() < stop:
+            with lock:
+                i = next(next_student)
+            start = time.perf_counter()
+            status = app.test_client().post("/auth/login", data={
+                "email": f"student{i % STUDENTS:05d}@bench.example.edu", "password": PASSWORD,
+            }).status_code
+            with lock:
+                if status == 302:
+                    login_latencies.append(time.perf_counter() - start)
+                elif status == 503:
+                    shed[0] += 1
+                else:
+                    failed[0] += 1
+
+    def read(client):
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            ok = client.get("/courses/").status_code == 200
+            with lock:
+                if ok:
+                    page_latencies.append(time.perf_counter() - start)
+                else:
+                    failed[0] += 1
+
+    reader = db.session.get(User, 1)
+    threads = [threading.Thread(target=login) for _ in range(logins)]
+    threads += [threading.Thread(target=read, args=(app.test_client(user=reader),))
+                for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    median = statistics.median(login_latencies) if login_latencies else 0.0
+    print(f"  logins/s {len(login_latencies) / seconds:7.1f}   login p50 {median * 1000:7.1f} ms"
+          f"   p95 {p95(login_latencies) * 1000:7.1f} ms   shed {shed[0]:4d}"
+          f"   page p95 {p95(page_latencies) * 1000:7.1f} ms   errors {failed[0]}")
+
+
+def profiles(tmp, logins):
+    cpus = os.cpu_count() or 1
+
+    def profile(name, method, workers):
+        class Profile(SQLiteConfig, BenchConfig):
+            SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tmp, f"{name}.db")
+            PASSWORD_HASH_METHOD = method
+            PASSWORD_HASH_WORKERS = workers
+            PASSWORD_HASH_QUEUE = 4 * cpus
+            PASSWORD_HASH_WAIT = 2
+        return Profile
+
+    default = BenchConfig.PASSWORD_HASH_METHOD
+    return [
+        (f"{default}, {logins} workers (unbounded)", profile("unbounded", default, logins)),
+        (f"{default}, {cpus} workers", profile("bounded", default, cpus)),
+        (f"{EXAM_POLICY}, {cpus} workers", profile("exam", EXAM_POLICY, cpus)),
+    ]
+
+
+def main(logins, readers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, config in profiles(tmp, logins):
+            with bench_app(config) as app:
+                seed(STUDENTS, config.PASSWORD_HASH_METHOD)
+                print(f"{label}: {logins} login threads, {readers} readers, {seconds}s")
+                storm(app, logins, readers, seconds)
+                app.extensions["password_hasher"].shutdown()
+                db.session.remove()
+                db.engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    main(*(args if len(args) == 3 else (32, 2, 10)))
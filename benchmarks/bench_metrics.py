@@ -0,0 +1,85 @@
+"""Overhead of the per-endpoint request metrics (app/metrics.py).
+
+First the recording path on its own (started + finished), single-threaded
+and from several threads at once. Then the three request hooks metrics
+registers, called in a request context the way Flask calls them: that is
+everything metrics adds to a request. (Comparing whole requests with
+METRICS_ENABLED on and off drowns it in run-to-run noise.) The target is
+under 50 us per request.
+
+    python -m benchmarks.bench_metrics [calls]
+"""
+import gc
+import sys
+import threading
+import time
+
+from app.config import Config
+from app.metrics import RequestMetrics
+
+from benchmarks.common import bench_app
+
+ENDPOINTS = ("courses.courses_list", "courses.course_dashboard", "main.dashboard", "api.courses")
+
+
+def record_path(calls, threads=1):
+    metrics = RequestMetrics(Config.METRICS_BUCKETS)
+
+    def work():
+        for i in range(calls):
+            endpoint = ENDPOINTS[i & 3]
+            start = time.perf_counter()
+            metrics.started(endpoint)
+            metrics.finished(endpoint, time.perf_counter() - start)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    assert sum(sum(s.buckets) for s in metrics.snapshot().values()) == calls * threads
+    return elapsed / (calls * threads)
+
+
+def hooks_path(calls):
+    with bench_app() as app:
+        def registered(funcs):
+            return [fn for fn in funcs[None] if fn.__module__ == "app.metrics"]
+
+        before = registered(app.before_request_funcs)
+        after = registered(app.after_request_funcs)
+        teardown = registered(app.teardown_request_funcs)
+        response = app.response_class("")
+        with app.test_request_context("/courses/"):
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                for _ in range(calls):
+                    for fn in before:
+                        fn()
+                    for fn in after:
+                        fn(response)
+                    for fn in teardown:
+                        fn(None)
+                return (time.perf_counter() - start) / calls
+            finally:
+                gc.enable()
+
+
+def report_us(label, seconds, extra=""):
+    print(f"  {label:<44} {seconds * 1e6:9.2f} us  {extra}")
+
+
+def main(calls):
+    print("recording path")
+    report_us("1 thread", record_path(calls))
+    report_us("8 threads", record_path(calls // 8, threads=8), "(wall time / request)")
+
+    print("request hooks")
+    report_us("before + after + teardown", hooks_path(calls), "(target < 50 us)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
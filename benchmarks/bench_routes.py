@@ -0,0 +1,204 @@
+"""Latency and SQL statement counts of every page route, against budgets.
+
+Seeds a synthetic dataset with app.scripts.generate_data, then drives each
+route through the test client as the user who would normally load it: a
+student with a full schedule, the professor of that student's largest
+course and the admin. Each route is requested once to warm the caches and
+then sampled; enroll/drop run as pairs so the seat is back afterwards.
+
+Baselines live in route_baselines.json, keyed by preset. A route is over
+budget when it sends more statements than its baseline, or when its
+median is above the baseline median times the file's latency_tolerance.
+The p95 is reported but not gated on: from a few dozen samples it is one
+or two outliers (a GC pause, the machine doing something else) and too
+noisy to fail on. Over-budget routes are listed and the exit status is 1.
+
+    python -m benchmarks.bench_routes                   # check against baselines
+    python -m benchmarks.bench_routes --update          # record new baselines
+    python -m benchmarks.bench_routes --preset demo --samples 10
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import namedtuple
+
+from app.config import db
+from app.models import User, Course, Enrollment, Assignment
+from app.scripts.generate_data import PRESETS, Generator
+
+from benchmarks.common import QueryCounter, bench_app
+
+BASELINES = os.path.join(os.path.dirname(__file__), "route_baselines.json")
+LATENCY_TOLERANCE = 2.0
+
+Route = namedtuple("Route", "name client method url expect")
+Result = namedtuple("Result", "name p50_ms p95_ms statements")
+
+DASHBOARD_TABS = ("assignments", "grades", "people", "announcements")
+
+
+def pick_users():
+    """(student, professor, admin, course, open course) to drive the routes with."""
+    course = (Course.query.filter(Course.professor_id.isnot(None))
+              .order_by(Course.seats_taken.desc(), Course.id).first())
+    student = (User.query.join(Enrollment).filter(Enrollment.course_id == course.id)
+               .order_by(User.id).first())
+    admin = User.query.filter_by(role=User.ROLE_ADMIN).order_by(User.id).first()
+    taken = db.session.query(Enrollment.course_id).filter_by(user_id=student.id)
+    open_course = (Course.query.filter(Course.id.notin_(taken), Course.availability.is_(True))
+                   .filter(db.or_(Course.max_students.is_(None),
+                                  Course.seats_taken < Course.max_students - 1))
+                   .order_by(Course.id).first())
+    return student, db.session.get(User, course.professor_id), admin, course, open_course
+
+
+def routes(app):
+    student, professor, admin, course, open_course = pick_users()
+    assignment_id = (db.session.query(Assignment.id).filter_by(course_id=course.id)
+                     .order_by(Assignment.id).limit(1).scalar())
+    as_student = app.test_client(user=student)
+    as_professor = app.test_client(user=professor)
+    as_admin = app.test_client(user=admin)
+
+    found = [
+        Route("courses_list", as_student, "GET", "/courses/", 200),
+        Route("dashboard", as_student, "GET", "/dashboard", 200),
+        Route("gpa_calculator", as_student, "GET", "/gpa", 200),
+        Route("assignments.index", as_student, "GET", "/assignments/", 200),
+        Route("assignments.index (admin)", as_admin, "GET", "/assignments/", 200),
+    ]
+    found += [
+        Route(f"course_dashboard/{tab}", as_student, "GET",
+              f"/courses/{course.id}/dashboard/{tab}", 200)
+        for tab in DASHBOARD_TABS
+    ]
+    found += [
+        Route("course_dashboard/submissions", as_professor, "GET",
+              f"/courses/{course.id}/dashboard/submissions", 200),
+        Route("assignment_submissions", as_professor, "GET",
+              f"/assignments/{assignment_id}/submissions", 200),
+        Route("toggle_assignment_status", as_student, "POST",
+              f"/courses/{course.id}/assignment/{assignment_id}/toggle-status", 302),
+        Route("enroll_course", as_student, "POST", f"/courses/{open_course.id}/enroll", 302),
+        Route("drop_course", as_student, "POST", f"/courses/{open_course.id}/drop", 302),
+    ]
+    return found
+
+
+def sample(route, counter):
+    start = time.perf_counter()
+    with counter:
+        response = route.client.open(route.url, method=route.method)
+    elapsed = time.perf_counter() - start
+    if response.status_code != route.expect:
+        raise AssertionError(f"{route.name}: {route.method} {route.url} -> {response.status_code}")
+    return elapsed, counter.count
+
+
+def measure(app, samples):
+    counter = QueryCounter(db.engine)
+    found = routes(app)
+    timings = {route.name: [] for route in found}
+    statements = dict.fromkeys(timings, 0)
+
+    # enroll and drop run back to back, so every enroll finds the seat free
+    steps = [[route] for route in found if route.name not in ("enroll_course", "drop_course")]
+    steps.append([route for route in found if route.name in ("enroll_course", "drop_course")])
+
+    for step in steps:
+        for route in step:
+            sample(route, counter)  # warm-up, not counted
+        for _ in range(samples):
+            for route in step:
+                elapsed, count = sample(route, counter)
+                timings[route.name].append(elapsed)
+                statements[route.name] = max(statements[route.name], count)
+
+    return [
+        Result(route.name,
+               round(statistics.median(timings[route.name]) * 1000, 2),
+               round(statistics.quantiles(timings[route.name], n=20)[-1] * 1000, 2),
+               statements[route.name])
+        for route in found
+    ]
+
+
+def over_budget(results, baselines, tolerance):
+    """Returns (route name, reason) for each result above its baseline."""
+    failures = []
+    for result in results:
+        budget = baselines.get(result.name)
+        if budget is None:
+            failures.append((result.name, "no baseline (run with --update)"))
+            continue
+        if result.statements > budget["statements"]:
+            failures.append((result.name,
+                             f"{result.statements} statements, budget {budget['statements']}"))
+        if result.p50_ms > budget["p50_ms"] * tolerance:
+            failures.append((result.name, f"median {result.p50_ms:.1f} ms, budget "
+                                          f"{budget['p50_ms'] * tolerance:.1f} ms"))
+    return failures
+
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {"latency_tolerance": LATENCY_TOLERANCE, "presets": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(path, baselines, preset, results):
+    baselines["presets"][preset] = {
+        result.name: {"p50_ms": result.p50_ms, "p95_ms": result.p95_ms,
+                      "statements": result.statements}
+        for result in results
+    }
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def _arguments():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=PRESETS, default="medium")
+    parser.add_argument("--samples", type=int, default=30, help="per route, at least 10")
+    parser.add_argument("--seed", type=int, default=131)
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--update", action="store_true", help="record these results as the baselines")
+    return parser.parse_args()
+
+
+def main():
+    args = _arguments()
+    if args.samples < 10:
+        print("--samples must be at least 10 for a stable median")
+        return 2
+    baselines = load_baselines(args.baselines)
+    with bench_app() as app:
+        start = time.perf_counter()
+        counts = Generator(PRESETS[args.preset], seed=args.seed).run()
+        print(f"{args.preset}: {sum(counts.values()):,} rows seeded in "
+              f"{time.perf_counter() - start:.1f}s, {args.samples} samples per route")
+        results = measure(app, args.samples)
+
+    print(f"  {'route':<32} {'p50 ms':>9} {'p95 ms':>9} {'statements':>11}")
+    for result in results:
+        print(f"  {result.name:<32} {result.p50_ms:9.2f} {result.p95_ms:9.2f} {result.statements:11d}")
+
+    if args.update:
+        save_baselines(args.baselines, baselines, args.preset, results)
+        print(f"baselines for {args.preset} written to {args.baselines}")
+        return 0
+
+    failures = over_budget(results, baselines["presets"].get(args.preset, {}),
+                           baselines["latency_tolerance"])
+    for name, reason in failures:
+        print(f"OVER BUDGET  {name}: {reason}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Cold-start time of the app and of the test fixture.
+
+Each sample is a fresh interpreter, so module imports are included. The
+run.py path is timed on a fresh database (create_all and migrations) and
+on an existing one (schema version matches, schema work skipped); the
+test fixture path is create_app(TestConfig) plus its create_all on an
+in-memory database. The median of each startup phase is reported too.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+RUN_PY = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+from app.config import Config
+
+class StartupConfig(Config):
+    SQLALCHEMY_DATABASE_URI = sys.argv[1]
+
+app = create_app(StartupConfig)
+timings = dict(app.extensions["startup_timings"], total=time.perf_counter() - start)
+print(json.dumps(timings))
+"""
+
+FIXTURE = """
+import json, sys, time
+sys.path.insert(0, "tests")
+start = time.perf_counter()
+from conftest import TestConfig
+from app import create_app
+from app.config import db
+
+app = create_app(TestConfig)
+with app.app_context():
+    db.create_all()
+timings = dict(app.extensions["startup_timings"], total=time.perf_counter() - start)
+print(json.dumps(timings))
+"""
+
+
+def sample(code, *args):
+    out = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", code, *args],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def summarize(label, samples):
+    phases = {name: statistics.median(s[name] for s in samples) for name in samples[0]}
+    total = phases.pop("total")
+    detail = ", ".join(f"{name} {seconds * 1000:.1f}" for name, seconds in phases.items())
+    print(f"  {label:<34} {total * 1000:8.1f} ms   ({detail})")
+
+
+def main(repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh = [sample(RUN_PY, f"sqlite:///{tmp}/fresh{i}.db") for i in range(repeat)]
+        existing_uri = f"sqlite:///{tmp}/existing.db"
+        sample(RUN_PY, existing_uri)
+        existing = [sample(RUN_PY, existing_uri) for _ in range(repeat)]
+    fixture = [sample(FIXTURE) for _ in range(repeat)]
+
+    print(f"cold start, median of {repeat} (phases in ms)")
+    summarize("run.py, fresh database", fresh)
+    summarize("run.py, existing database", existing)
+    summarize("test fixture (in-memory)", fixture)
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.bench_startup [repeat]
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 7)
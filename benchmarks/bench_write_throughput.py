@@ -0,0 +1,127 @@
+"""Write throughput under concurrency, per database profile.
+
+Writer threads toggle assignment status (a StudentAssignment write plus
+the course_grades update) while reader threads load the course dashboard.
+Each profile runs against a fresh SQLite file; the server profile runs only
+when BENCH_SERVER_URI points at a scratch server database.
+
+    python -m benchmarks.bench_write_throughput [writers readers seconds]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from app.config import SQLiteConfig, ServerConfig, db
+from app.grades import rebuild_course_grades
+from app.models import User, Course, CourseGrade, Enrollment, Assignment
+
+from benchmarks.common import BenchConfig, bench_app
+
+
+def seed(students, assignments=10):
+    course = Course(code="BENCH1", title="Benchmark course", credits=3,
+                    max_students=None, seats_taken=students)
+    db.session.add(course)
+    db.session.flush()
+    db.session.execute(db.insert(User), [
+        {"email": f"student{i:04d}@bench.test", "password_hash": "x", "role": User.ROLE_STUDENT}
+        for i in range(students)
+    ])
+    student_ids = [i for i, in db.session.query(User.id)]
+    db.session.execute(db.insert(Enrollment), [
+        {"user_id": uid, "course_id": course.id} for uid in student_ids
+    ])
+    db.session.execute(db.insert(Assignment), [
+        {"course_id": course.id, "title": f"HW{j}", "description": "d", "max_points": 10}
+        for j in range(assignments)
+    ])
+    assignment_ids = [i for i, in db.session.query(Assignment.id)]
+    # the bulk inserts skip the grade hooks; without the rows the toggles
+    # would have no course_grades to keep up to date
+    rebuild_course_grades()
+    db.session.commit()
+    assert db.session.query(CourseGrade).count() == students
+    return course.id, student_ids, assignment_ids
+
+
+def run(app, course_id, student_ids, assignment_ids, writers, readers, seconds):
+    stop = time.perf_counter() + seconds
+    write_latencies, reads, errors = [], [0], [0]
+    lock = threading.Lock()
+
+    def writer(client):
+        i = 0
+        while time.perf_counter() < stop:
+            url = f"/courses/{course_id}/assignment/{assignment_ids[i % len(assignment_ids)]}/toggle-status"
+            start = time.perf_counter()
+            try:
+                ok = client.post(url).status_code == 302
+            except Exception:
+                ok = False
+            with lock:
+                if ok:
+                    write_latencies.append(time.perf_counter() - start)
+                else:
+                    errors[0] += 1
+            i += 1
+
+    def reader(client):
+        while time.perf_counter() < stop:
+            try:
+                ok = client.get(f"/courses/{course_id}/dashboard/grades").status_code == 200
+            except Exception:
+                ok = False
+            with lock:
+                if ok:
+                    reads[0] += 1
+                else:
+                    errors[0] += 1
+
+    clients = [app.test_client(user=db.session.get(User, uid)) for uid in student_ids]
+    threads = [threading.Thread(target=writer, args=(c,)) for c in clients[:writers]]
+    threads += [threading.Thread(target=reader, args=(c,)) for c in clients[writers:writers + readers]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    p95 = statistics.quantiles(write_latencies, n=20)[-1] if len(write_latencies) > 1 else 0
+    print(f"  writes/s {len(write_latencies) / seconds:8.1f}   reads/s {reads[0] / seconds:8.1f}"
+          f"   write p95 {p95 * 1000:7.1f} ms   errors {errors[0]}")
+
+
+def profiles(tmp):
+    def file_uri(name):
+        return "sqlite:///" + os.path.join(tmp, name)
+
+    class DefaultProfile(BenchConfig):
+        SQLALCHEMY_DATABASE_URI = file_uri("default.db")
+
+    class SQLiteProfile(SQLiteConfig, BenchConfig):
+        SQLALCHEMY_DATABASE_URI = file_uri("wal.db")
+
+    found = [("default (rollback journal)", DefaultProfile), ("sqlite (WAL)", SQLiteProfile)]
+    if os.environ.get("BENCH_SERVER_URI"):
+        class ServerProfile(ServerConfig, BenchConfig):
+            SQLALCHEMY_DATABASE_URI = os.environ["BENCH_SERVER_URI"]
+        found.append(("server (pooled)", ServerProfile))
+    return found
+
+
+def main(writers, readers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, config in profiles(tmp):
+            with bench_app(config) as app:
+                course_id, student_ids, assignment_ids = seed(writers + readers)
+                print(f"{label}: {writers} writers, {readers} readers, {seconds}s")
+                run(app, course_id, student_ids, assignment_ids, writers, readers, seconds)
+                db.session.remove()
+                db.engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    main(*(args if len(args) == 3 else (8, 8, 5)))
@@ -0,0 +1,91 @@
+"""Shared helpers for the benchmark scripts in this folder, also used by
+the tests (tests/conftest.py imports the client, the counter and Student).
+
+Run a benchmark from the project root, e.g.
+    python -m benchmarks.bench_gradebook
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+from flask_login import FlaskLoginClient
+from sqlalchemy import event
+
+from app import create_app
+from app.config import Config, db
+
+
+class BenchConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    # in-memory unless BENCH_DATABASE_URI points somewhere else
+    SQLALCHEMY_DATABASE_URI = os.environ.get("BENCH_DATABASE_URI", "sqlite://")
+
+
+class LoginClient(FlaskLoginClient):
+    """app.test_client(user=...) logs the user in for its requests."""
+
+    def open(self, *args, **kwargs):
+        # each request gets its own app context (g, db session), like in production
+        with self.application.app_context():
+            return super().open(*args, **kwargs)
+
+
+class QueryCounter:
+    """Counts SQL statements sent to the engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+class Student:
+    """Just enough of a user for test_client(user=...) to log in."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+
+    def get_id(self):
+        return str(self.user_id)
+
+
+@contextmanager
+def bench_app(config_class=BenchConfig):
+    app = create_app(config_class)
+    app.test_client_class = LoginClient
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def timed(fn, repeat=5):
+    """Runs fn repeat times; returns (median seconds, last result)."""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def report(label, seconds, extra=""):
+    print(f"  {label:<44} {seconds * 1000:9.2f} ms  {extra}")
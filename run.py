@@ -1,5 +1,11 @@
+import logging
+
 from app import create_app
+from app.config import config_for
 
 if __name__ == '__main__':
-    app = create_app()
+    # shows the startup phase timings logged by create_app
+    logging.basicConfig(level=logging.INFO)
+    # LMS_CONFIG=sqlite|server picks a profile from app/config.py
+    app = create_app(config_for())
     app.run(debug=True)
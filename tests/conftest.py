@@ -0,0 +1,68 @@
+import os
+import sys
+import pytest
+
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+from app import create_app
+from app.config import Config, db
+from app.models import User, Course
+from benchmarks.common import LoginClient, QueryCounter, Student
+
+
+class TestConfig(Config):
+    """In-memory database so tests never touch app/app.db"""
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    # fan-out runs inline so tests see the notifications right away
+    NOTIFICATION_ASYNC = False
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    app.test_client_class = LoginClient
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def query_counter(app):
+    return QueryCounter(db.engine)
+
+
+# ---------- factories ----------
+
+def make_user(email, role=User.ROLE_STUDENT):
+    # skip set_password: hashing is slow and tests log in through the client
+    user = User(email=email, role=role, password_hash="x")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def make_course(code, professor=None, **fields):
+    data = {
+        "code": code,
+        "title": f"Course {code}",
+        "credits": 3,
+        "professor": "Prof",
+        "availability": True,
+        "max_students": 30,
+    }
+    data.update(fields)
+    course = Course(**data)
+    if professor is not None:
+        course.professor_id = professor.id
+    db.session.add(course)
+    db.session.commit()
+    return course
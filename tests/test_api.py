@@ -0,0 +1,91 @@
+"""The JSON API serves column rows without templates."""
+from datetime import datetime
+
+from flask import template_rendered
+
+from app.config import db
+from app.models import User, Assignment
+
+from conftest import make_user, make_course
+
+
+def _seed():
+    professor = make_user("p@test.com", role=User.ROLE_PROFESSOR)
+    student = make_user("s@test.com")
+    course = make_course("CMPE131", professor=professor)
+    make_course("PHYS51")
+    course.reserve_seat(student.id)
+    hw1 = Assignment(course_id=course.id, title="HW1", description="d", max_points=10)
+    hw2 = Assignment(course_id=course.id, title="HW2", description="d", max_points=20)
+    db.session.add_all([hw1, hw2])
+    db.session.commit()
+    return professor, student, course, hw1
+
+
+def test_catalog_pages_with_enrollment_flag(app):
+    professor, student, course, _ = _seed()
+    app.config["PER_PAGE"] = 1
+    client = app.test_client(user=student)
+
+    rendered = []
+    template_rendered.connect(lambda sender, template, context: rendered.append(template), app)
+    first = client.get("/api/v1/courses").get_json()
+    assert rendered == []
+    assert [c["code"] for c in first["items"]] == ["CMPE131"]
+    assert first["items"][0]["is_enrolled"] is True
+    assert first["items"][0]["enrolled_count"] == 1
+
+    second = client.get(f"/api/v1/courses?after={first['next']}").get_json()
+    assert [c["code"] for c in second["items"]] == ["PHYS51"]
+    assert second["items"][0]["is_enrolled"] is False and second["next"] is None
+
+    assert client.get("/api/v1/courses?after=garbage").get_json()["status"] == 400
+
+
+def test_my_courses_and_assignment_status(app):
+    professor, student, course, hw1 = _seed()
+    client = app.test_client(user=student)
+    client.post(f"/courses/{course.id}/assignment/{hw1.id}/toggle-status")
+    client.post(f"/courses/{course.id}/assignment/{hw1.id}/toggle-status")   # completed
+
+    mine = client.get("/api/v1/me/courses").get_json()["items"]
+    assert [(c["code"], c["points_earned"], c["points_possible"]) for c in mine] == [("CMPE131", 10, 30)]
+    assert "T" in mine[0]["enrolled_at"]
+
+    rows = client.get(f"/api/v1/courses/{course.id}/assignments").get_json()["items"]
+    assert [(r["title"], r["status"], r["score"]) for r in rows] == [
+        ("HW1", "Completed", 10), ("HW2", "Not Started", None)]
+
+
+def test_dates_are_converted_whatever_the_first_row_holds(app):
+    professor, student, course, _ = _seed()
+    reading = Assignment(course_id=course.id, title="Reading", description="d", max_points=0)
+    db.session.add(reading)
+    db.session.flush()
+    reading.due_date = None     # the column default fills in a None given at insert
+    db.session.commit()
+
+    rows = app.test_client(user=student).get(f"/api/v1/courses/{course.id}/assignments").get_json()["items"]
+    assert [r["title"] for r in rows] == ["Reading", "HW1", "HW2"]
+    assert rows[0]["due_date"] is None
+    assert all(datetime.fromisoformat(r["due_date"]) for r in rows[1:])
+
+
+def test_gradebook_for_owner_only(app):
+    professor, student, course, hw1 = _seed()
+    app.test_client(user=student).post(f"/courses/{course.id}/assignment/{hw1.id}/toggle-status")
+
+    book = app.test_client(user=professor).get(f"/api/v1/courses/{course.id}/gradebook").get_json()
+    assert book["points_possible"] == 30
+    assert [a["title"] for a in book["assignments"]] == ["HW1", "HW2"]
+    assert book["students"][0]["email"] == "s@test.com"
+    assert book["students"][0]["statuses"] == ["In Progress", "Not Started"]
+
+    resp = app.test_client(user=student).get(f"/api/v1/courses/{course.id}/gradebook")
+    assert resp.status_code == 403 and resp.get_json()["error"] == "Forbidden"
+
+
+def test_login_required_answers_401(app):
+    resp = app.test_client().get("/api/v1/me/courses")
+    assert resp.status_code == 401 and resp.is_json
+    assert app.test_client().get("/courses/my-courses").status_code == 302
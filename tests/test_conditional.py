@@ -0,0 +1,129 @@
+"""Course and assignment pages answer 304 while their rows are unchanged."""
+import warnings
+
+from flask import template_rendered
+from sqlalchemy.exc import SAWarning
+
+from app.config import db
+from app.models import User, Assignment, Announcement
+
+from conftest import make_user, make_course
+
+
+def _revalidate(client, url):
+    first = client.get(url)
+    assert first.status_code == 200 and first.headers["ETag"].startswith('W/"')
+    return first.headers["ETag"]
+
+
+def _get(client, url, etag):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def test_unchanged_course_detail_is_not_rendered(app):
+    student = make_user("s@test.com")
+    course = make_course("CMPE131")
+    client = app.test_client(user=student)
+    url = f"/courses/{course.id}"
+    etag = _revalidate(client, url)
+
+    rendered = []
+    template_rendered.connect(lambda sender, template, context: rendered.append(template), app)
+    resp = _get(client, url, etag)
+    assert resp.status_code == 304 and resp.data == b""
+    assert resp.headers["ETag"] == etag and "private" in resp.headers["Cache-Control"]
+    assert rendered == []
+
+    course.reserve_seat(student.id)
+    assert _get(client, url, etag).status_code == 200
+
+
+def test_etag_depends_on_the_viewer(app):
+    course = make_course("CMPE131")
+    url = f"/courses/{course.id}"
+    etag = _revalidate(app.test_client(user=make_user("a@test.com")), url)
+    assert _get(app.test_client(user=make_user("b@test.com")), url, etag).status_code == 200
+    assert _get(app.test_client(), url, etag).status_code == 200
+
+
+def test_dashboard_tabs_follow_their_rows(app):
+    professor = make_user("p@test.com", role=User.ROLE_PROFESSOR)
+    student = make_user("s@test.com")
+    course = make_course("CMPE131", professor=professor)
+    course.reserve_seat(student.id)
+    hw = Assignment(course_id=course.id, title="HW1", description="d", max_points=10)
+    db.session.add(hw)
+    db.session.commit()
+    client = app.test_client(user=student)
+
+    for tab in ("assignments", "grades", "announcements"):
+        url = f"/courses/{course.id}/dashboard/{tab}"
+        assert _get(client, url, _revalidate(client, url)).status_code == 304
+
+    url = f"/courses/{course.id}/dashboard/grades"
+    etag = _revalidate(client, url)
+    client.post(f"/courses/{course.id}/assignment/{hw.id}/toggle-status")
+    assert _get(client, url, etag).status_code == 200   # also shows the toggle's flash
+    etag = _revalidate(client, url)
+    assert _get(client, url, etag).status_code == 304
+
+    db.session.add(Announcement(course_id=course.id, title="Hi", content="c"))
+    db.session.commit()
+    assert _get(client, url, etag).status_code == 200
+
+
+def test_owner_sees_other_students_progress_change(app):
+    professor = make_user("p@test.com", role=User.ROLE_PROFESSOR)
+    student = make_user("s@test.com")
+    course = make_course("CMPE131", professor=professor)
+    course.reserve_seat(student.id)
+    hw = Assignment(course_id=course.id, title="HW1", description="d", max_points=10)
+    db.session.add(hw)
+    db.session.commit()
+    owner = app.test_client(user=professor)
+    url = f"/courses/{course.id}/dashboard/submissions"
+    etag = _revalidate(owner, url)
+
+    app.test_client(user=student).post(f"/courses/{course.id}/assignment/{hw.id}/toggle-status")
+    assert _get(owner, url, etag).status_code == 200
+
+
+def test_assignment_detail_follows_edits(app):
+    student = make_user("s@test.com")
+    course = make_course("CMPE131")
+    hw = Assignment(course_id=course.id, title="HW1", description="d", max_points=10)
+    db.session.add(hw)
+    db.session.commit()
+    client = app.test_client(user=student)
+    url = f"/assignments/{hw.id}"
+    etag = _revalidate(client, url)
+    assert _get(client, url, etag).status_code == 304
+
+    hw.max_points = 20
+    db.session.commit()
+    resp = _get(client, url, etag)
+    assert resp.status_code == 200 and resp.last_modified is not None
+
+
+def test_pending_flash_is_never_cached(app):
+    student = make_user("s@test.com")
+    course = make_course("CMPE131")
+    client = app.test_client(user=student)
+    client.post(f"/courses/{course.id}/enroll")
+
+    resp = client.get(f"/courses/{course.id}")
+    assert "ETag" not in resp.headers
+    assert "You enrolled in" in resp.get_data(as_text=True)
+
+
+def test_row_versions_come_from_one_query_without_a_cartesian_product(app, query_counter):
+    course = make_course("CMPE131")
+    db.session.add(Assignment(course_id=course.id, title="HW", description="d", max_points=10))
+    db.session.commit()
+    db.session.refresh(course)
+
+    with warnings.catch_warnings(), query_counter:
+        warnings.simplefilter("error", SAWarning)
+        versions = course.get_row_versions()
+    assert query_counter.count == 1
+    assert versions[0] == 1 and versions[2] == 0 and versions[4] == 0
@@ -0,0 +1,38 @@
+"""Config profiles and the per-connection SQLite settings."""
+import pytest
+
+from app import create_app
+from app.config import Config, SQLiteConfig, ServerConfig, config_for, db
+
+from conftest import TestConfig
+
+
+def test_config_for_profiles(monkeypatch):
+    assert config_for("sqlite") is SQLiteConfig
+    monkeypatch.setenv("LMS_CONFIG", "server")
+    assert config_for() is ServerConfig
+    monkeypatch.delenv("LMS_CONFIG")
+    assert config_for() is Config
+    with pytest.raises(ValueError):
+        config_for("oracle")
+
+
+def test_server_profile_pools_connections():
+    options = ServerConfig.SQLALCHEMY_ENGINE_OPTIONS
+    assert options["pool_pre_ping"] is True
+    assert {"pool_size", "max_overflow", "pool_recycle"} <= set(options)
+
+
+def test_sqlite_profile_sets_pragmas_on_every_connection(tmp_path):
+    class WalConfig(SQLiteConfig, TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'wal.db'}"
+
+    app = create_app(WalConfig)
+    with app.app_context():
+        for _ in range(2):
+            with db.engine.connect() as conn:
+                pragma = lambda name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                assert pragma("journal_mode") == "wal"
+                assert pragma("synchronous") == 1  # NORMAL
+                assert pragma("busy_timeout") == 5000
+            db.engine.dispose()  # next round opens a fresh connection
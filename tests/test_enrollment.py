@@ -0,0 +1,101 @@
+"""Seat reservation: counters stay exact and courses never overbook."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask_login import FlaskLoginClient
+
+from app import create_app
+from app.config import db
+from app.models import User, Course, Enrollment
+
+from conftest import TestConfig, Student, make_user, make_course
+
+
+def test_enroll_and_drop_maintain_seats_taken(app):
+    student = make_user("s@test.com")
+    course = make_course("CMPE131", max_students=2)
+    client = app.test_client(user=student)
+
+    client.post(f"/courses/{course.id}/enroll")
+    client.post(f"/courses/{course.id}/enroll")  # duplicate is rejected
+    db.session.expire_all()
+    assert course.seats_taken == 1
+    assert Enrollment.query.filter_by(course_id=course.id).count() == 1
+
+    client.post(f"/courses/{course.id}/drop")
+    db.session.expire_all()
+    assert course.seats_taken == 0
+    assert Enrollment.query.count() == 0
+
+
+def test_reserve_seat_respects_availability_and_capacity(app):
+    students = [make_user(f"s{i}@test.com") for i in range(3)]
+    closed = make_course("CLOSED", availability=False)
+    small = make_course("SMALL", max_students=2)
+
+    assert closed.reserve_seat(students[0].id) == Course.RESERVE_UNAVAILABLE
+    assert small.reserve_seat(students[0].id) == Course.RESERVE_OK
+    assert small.reserve_seat(students[0].id) == Course.RESERVE_DUPLICATE
+    assert small.reserve_seat(students[1].id) == Course.RESERVE_OK
+    assert small.reserve_seat(students[2].id) == Course.RESERVE_UNAVAILABLE
+    assert small.seats_taken == 2
+
+
+def test_recount_seats_repairs_counter(app):
+    student = make_user("s@test.com")
+    course = make_course("CMPE131")
+    db.session.add(Enrollment(user_id=student.id, course_id=course.id))
+    db.session.commit()
+    assert course.seats_taken == 0
+
+    Course.recount_seats()
+    db.session.commit()
+    db.session.expire_all()
+    assert course.seats_taken == 1
+
+
+# ---------- stress test (file database, real concurrent writers) ----------
+
+REQUESTS = 2000
+CAPACITY = 150
+WORKERS = 32
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    class StressConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'stress.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"timeout": 30}}
+
+    app = create_app(StressConfig)
+    app.test_client_class = FlaskLoginClient
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_parallel_enrollment_burst_never_overbooks(file_app):
+    with file_app.app_context():
+        db.session.execute(
+            db.insert(User),
+            [{"email": f"s{i}@test.com", "password_hash": "x", "role": User.ROLE_STUDENT}
+             for i in range(REQUESTS)],
+        )
+        course = make_course("HOT101", max_students=CAPACITY)
+        course_id = course.id
+        students = [u for u, in db.session.query(User.id).all()]
+
+    def enroll(user_id):
+        client = file_app.test_client(user=Student(user_id))
+        return client.post(f"/courses/{course_id}/enroll").status_code
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        statuses = list(pool.map(enroll, students))
+
+    assert all(status == 302 for status in statuses)
+    with file_app.app_context():
+        course = db.session.get(Course, course_id)
+        enrolled = Enrollment.query.filter_by(course_id=course_id).count()
+        assert course.seats_taken == CAPACITY
+        assert enrolled == CAPACITY
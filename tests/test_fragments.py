@@ -0,0 +1,70 @@
+"""Shared course markup is rendered once per course version."""
+from app.cache import LRUCache
+from app.config import db
+from app.fragments import fragment_cache
+from app.models import User
+
+from conftest import make_user, make_course
+
+
+def test_lru_cache_evicts_to_stay_under_maxbytes():
+    cache = LRUCache(maxsize=10, maxbytes=10)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    cache.set("c", "xxxx")          # 12 bytes: evicts a
+    assert cache.get("a") is None and cache.nbytes == 8
+
+    cache.set("b", "x")             # replacing an entry re-counts it
+    assert cache.nbytes == 5
+    cache.set("big", "x" * 11)      # larger than the whole cache: not kept
+    assert cache.get("big") is None and len(cache) == 2
+
+
+def test_catalog_cards_render_once_and_keep_per_user_badges(app):
+    enrolled, other = make_user("a@test.com"), make_user("b@test.com")
+    course = make_course("CMPE131")
+    course.reserve_seat(enrolled.id)
+    cache = fragment_cache()
+    cache.clear()
+
+    first = app.test_client(user=enrolled).get("/courses/").get_data(as_text=True)
+    second = app.test_client(user=other).get("/courses/").get_data(as_text=True)
+
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert "Course CMPE131" in first and "Course CMPE131" in second
+    assert 'bg-primary">Enrolled' in first
+    assert 'bg-primary">Enrolled' not in second
+
+
+def test_enrollment_changes_the_version(app):
+    students = [make_user(f"s{i}@test.com") for i in range(2)]
+    course = make_course("CMPE131", max_students=10)
+    client = app.test_client(user=students[0])
+
+    assert "Enrolled Students:</strong> 0" in client.get(f"/courses/{course.id}").get_data(as_text=True)
+    course.reserve_seat(students[1].id)
+    page = client.get(f"/courses/{course.id}").get_data(as_text=True)
+    assert "Enrolled Students:</strong> 1" in page
+    assert "Available Spots:</strong> 9" in page
+
+    students[1].drop_course(course)
+    db.session.commit()
+    assert "Enrolled Students:</strong> 0" in client.get(f"/courses/{course.id}").get_data(as_text=True)
+
+
+def test_update_course_changes_the_version(app):
+    professor = make_user("p@test.com", role=User.ROLE_PROFESSOR)
+    course = make_course("CMPE131", professor=professor)
+    client = app.test_client(user=professor)
+    assert "Course CMPE131" in client.get("/courses/").get_data(as_text=True)
+    version = course.version
+
+    resp = client.post(f"/courses/{course.id}/update", data={
+        "code": "CMPE131", "title": "Software Engineering", "description": "d",
+        "credits": 3, "professor": "Prof", "availability": "y", "format": "online",
+        "max_students": 30,
+    })
+    assert resp.status_code == 302
+    db.session.refresh(course)
+    assert course.version == version + 1
+    assert "Software Engineering" in client.get("/courses/").get_data(as_text=True)
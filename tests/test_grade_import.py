@@ -0,0 +1,135 @@
+"""Bulk grading validates every row and upserts the good ones."""
+import io
+
+import pytest
+
+from app.config import db
+from app.grade_import import import_grades, read_batch, read_csv, ImportFormatError
+from app.models import User, Assignment, CourseGrade, StudentAssignment
+
+from conftest import make_user, make_course
+
+
+def _seed(students=3):
+    professor = make_user("p@test.com", role=User.ROLE_PROFESSOR)
+    course = make_course("CMPE131", professor=professor)
+    roster = [make_user(f"s{i}@test.com") for i in range(students)]
+    for student in roster:
+        course.reserve_seat(student.id)
+    hw = Assignment(course_id=course.id, title="HW1", description="d", max_points=10)
+    db.session.add(hw)
+    db.session.commit()
+    return professor, course, roster, hw
+
+
+def _csv(text):
+    return io.BytesIO(text.encode())
+
+
+def test_csv_rows_are_validated_and_upserted(app):
+    professor, course, roster, hw = _seed()
+    db.session.add(StudentAssignment(user_id=roster[0].id, assignment_id=hw.id,
+                                     status=StudentAssignment.STATUS_IN_PROGRESS))
+    db.session.commit()
+    outsider = make_user("x@test.com")
+
+    result = import_grades(hw, read_csv(_csv(
+        "Student,Score\n"
+        "s0@test.com,7\n"
+        f"{roster[1].id},10\n"
+        "S0@test.com,5\n"            # duplicate (emails are case-insensitive)
+        "x@test.com,5\n"             # not enrolled
+        "s2@test.com,11\n"           # over max_points
+        "s2@test.com,abc\n"
+        "\n"
+    )), chunk_size=1)
+    db.session.commit()
+
+    assert result.applied == 2
+    assert [(e.row, e.error) for e in result.errors] == [
+        (4, "student appears more than once"),
+        (5, "student is not enrolled in this course"),
+        (6, "score must be between 0 and 10"),
+        (7, "score must be a whole number"),
+    ]
+    rows = {sa.user_id: sa for sa in StudentAssignment.query.filter_by(assignment_id=hw.id)}
+    assert rows[roster[0].id].score == 7
+    assert rows[roster[0].id].status == StudentAssignment.STATUS_IN_PROGRESS   # kept
+    assert rows[roster[1].id].status == StudentAssignment.STATUS_COMPLETED
+    assert outsider.id not in rows and roster[2].id not in rows
+
+    grade = CourseGrade.query.filter_by(user_id=roster[1].id, course_id=course.id).one()
+    assert (grade.points_earned, grade.points_possible) == (10, 10)
+
+
+def test_dialects_without_upsert_update_then_insert(app, monkeypatch):
+    from app import grade_import
+
+    monkeypatch.setattr(grade_import, "_upsert_statement", lambda dialect: None)
+    professor, course, roster, hw = _seed()
+    db.session.add(StudentAssignment(user_id=roster[0].id, assignment_id=hw.id,
+                                     status=StudentAssignment.STATUS_IN_PROGRESS, score=1))
+    db.session.commit()
+
+    result = import_grades(hw, read_csv(_csv(
+        "student,score\ns0@test.com,7\ns1@test.com,9\ns2@test.com,4\n"
+    )), chunk_size=2)
+    db.session.commit()
+
+    assert result.applied == 3 and result.errors == []
+    rows = {sa.user_id: (sa.status, sa.score) for sa in StudentAssignment.query.filter_by(assignment_id=hw.id)}
+    assert rows == {
+        roster[0].id: (StudentAssignment.STATUS_IN_PROGRESS, 7),
+        roster[1].id: (StudentAssignment.STATUS_COMPLETED, 9),
+        roster[2].id: (StudentAssignment.STATUS_COMPLETED, 4),
+    }
+
+
+def test_bad_header_is_rejected(app):
+    professor, course, roster, hw = _seed()
+    with pytest.raises(ImportFormatError):
+        import_grades(hw, read_csv(_csv("email,points\ns0@test.com,1\n")))
+
+
+def test_json_batch_through_the_api(app):
+    professor, course, roster, hw = _seed()
+    client = app.test_client(user=professor)
+    resp = client.post(f"/api/v1/assignments/{hw.id}/grades", json={"grades": [
+        {"student": "s0@test.com", "score": 9},
+        {"student": roster[1].id, "score": 8.0},
+        {"student": "s2@test.com"},
+        "nonsense",
+    ]})
+    body = resp.get_json()
+    assert resp.status_code == 200 and body["applied"] == 2
+    assert [(e["row"], e["error"]) for e in body["errors"]] == [
+        (3, "score is required"), (4, "student is not enrolled in this course")]
+
+    # re-sending a corrected batch updates in place
+    resp = client.post(f"/api/v1/assignments/{hw.id}/grades", data="student,score\ns0@test.com,4\n",
+                       content_type="text/csv")
+    assert resp.get_json()["applied"] == 1
+    assert StudentAssignment.query.filter_by(assignment_id=hw.id).count() == 2
+    assert StudentAssignment.query.filter_by(user_id=roster[0].id).one().score == 4
+
+    assert app.test_client(user=roster[0]).post(
+        f"/api/v1/assignments/{hw.id}/grades", json={"grades": []}).status_code == 403
+    assert client.post(f"/api/v1/assignments/{hw.id}/grades", json=[]).status_code == 400
+
+
+def test_csv_upload_form(app):
+    professor, course, roster, hw = _seed(students=1)
+    client = app.test_client(user=professor)
+    resp = client.post(f"/assignments/{hw.id}/grades/import", data={
+        "file": (_csv("student,score\ns0@test.com,6\nnobody@test.com,1\n"), "grades.csv"),
+    }, content_type="multipart/form-data")
+    page = resp.get_data(as_text=True)
+    assert resp.status_code == 200
+    assert "Imported 1 grades, skipped 1 rows." in page and "nobody@test.com" in page
+    assert StudentAssignment.query.filter_by(user_id=roster[0].id).one().score == 6
+
+
+def test_read_batch_rejects_other_shapes():
+    for payload in ([], {"grades": "x"}, None):
+        with pytest.raises(ImportFormatError):
+            list(read_batch(payload))
@@ -0,0 +1,66 @@
+"""Gradebook matrix: placement of scores, masks and vectorized statistics."""
+import numpy as np
+
+from app.config import db
+from app.gradebook import Gradebook, COMPLETED, NOT_STARTED
+from app.models import User, Assignment, StudentAssignment
+
+from conftest import make_user, make_course
+
+
+def _seed():
+    professor = make_user("p@test.com", role=User.ROLE_PROFESSOR)
+    course = make_course("CMPE131", professor=professor)
+    alice, bob, carol = (make_user(f"{n}@test.com") for n in ("alice", "bob", "carol"))
+    for student in (alice, bob, carol):
+        course.reserve_seat(student.id)
+    hw1 = Assignment(course_id=course.id, title="HW1", description="d", max_points=10)
+    hw2 = Assignment(course_id=course.id, title="HW2", description="d", max_points=30)
+    db.session.add_all([hw1, hw2])
+    db.session.commit()
+    db.session.add_all([
+        StudentAssignment(user_id=alice.id, assignment_id=hw1.id, status="Completed", score=8),
+        StudentAssignment(user_id=bob.id, assignment_id=hw1.id, status="Completed", score=6),
+        StudentAssignment(user_id=bob.id, assignment_id=hw2.id, status="In Progress"),
+        StudentAssignment(user_id=carol.id, assignment_id=hw2.id, status="Completed", score=30),
+    ])
+    db.session.commit()
+    return professor, course
+
+
+def test_gradebook_matrix_and_statistics(app):
+    _, course = _seed()
+    book = Gradebook.for_course(course.id)
+
+    assert [s.email for s in book.students] == ["alice@test.com", "bob@test.com", "carol@test.com"]
+    assert book.scores.shape == (3, 2)
+    assert book.submitted.tolist() == [[True, False], [True, True], [False, True]]
+    assert book.status[0, 1] == NOT_STARTED and book.status[2, 1] == COMPLETED
+
+    assert book.student_totals().tolist() == [8, 6, 30]
+    assert book.assignment_means().tolist() == [7.0, 30.0]
+    assert np.allclose(book.completion_rates(), [2 / 3, 1 / 3])
+    assert [t.percentage for t in book.totals()] == [20.0, 15.0, 75.0]
+
+    hw2 = list(book.columns())[1]
+    assert [(c.status, c.score) for c in hw2.cells] == [
+        ("Not Started", None), ("In Progress", None), ("Completed", 30)]
+
+
+def test_gradebook_skips_dropped_students(app):
+    _, course = _seed()
+    carol = User.query.filter_by(email="carol@test.com").first()
+    carol.drop_course(course)
+    db.session.commit()
+
+    book = Gradebook.for_course(course.id)
+    assert len(book.students) == 2
+    assert book.assignment_means()[1] != book.assignment_means()[1]  # NaN, nothing graded
+
+
+def test_submissions_tab_renders_from_gradebook(app):
+    professor, course = _seed()
+    resp = app.test_client(user=professor).get(f"/courses/{course.id}/dashboard/submissions")
+    assert resp.status_code == 200
+    assert b"Avg: 7.0" in resp.data
+    assert b"67% completed" in resp.data
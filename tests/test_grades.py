@@ -0,0 +1,157 @@
+"""course_grades stays in step with scores, assignments and enrollments."""
+import random
+
+from app.config import db
+from app.grades import rebuild_course_grades, letter_grade
+from app.models import User, Assignment, Enrollment, StudentAssignment, CourseGrade
+
+from conftest import make_user, make_course
+
+
+def _grade(user, course):
+    db.session.expire_all()
+    return CourseGrade.query.filter_by(user_id=user.id, course_id=course.id).first()
+
+
+def _snapshot():
+    db.session.expire_all()
+    return sorted(
+        (g.user_id, g.course_id, g.points_earned, g.points_possible, round(g.percentage, 6), g.letter)
+        for g in CourseGrade.query.all()
+    )
+
+
+def _add_assignment(course, max_points=100):
+    assignment = Assignment(course_id=course.id, title="HW", description="d", max_points=max_points)
+    db.session.add(assignment)
+    db.session.commit()
+    return assignment
+
+
+def test_letter_grade_cutoffs():
+    assert [letter_grade(p) for p in (95, 90, 85, 72, 60, 59.9)] == ["A", "A", "B", "C", "D", "F"]
+
+
+def test_toggle_and_grading_update_course_grade(app):
+    student = make_user("s@test.com")
+    professor = make_user("p@test.com", role=User.ROLE_PROFESSOR)
+    course = make_course("CMPE131", professor=professor)
+    course.reserve_seat(student.id)
+    hw1 = _add_assignment(course, 40)
+    _add_assignment(course, 60)
+    assert (_grade(student, course).points_earned, _grade(student, course).points_possible) == (0, 100)
+
+    client = app.test_client(user=student)
+    toggle = f"/courses/{course.id}/assignment/{hw1.id}/toggle-status"
+    client.post(toggle)  # in progress
+    client.post(toggle)  # completed -> full marks
+    grade = _grade(student, course)
+    assert (grade.points_earned, grade.percentage, grade.letter) == (40, 40.0, "F")
+
+    prof_client = app.test_client(user=professor)
+    prof_client.post(f"/assignments/{hw1.id}/grade/{student.id}", data={"score": 30})
+    assert _grade(student, course).points_earned == 30
+
+    client.post(toggle)  # reset clears the score
+    assert _grade(student, course).points_earned == 0
+
+
+def test_assignment_changes_move_points_possible(app):
+    student = make_user("s@test.com")
+    professor = make_user("p@test.com", role=User.ROLE_PROFESSOR)
+    course = make_course("CMPE131", professor=professor)
+    course.reserve_seat(student.id)
+    hw = _add_assignment(course, 50)
+    db.session.add(StudentAssignment(user_id=student.id, assignment_id=hw.id,
+                                     status=StudentAssignment.STATUS_COMPLETED, score=45))
+    db.session.commit()
+    grade = _grade(student, course)
+    assert (grade.points_earned, grade.points_possible, grade.letter) == (45, 50, "A")
+
+    client = app.test_client(user=professor)
+    client.post(f"/assignments/{hw.id}/update", data={
+        "course_id": course.id, "title": "Homework", "description": "d", "max_points": 100,
+    })
+    grade = _grade(student, course)
+    assert (grade.points_possible, grade.percentage, grade.letter) == (100, 45.0, "F")
+
+    client.post(f"/assignments/{hw.id}/delete")
+    grade = _grade(student, course)
+    assert (grade.points_earned, grade.points_possible) == (0, 0)
+
+
+def test_dashboard_reads_the_grade_without_writing(app, query_counter):
+    student = make_user("s@test.com")
+    course = make_course("CMPE131")
+    course.reserve_seat(student.id)
+    CourseGrade.query.filter_by(user_id=student.id).delete()
+    db.session.commit()
+
+    client = app.test_client(user=student)
+    with query_counter:
+        response = client.get(f"/courses/{course.id}")
+    assert response.status_code == 200
+    writes = [s for s in query_counter.statements if s.lstrip().upper().startswith(("INSERT", "UPDATE"))]
+    assert writes == []
+    assert _grade(student, course) is None
+
+
+def test_rows_built_through_relationships_are_counted(app):
+    student = make_user("s@test.com")
+    course = make_course("CMPE131")
+    _add_assignment(course, 20)
+
+    # no foreign key set anywhere: they are only known once the flush runs
+    enrollment = Enrollment(user=student, course=course)
+    assignment = Assignment(course=course, title="Project", description="d", max_points=30)
+    progress = StudentAssignment(user=student, assignment=assignment, score=25)
+    db.session.add_all([enrollment, assignment, progress])
+    db.session.commit()
+
+    grade = _grade(student, course)
+    assert (grade.points_earned, grade.points_possible) == (25, 50)
+    incremental = _snapshot()
+    rebuild_course_grades()
+    db.session.commit()
+    assert incremental == _snapshot()
+
+
+def test_drop_removes_course_grade(app):
+    student = make_user("s@test.com")
+    course = make_course("CMPE131")
+    course.reserve_seat(student.id)
+    assert _grade(student, course) is not None
+
+    app.test_client(user=student).post(f"/courses/{course.id}/drop")
+    assert _grade(student, course) is None
+
+
+def test_incremental_updates_match_full_rebuild(app):
+    rng = random.Random(7)
+    students = [make_user(f"s{i}@test.com") for i in range(6)]
+    courses = [make_course(f"C{i}") for i in range(3)]
+    for student in students:
+        for course in rng.sample(courses, 2):
+            course.reserve_seat(student.id)
+    assignments = [_add_assignment(rng.choice(courses), rng.randint(10, 100)) for _ in range(8)]
+
+    for _ in range(60):
+        assignment = rng.choice(assignments)
+        student = rng.choice(students)
+        progress = StudentAssignment.query.filter_by(
+            user_id=student.id, assignment_id=assignment.id).first()
+        if progress is None:
+            progress = StudentAssignment(user_id=student.id, assignment_id=assignment.id)
+            db.session.add(progress)
+        if rng.random() < 0.2:
+            assignment.max_points = rng.randint(10, 100)
+        elif rng.random() < 0.3:
+            progress.mark_not_started()
+        else:
+            progress.score = rng.randint(0, assignment.max_points)
+        db.session.commit()
+
+    incremental = _snapshot()
+    rebuild_course_grades()
+    db.session.commit()
+    assert incremental == _snapshot()
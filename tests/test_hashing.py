@@ -0,0 +1,83 @@
+"""Password hash policy, rehash at login and the bounded hashing pool."""
+import threading
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import hashing
+from app.config import db
+from app.hashing import HashingBusy, HashingPool
+from app.models import User
+
+# cheap costs so the tests don't spend their time hashing
+CHEAP_SCRYPT = "scrypt:1024:8:1"
+CHEAP_PBKDF2 = "pbkdf2:sha256:1000"
+
+
+def _user_with(method, password="secret pw"):
+    user = User(email="s@test.com", role=User.ROLE_STUDENT,
+                password_hash=generate_password_hash(password, method))
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _login(app, password="secret pw"):
+    return app.test_client().post("/auth/login", data={"email": "s@test.com", "password": password})
+
+
+def test_needs_rehash_compares_method_and_cost():
+    stored = generate_password_hash("pw", CHEAP_SCRYPT)
+    assert not hashing.needs_rehash(stored, CHEAP_SCRYPT)
+    assert hashing.needs_rehash(stored, "scrypt:2048:8:1")
+    assert hashing.needs_rehash(stored, CHEAP_PBKDF2)
+    # Werkzeug's defaults are filled in before comparing
+    assert not hashing.needs_rehash(generate_password_hash("pw", "scrypt"), "scrypt:32768:8:1")
+
+
+@pytest.mark.parametrize("old, policy", [(CHEAP_PBKDF2, CHEAP_SCRYPT), (CHEAP_SCRYPT, CHEAP_PBKDF2)])
+def test_login_moves_the_hash_to_the_current_policy(app, old, policy):
+    app.config["PASSWORD_HASH_METHOD"] = policy
+    user = _user_with(old)
+
+    assert _login(app, "wrong").status_code == 302
+    db.session.refresh(user)
+    assert user.password_hash.startswith(old + "$")
+
+    assert _login(app).status_code == 302
+    db.session.refresh(user)
+    upgraded = user.password_hash
+    assert upgraded.startswith(policy + "$") and user.check_password("secret pw")
+
+    _login(app)
+    db.session.refresh(user)
+    assert user.password_hash == upgraded
+
+
+def test_full_pool_rejects_after_waiting():
+    pool = HashingPool(workers=1, queue_size=0, wait=0.05)
+    release = threading.Event()
+    busy = threading.Thread(target=pool.run, args=(release.wait,))
+    busy.start()
+    try:
+        with pytest.raises(HashingBusy):
+            pool.run(lambda: None)
+    finally:
+        release.set()
+        busy.join()
+    assert pool.rejected == 1
+    assert pool.run(lambda: 42) == 42     # the slot is free again
+    pool.shutdown()
+
+
+def test_login_answers_503_when_hashing_is_saturated(app, monkeypatch):
+    app.config["PASSWORD_HASH_METHOD"] = CHEAP_SCRYPT
+    _user_with(CHEAP_SCRYPT)
+
+    def saturated(*args):
+        raise HashingBusy()
+
+    monkeypatch.setattr(app.extensions["password_hasher"], "run", saturated)
+    response = _login(app)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
@@ -0,0 +1,87 @@
+"""The user loader serves identities from a cache and drops stale ones."""
+from app.cache import LRUCache
+from app.config import db
+from app.identity import CachedUser, load_user, user_cache
+from app.models import User
+
+from conftest import make_user, make_course
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_cache_evicts_oldest_and_expires():
+    clock = FakeClock()
+    cache = LRUCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")          # a is now the most recent
+    cache.set("c", 3)       # evicts b
+    assert cache.get("b") is None and cache.get("a") == 1
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_loader_hits_cache_after_first_request(app, query_counter):
+    student = make_user("s@test.com")
+    user_cache().clear()
+
+    with query_counter:
+        first = load_user(student.id)
+    with query_counter:
+        second = load_user(student.id)
+
+    assert isinstance(second, CachedUser)
+    assert (second.email, second.role, second.is_student) == ("s@test.com", "student", True)
+    assert query_counter.count == 0
+    assert first is not second  # the cache holds plain values, not shared objects
+
+
+def test_role_and_password_changes_invalidate(app):
+    student = make_user("s@test.com")
+    load_user(student.id)
+
+    student.role = User.ROLE_PROFESSOR
+    db.session.flush()
+    assert user_cache().get(student.id) is not None  # not before commit
+    db.session.commit()
+    assert load_user(student.id).is_professor
+
+    student.set_password("new password")
+    db.session.commit()
+    assert user_cache().get(student.id) is None
+
+
+def test_cached_user_loads_model_for_relationships(app):
+    student = make_user("s@test.com")
+    course = make_course("CMPE131")
+    course.reserve_seat(student.id)
+
+    resp = app.test_client(user=student).get("/courses/my-courses")
+    assert resp.status_code == 200
+    assert b"CMPE131" in resp.data
+    assert [c.id for c in load_user(student.id).get_enrolled_courses()] == [course.id]
+
+
+def test_change_from_another_worker_shows_after_the_ttl(app):
+    admin = make_user("a@test.com", role=User.ROLE_ADMIN)
+    clock = FakeClock()
+    user_cache().clear()
+    user_cache().clock = clock
+    assert load_user(admin.id).is_admin
+
+    # another process revokes the role: no commit hook fires here
+    db.session.execute(db.update(User).where(User.id == admin.id).values(role=User.ROLE_STUDENT))
+    db.session.commit()
+    assert load_user(admin.id).is_admin
+
+    assert app.config["USER_CACHE_TTL"] <= 5
+    clock.now = app.config["USER_CACHE_TTL"] + 0.1
+    assert not load_user(admin.id).is_admin
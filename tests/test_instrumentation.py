@@ -0,0 +1,73 @@
+"""Per-request SQL counts, repeated-shape flags and the debug panel."""
+import json
+import logging
+
+from app.config import db
+from app.instrumentation import statement_shape
+from app.models import User
+
+from conftest import make_user, make_course
+
+
+def test_statement_shape_folds_literals_and_in_lists():
+    assert statement_shape("SELECT * FROM users WHERE id = 7 AND email = 'a@b'") == \
+        "SELECT * FROM users WHERE id = ? AND email = ?"
+    assert statement_shape("SELECT id\n  FROM users_1 WHERE id IN (?, ?, ?)") == \
+        statement_shape("SELECT id FROM users_1 WHERE id IN (?, ?)")
+
+
+def test_headers_match_the_statements_sent(app, query_counter):
+    admin = make_user("a@test.com", role=User.ROLE_ADMIN)
+    make_course("CMPE131")
+    client = app.test_client(user=admin)
+
+    with query_counter:
+        response = client.get("/courses/")
+
+    assert response.headers["X-SQL-Statements"] == str(query_counter.count)
+    assert response.headers["X-SQL-Repeated"] == "0"
+    assert "sql;dur=" in response.headers["Server-Timing"]
+
+
+def test_headers_are_only_sent_to_admins_or_in_debug(app, caplog):
+    student = make_user("s@test.com")
+    make_course("CMPE131")
+    client = app.test_client(user=student)
+
+    with caplog.at_level(logging.DEBUG, logger="app.instrumentation"):
+        response = client.get("/courses/")
+    assert "X-SQL-Statements" not in response.headers and "Server-Timing" not in response.headers
+    assert json.loads(caplog.records[-1].getMessage())["statements"] > 0
+
+    app.debug = True
+    assert "X-SQL-Statements" in client.get("/courses/").headers
+
+
+def test_repeated_shape_is_flagged_and_logged(app, caplog):
+    users = [make_user(f"s{i}@test.com") for i in range(app.config["SQL_REPEAT_THRESHOLD"] + 1)]
+    ids = [user.id for user in users]
+
+    @app.route("/n-plus-one")
+    def n_plus_one():
+        # one SELECT per user, the way a lazy load in a loop would
+        return ",".join(db.session.get(User, i).email for i in ids)
+
+    with caplog.at_level(logging.WARNING, logger="app.instrumentation"):
+        response = app.test_client().get("/n-plus-one")
+
+    assert "X-SQL-Repeated" not in response.headers    # anonymous
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["endpoint"] == "n_plus_one"
+    assert record["repeated"][0]["count"] == len(ids)
+    assert "FROM users" in record["repeated"][0]["sql"]
+
+
+def test_debug_panel_lists_the_shapes(app):
+    student = make_user("s@test.com")
+    make_course("CMPE131")
+    client = app.test_client(user=student)
+
+    assert "SQL:" not in client.get("/courses/").get_data(as_text=True)
+    app.config["SQL_DEBUG_PANEL"] = True
+    page = client.get("/courses/").get_data(as_text=True)
+    assert "statements," in page and "FROM courses" in page
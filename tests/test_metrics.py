@@ -0,0 +1,95 @@
+"""Per-endpoint request metrics and the /admin/metrics exposition."""
+import gc
+import threading
+
+import pytest
+
+from app.metrics import RequestMetrics
+from app.models import User
+
+from conftest import make_user, make_course
+
+
+def _value(text, line_start):
+    for line in text.splitlines():
+        if line.startswith(line_start + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_start} not in metrics")
+
+
+def test_shards_from_every_thread_are_summed():
+    metrics = RequestMetrics((0.1, 1.0))
+
+    def observe(seconds):
+        metrics.started("x")
+        metrics.finished("x", seconds)
+
+    threads = [threading.Thread(target=observe, args=(s,)) for s in (0.05, 0.5, 0.5, 5.0)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.started("x")    # one still running on this thread
+
+    stats = metrics.snapshot()["x"]
+    assert stats.buckets == [1, 2, 1]
+    assert stats.in_flight == 1 and stats.seconds == pytest.approx(6.05)
+
+
+def test_ended_threads_leave_no_shard_behind():
+    metrics = RequestMetrics((0.1, 1.0))
+
+    def observe():
+        metrics.started("x")
+        metrics.finished("x", 0.05, error=True)
+
+    for _ in range(20):
+        threads = [threading.Thread(target=observe) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        gc.collect()
+        assert len(metrics._shards) <= 10
+
+    stats = metrics.snapshot()["x"]
+    assert stats.buckets == [200, 0, 0] and stats.errors == 200 and stats.in_flight == 0
+
+
+def test_metrics_are_admin_only(app):
+    student = make_user("s@test.com")
+    assert app.test_client(user=student).get("/admin/metrics").status_code == 403
+    assert app.test_client().get("/admin/metrics").status_code == 302
+
+
+def test_latency_errors_and_caches_are_exposed(app):
+    admin = make_user("admin@test.com", role=User.ROLE_ADMIN)
+    student = make_user("s@test.com")
+    make_course("CMPE131")
+
+    @app.route("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    client = app.test_client(user=student)
+    client.get("/courses/")
+    client.get("/courses/")
+    client.get("/no-such-page")
+    with pytest.raises(RuntimeError):
+        client.get("/boom")
+
+    response = app.test_client(user=admin).get("/admin/metrics")
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+
+    count = 'lms_request_duration_seconds_count{endpoint="courses.courses_list"}'
+    assert _value(text, count) == 2
+    assert _value(text, 'lms_request_duration_seconds_bucket{endpoint="courses.courses_list",le="+Inf"}') == 2
+    assert _value(text, 'lms_requests_in_flight{endpoint="courses.courses_list"}') == 0
+    assert _value(text, 'lms_request_duration_seconds_count{endpoint="unmatched"}') == 1
+    assert _value(text, 'lms_request_errors_total{endpoint="boom"}') == 1
+    assert _value(text, 'lms_request_errors_total{endpoint="courses.courses_list"}') == 0
+    # the scrape itself is in flight while the page renders
+    assert _value(text, 'lms_requests_in_flight{endpoint="admin.metrics_endpoint"}') == 1
+    assert _value(text, 'lms_cache_hits_total{cache="fragment_cache"}') == 1
+    assert 0 < _value(text, 'lms_cache_hit_ratio{cache="fragment_cache"}') < 1
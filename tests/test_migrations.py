@@ -0,0 +1,85 @@
+"""Schema migrations bring an older database up to the current models."""
+from app.config import db
+from app.migrations import LATEST_VERSION, current_version, upgrade
+from app.models import Course, CourseGrade
+
+from conftest import make_user, make_course
+
+HOT_INDEXES = {
+    "ix_notifications_user_unread",
+    "ix_announcements_course_created",
+    "ix_assignments_course_due",
+    "ix_enrollments_course_user",
+    "ix_student_assignments_assignment_user",
+}
+
+
+def _index_names():
+    rows = db.session.execute(db.text(
+        "SELECT name FROM sqlite_master WHERE type = 'index'"
+    ))
+    return {name for name, in rows}
+
+
+def test_fresh_database_is_stamped_latest(app):
+    assert current_version() == LATEST_VERSION
+    assert HOT_INDEXES <= _index_names()
+    assert upgrade() == []
+
+
+def test_upgrade_from_pre_migration_schema(app):
+    student = make_user("s@test.com")
+    course = make_course("CMPE131")
+    course.reserve_seat(student.id)
+
+    # roll the schema back to before seats_taken, course_grades, indexes, version and updated_at
+    for name in HOT_INDEXES:
+        db.session.execute(db.text(f"DROP INDEX {name}"))
+    db.session.execute(db.text("DROP TABLE course_grades"))
+    db.session.execute(db.text("ALTER TABLE courses DROP COLUMN seats_taken"))
+    db.session.execute(db.text("ALTER TABLE courses DROP COLUMN version"))
+    for table in ("courses", "assignments", "announcements"):
+        db.session.execute(db.text(f"ALTER TABLE {table} DROP COLUMN updated_at"))
+    db.session.execute(db.text("DROP TABLE schema_version"))
+    db.session.commit()
+    assert current_version() == 0
+
+    applied = upgrade()
+    assert [m.version for m in applied] == list(range(1, LATEST_VERSION + 1))
+    assert current_version() == LATEST_VERSION
+    assert HOT_INDEXES <= _index_names()
+
+    db.session.expire_all()
+    assert db.session.get(Course, course.id).seats_taken == 1
+    assert db.session.get(Course, course.id).version == 1
+    assert db.session.get(Course, course.id).updated_at is not None
+    assert CourseGrade.query.filter_by(user_id=student.id, course_id=course.id).count() == 1
+
+
+def test_unread_notifications_use_the_index(app):
+    plan = db.session.execute(db.text(
+        "EXPLAIN QUERY PLAN SELECT * FROM notifications "
+        "WHERE user_id = 1 AND is_read = 0 ORDER BY created_at DESC LIMIT 5"
+    )).all()
+    detail = " ".join(row[-1] for row in plan)
+    assert "ix_notifications_user_unread" in detail
+    assert "TEMP B-TREE" not in detail
+
+
+def test_added_columns_are_typed_for_postgresql(monkeypatch):
+    from types import SimpleNamespace
+
+    from sqlalchemy.dialects import postgresql
+
+    from app import migrations
+
+    sent = []
+    dialect = postgresql.dialect()
+    conn = SimpleNamespace(dialect=dialect,
+                           execute=lambda clause: sent.append(str(clause.compile(dialect=dialect))))
+    monkeypatch.setattr(migrations, "_has_column", lambda conn, table, column: False)
+
+    migrations._add_updated_at(conn)
+    alters = [sql for sql in sent if sql.startswith("ALTER TABLE")]
+    assert alters == [f"ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP WITHOUT TIME ZONE"
+                      for table in ("courses", "assignments", "announcements")]
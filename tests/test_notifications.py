@@ -0,0 +1,107 @@
+"""Notification previews are cached per user until their version moves."""
+import threading
+
+from sqlalchemy import event
+
+from app.config import db
+from app.models import User, Notification
+from app.notifications import bump_versions, notify_course, unread_previews
+
+from conftest import make_user, make_course
+
+
+def _notify(user, message):
+    db.session.add(Notification(user_id=user.id, message=message))
+    db.session.commit()
+
+
+def test_unchanged_user_costs_no_queries(app, query_counter):
+    student = make_user("s@test.com")
+    _notify(student, "HW1 posted")
+
+    assert [p.message for p in unread_previews(student.id)] == ["HW1 posted"]
+    with query_counter:
+        assert len(unread_previews(student.id)) == 1
+    assert query_counter.count == 0
+
+
+def test_insert_and_mark_read_bump_the_version(app):
+    student, other = make_user("s@test.com"), make_user("o@test.com")
+    assert unread_previews(student.id) == ()
+    assert unread_previews(other.id) == ()
+
+    _notify(student, "HW1 posted")
+    assert len(unread_previews(student.id)) == 1
+
+    # the dashboard marks everything read
+    app.test_client(user=student).get("/dashboard")
+    assert unread_previews(student.id) == ()
+
+
+def test_bulk_writes_bump_explicitly(app):
+    student = make_user("s@test.com")
+    assert unread_previews(student.id) == ()
+
+    db.session.execute(db.insert(Notification), [{"user_id": student.id, "message": "bulk"}])
+    db.session.commit()
+    assert unread_previews(student.id) == ()  # Core insert: no ORM event
+
+    bump_versions([student.id])
+    assert [p.message for p in unread_previews(student.id)] == ["bulk"]
+
+
+def test_rendering_pages_reuses_previews(app, query_counter):
+    student = make_user("s@test.com")
+    _notify(student, "HW1 posted")
+    client = app.test_client(user=student)
+    client.get("/")
+
+    with query_counter:
+        client.get("/")
+    assert not any("notifications" in sql for sql in query_counter.statements)
+
+
+def _course_with_students(count):
+    professor = make_user("p@test.com", role=User.ROLE_PROFESSOR)
+    course = make_course("CMPE131", professor=professor, max_students=None)
+    students = [make_user(f"s{i}@test.com") for i in range(count)]
+    for student in students:
+        course.reserve_seat(student.id)
+    return professor, course, students
+
+
+def test_new_announcement_and_assignment_notify_enrolled_students(app):
+    professor, course, students = _course_with_students(3)
+    outsider = make_user("o@test.com")
+    client = app.test_client(user=professor)
+
+    client.post(f"/announcements/new/{course.id}", data={
+        "course_id": course.id, "title": "Exam moved", "content": "Friday"})
+    client.post(f"/assignments/new/{course.id}", data={
+        "course_id": course.id, "title": "HW1", "description": "d", "max_points": 10})
+
+    for student in students:
+        assert [p.message for p in unread_previews(student.id)] == [
+            "New assignment in CMPE131: HW1", "New announcement in CMPE131: Exam moved"]
+    assert unread_previews(outsider.id) == ()
+    assert Notification.query.count() == 6
+
+
+def test_fan_out_runs_on_the_pool(app):
+    _, course, students = _course_with_students(40)
+    app.config["NOTIFICATION_ASYNC"] = True
+    course_id = course.id
+    threads = set()
+
+    def record_thread(*args):
+        threads.add(threading.current_thread().name)
+
+    event.listen(db.engine, "before_cursor_execute", record_thread)
+    try:
+        assert notify_course(course_id, "Lab cancelled").result(timeout=10) == 40
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record_thread)
+
+    assert threads and all(name.startswith("notify") for name in threads)
+    assert Notification.query.filter_by(message="Lab cancelled").count() == 40
+    assert len(unread_previews(students[0].id)) == 1
@@ -0,0 +1,95 @@
+"""Keyset pagination: stable pages in both directions and bad cursors."""
+from datetime import datetime
+
+from app.config import db
+from app.models import Course, Announcement, Assignment
+from app.pagination import Keyset, InvalidCursor
+
+import pytest
+
+from conftest import make_user, make_course
+
+
+def _walk_forward(keyset, query, per_page):
+    pages, cursor = [], None
+    while True:
+        page = keyset.paginate(query, per_page, after=cursor)
+        pages.append(page)
+        if not page.has_next:
+            return pages
+        cursor = page.next_cursor
+
+
+def test_pages_cover_every_row_once_in_both_directions(app):
+    for i in range(23):
+        make_course(f"C{i:02d}")
+    keyset = Keyset(Course.id)
+    pages = _walk_forward(keyset, Course.query, 5)
+
+    ids = [c.id for page in pages for c in page]
+    assert ids == sorted(c.id for c in Course.query)
+    assert [len(p) for p in pages] == [5, 5, 5, 5, 3]
+    assert not pages[0].has_prev and pages[-1].has_prev
+
+    # walking back from the last page repeats the same pages
+    page = pages[-1]
+    for expected in reversed(pages[:-1]):
+        page = keyset.paginate(Course.query, 5, before=page.prev_cursor)
+        assert [c.id for c in page] == [c.id for c in expected]
+    assert not page.has_prev
+
+
+def test_ties_on_the_sort_key_are_split_by_id(app):
+    course = make_course("CMPE131")
+    same_time = datetime(2025, 1, 1, 12, 0)
+    for i in range(7):
+        db.session.add(Announcement(course_id=course.id, title=f"A{i}", content="c",
+                                    created_at=same_time if i < 5 else datetime(2025, 1, i)))
+    db.session.commit()
+
+    keyset = Keyset(Announcement.created_at, Announcement.id, descending=True)
+    pages = _walk_forward(keyset, Announcement.query, 2)
+    seen = [a.id for page in pages for a in page]
+    expected = [a.id for a in Announcement.query.order_by(
+        Announcement.created_at.desc(), Announcement.id.desc())]
+    assert seen == expected
+
+
+def test_custom_loader_rows_are_put_back_in_window_order(app):
+    for i in range(7):
+        course = make_course(f"C{i}")
+        db.session.add(Assignment(course_id=course.id, title=f"HW{i}", description="d"))
+    db.session.commit()
+    keyset = Keyset(Course.id, key=lambda item: (item[0].id,))
+
+    first = keyset.paginate(Course.query, 3, load=Course.with_assignments)
+    second = keyset.paginate(Course.query, 3, after=first.next_cursor, load=Course.with_assignments)
+    back = keyset.paginate(Course.query, 3, before=second.prev_cursor, load=Course.with_assignments)
+
+    assert [c.code for c, _ in second] == ["C3", "C4", "C5"]
+    assert [[a.title for a in assignments] for _, assignments in second] == [["HW3"], ["HW4"], ["HW5"]]
+    assert [c.id for c, _ in back] == [c.id for c, _ in first]
+
+
+def test_catalog_pages_and_rejects_bad_cursor(app):
+    app.config["PER_PAGE"] = 2
+    for i in range(3):
+        make_course(f"C{i}")
+    client = app.test_client(user=make_user("s@test.com"))
+
+    first = client.get("/courses/")
+    assert b"C0" in first.data and b"C2" not in first.data
+    keyset = Keyset(Course.id, key=lambda row: (row[0].id,))
+    cursor = keyset.paginate(Course.get_catalog(), 2).next_cursor
+    second = client.get(f"/courses/?after={cursor}")
+    assert b"C2" in second.data and b"C0" not in second.data
+
+    assert client.get("/courses/?after=not-a-cursor").status_code == 400
+
+
+def test_decode_rejects_wrong_shape():
+    keyset = Keyset(Course.id)
+    with pytest.raises(InvalidCursor):
+        keyset.decode(keyset.encode(type("Row", (), {"id": 1})()) + "AAAA")
+    with pytest.raises(InvalidCursor):
+        keyset.decode("WzEsMl0")  # [1,2]: two values for one column
@@ -0,0 +1,137 @@
+"""Query-count benchmarks: page cost must not grow with the data."""
+from app.config import db
+from app.models import User, Course, Assignment, StudentAssignment
+
+from conftest import make_user, make_course
+
+
+def _seed_courses(start, stop, students):
+    for i in range(start, stop):
+        course = make_course(f"C{i}")
+        for student in students[: i % len(students) + 1]:
+            course.reserve_seat(student.id)
+
+
+def test_courses_list_query_count_is_constant(app, query_counter):
+    students = [make_user(f"s{i}@test.com") for i in range(5)]
+    client = app.test_client(user=students[0])
+    client.get("/")  # both measured requests start with the identity cached
+
+    _seed_courses(0, 5, students)
+    with query_counter:
+        resp = client.get("/courses/")
+    assert resp.status_code == 200
+    small = query_counter.count
+
+    _seed_courses(5, 60, students)
+    with query_counter:
+        resp = client.get("/courses/")
+    assert resp.status_code == 200
+    assert query_counter.count == small
+
+
+def test_courses_list_reports_counts_and_enrollment(app):
+    students = [make_user(f"s{i}@test.com") for i in range(3)]
+    course = make_course("CMPE131", max_students=10)
+    other = make_course("PHYS51")
+    for student in students:
+        course.reserve_seat(student.id)
+
+    rows = {c.id: (count, enrolled) for c, count, enrolled in Course.get_catalog(students[0].id)}
+    assert rows[course.id] == (3, True)
+    assert rows[other.id] == (0, False)
+
+    resp = app.test_client().get("/courses/")
+    assert b"CMPE131" in resp.data and b"PHYS51" in resp.data
+
+
+def _add_assignments(course, student, count, score=None):
+    for i in range(count):
+        assignment = Assignment(course_id=course.id, title=f"HW{i}", description="d", max_points=10)
+        db.session.add(assignment)
+        db.session.flush()
+        if score is not None:
+            db.session.add(StudentAssignment(
+                user_id=student.id, assignment_id=assignment.id,
+                status=StudentAssignment.STATUS_COMPLETED, score=score,
+            ))
+    db.session.commit()
+
+
+def test_course_dashboard_query_count_ignores_history(app, query_counter):
+    student = make_user("s@test.com")
+    course = make_course("CMPE131")
+    other = make_course("PHYS51")
+    course.reserve_seat(student.id)
+    other.reserve_seat(student.id)
+    _add_assignments(course, student, 2, score=5)
+    client = app.test_client(user=student)
+    client.get("/")  # both measured requests start with the identity cached
+
+    with query_counter:
+        resp = client.get(f"/courses/{course.id}/dashboard/grades")
+    assert resp.status_code == 200
+    assert b"10/20" in resp.data
+    small = query_counter.count
+
+    _add_assignments(course, student, 20)
+    _add_assignments(other, student, 50, score=10)
+    with query_counter:
+        resp = client.get(f"/courses/{course.id}/dashboard/grades")
+    assert resp.status_code == 200
+    assert b"10/220" in resp.data
+    assert query_counter.count == small
+
+
+def _seed_assignment_index(professor, students, start, stop, per_course):
+    for i in range(start, stop):
+        course = make_course(f"IDX{i}", professor=professor)
+        for student in students:
+            course.reserve_seat(student.id)
+        for j in range(per_course):
+            db.session.add(Assignment(course_id=course.id, title=f"HW{j}", description="d"))
+    db.session.commit()
+
+
+def test_assignments_index_query_count_is_fixed_for_every_role(app, query_counter):
+    professor = make_user("p@test.com", role=User.ROLE_PROFESSOR)
+    admin = make_user("a@test.com", role=User.ROLE_ADMIN)
+    student = make_user("s@test.com")
+    clients = [app.test_client(user=u) for u in (admin, professor, student)]
+    for client in clients:
+        client.get("/")  # identities cached
+
+    _seed_assignment_index(professor, [student], 0, 2, per_course=1)
+    small = []
+    for client in clients:
+        with query_counter:
+            assert client.get("/assignments/").status_code == 200
+        small.append(query_counter.count)
+
+    _seed_assignment_index(professor, [student], 2, 14, per_course=6)
+    for client, expected in zip(clients, small):
+        with query_counter:
+            resp = client.get("/assignments/")
+        assert resp.status_code == 200
+        assert query_counter.count == expected
+
+
+def test_assignments_index_visibility_by_role(app):
+    professor = make_user("p@test.com", role=User.ROLE_PROFESSOR)
+    other_prof = make_user("q@test.com", role=User.ROLE_PROFESSOR)
+    student = make_user("s@test.com")
+    mine = make_course("MINE1", professor=professor)
+    theirs = make_course("THEIRS1", professor=other_prof)
+    theirs.reserve_seat(student.id)
+    db.session.add_all([
+        Assignment(course_id=mine.id, title="Mine HW", description="d"),
+        Assignment(course_id=theirs.id, title="Their HW", description="d"),
+    ])
+    db.session.commit()
+
+    as_professor = app.test_client(user=professor).get("/assignments/").data
+    assert b"Mine HW" in as_professor and b"Their HW" not in as_professor
+    as_student = app.test_client(user=student).get("/assignments/").data
+    assert b"Their HW" in as_student and b"Mine HW" not in as_student
+    as_admin = app.test_client(user=make_user("a@test.com", role=User.ROLE_ADMIN)).get("/assignments/").data
+    assert b"Mine HW" in as_admin and b"Their HW" in as_admin
@@ -0,0 +1,87 @@
+"""Admin-triggered request profiles and the profiles pages."""
+import os
+import pstats
+
+import pytest
+
+from app.models import User
+
+from conftest import make_user, make_course
+
+
+@pytest.fixture
+def profile_dir(app, tmp_path):
+    app.config["PROFILE_DIR"] = str(tmp_path)
+    return tmp_path
+
+
+def test_only_admins_can_ask_for_a_profile(app, profile_dir):
+    student = make_user("s@test.com")
+    response = app.test_client(user=student).get("/courses/?_profile=1")
+    assert "X-Profile-Id" not in response.headers
+    assert os.listdir(profile_dir) == []
+
+
+def test_profile_is_saved_in_every_format(app, profile_dir):
+    admin = make_user("admin@test.com", role=User.ROLE_ADMIN)
+    make_course("CMPE131")
+    client = app.test_client(user=admin)
+
+    response = client.get("/courses/", headers={"X-Profile": "1"})
+    name = response.headers["X-Profile-Id"]
+    assert response.status_code == 200 and "courses.courses_list" in name
+
+    stats = pstats.Stats(str(profile_dir / f"{name}.prof"))
+    assert stats.total_tt > 0
+    lines = (profile_dir / f"{name}.collapsed").read_text().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("do_execute" in line for line in lines)
+
+    detail = client.get(f"/admin/profiles/{name}").get_data(as_text=True)
+    assert "Top Functions" in detail and "SQL" in detail
+    listing = client.get("/admin/profiles").get_data(as_text=True)
+    assert f"/admin/profiles/{name}" in listing
+    assert client.get(f"/admin/profiles/{name}/collapsed").status_code == 200
+    assert client.get(f"/admin/profiles/{name}/exe").status_code == 404
+    assert client.get("/admin/profiles/..%2Fapp/prof").status_code == 404
+
+
+def test_profile_splits_time_between_sql_templates_and_python(app, profile_dir):
+    from app import profiler
+
+    admin = make_user("admin@test.com", role=User.ROLE_ADMIN)
+    make_course("CMPE131")
+    name = app.test_client(user=admin).get("/courses/?_profile=1").headers["X-Profile-Id"]
+
+    with app.test_request_context():
+        split = profiler.load_profile(name)["split"]
+    assert split["sql"] > 0 and split["templates"] > 0 and split["python"] > 0
+
+
+def test_sampling_profiles_one_endpoint_until_the_count_is_reached(app, profile_dir):
+    admin = make_user("admin@test.com", role=User.ROLE_ADMIN)
+    student = make_user("s@test.com")
+    make_course("CMPE131")
+
+    response = app.test_client(user=admin).post("/admin/profiles", data={
+        "endpoint": "courses.courses_list", "rate": "1", "count": "2",
+    })
+    assert response.status_code == 302
+
+    client = app.test_client(user=student)
+    for _ in range(3):
+        response = client.get("/courses/")
+        assert "X-Profile-Id" not in response.headers   # the student isn't told
+    client.get("/dashboard")
+    saved = [f for f in os.listdir(profile_dir) if f.endswith(".json")]
+    assert len(saved) == 2 and all("courses.courses_list" in f for f in saved)
+
+
+def test_only_the_newest_profiles_are_kept(app, profile_dir):
+    app.config["PROFILE_KEEP"] = 2
+    admin = make_user("admin@test.com", role=User.ROLE_ADMIN)
+    client = app.test_client(user=admin)
+
+    names = [client.get("/courses/?_profile=1").headers["X-Profile-Id"] for _ in range(4)]
+    assert sorted(os.listdir(profile_dir)) == sorted(
+        name + extension for name in names[2:] for extension in (".prof", ".collapsed", ".json"))
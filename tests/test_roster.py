@@ -0,0 +1,156 @@
+"""Roster import enrolls in batches and respects course capacity."""
+import io
+
+import pytest
+
+from app.config import db
+from app.models import User, Course, CourseGrade, Enrollment
+from app.roster import import_roster, read_csv
+
+from conftest import make_user, make_course
+
+
+def _csv(lines):
+    return read_csv(io.BytesIO(("email,course_code\n" + "\n".join(lines) + "\n").encode()))
+
+
+def test_import_resolves_skips_and_enforces_capacity(app):
+    students = [make_user(f"s{i}@test.com") for i in range(4)]
+    make_user("p@test.com", role=User.ROLE_PROFESSOR)
+    small = make_course("SMALL1", max_students=2)
+    open_course = make_course("OPEN1", max_students=None)
+    small.reserve_seat(students[0].id)
+
+    result = import_roster(_csv([
+        "s0@test.com,SMALL1",       # already enrolled
+        "s1@test.com,small1",       # takes the last seat
+        "s2@test.com,SMALL1",       # full
+        "S1@test.com,OPEN1",
+        "s1@test.com,OPEN1",        # repeated in the file
+        "p@test.com,OPEN1",         # not a student
+        "s3@test.com,NOPE",
+        "s3@test.com,OPEN1",
+    ]), batch_size=2)
+
+    assert (result.rows, result.enrolled, result.skipped) == (8, 3, 2)
+    assert [(e.row, e.error) for e in result.errors] == [
+        (4, "course is full"),
+        (7, "no student with this email"),
+        (8, "no course with this code"),
+    ]
+    db.session.expire_all()
+    assert db.session.get(Course, small.id).seats_taken == 2
+    assert db.session.get(Course, open_course.id).seats_taken == 2
+    assert CourseGrade.query.filter_by(course_id=open_course.id).count() == 2
+    assert result.rows_per_second > 0
+
+
+def test_query_count_does_not_grow_with_rows(app, query_counter):
+    for i in range(40):
+        make_user(f"s{i}@test.com")
+    make_course("BIG1", max_students=None)
+
+    with query_counter:
+        import_roster(_csv([f"s{i}@test.com,BIG1" for i in range(5)]))
+    few = query_counter.count
+    with query_counter:
+        import_roster(_csv([f"s{i}@test.com,BIG1" for i in range(40)]))
+    assert query_counter.count == few
+    assert Enrollment.query.count() == 40
+
+
+def test_each_committed_batch_has_its_grade_rows(app, monkeypatch):
+    from app import roster
+
+    for i in range(2):
+        make_user(f"s{i}@test.com")
+    course = make_course("CMPE131")
+    recount = roster._recount
+    calls = []
+
+    def fail_second_batch(course_ids):
+        calls.append(course_ids)
+        if len(calls) == 2:
+            raise RuntimeError("connection lost")
+        recount(course_ids)
+
+    monkeypatch.setattr(roster, "_recount", fail_second_batch)
+    with pytest.raises(RuntimeError):
+        import_roster(_csv(["s0@test.com,CMPE131", "s1@test.com,CMPE131"]), batch_size=1)
+    db.session.rollback()
+    assert Enrollment.query.count() == 1
+    assert CourseGrade.query.filter_by(course_id=course.id).count() == 1
+
+
+def test_dialects_without_insert_ignore_use_a_plain_insert(app, monkeypatch):
+    from app import roster
+
+    insert_ignore = roster._insert_ignore
+    monkeypatch.setattr(roster, "_insert_ignore", lambda dialect: insert_ignore("firebird"))
+    student = make_user("s0@test.com")
+    make_user("s1@test.com")
+    course = make_course("CMPE131")
+    course.reserve_seat(student.id)
+
+    result = import_roster(_csv(["s0@test.com,CMPE131", "s1@test.com,CMPE131"]))
+    assert (result.enrolled, result.skipped) == (1, 1)
+    assert Enrollment.query.count() == 2
+
+
+def test_seat_claim_rechecks_a_stale_free_count(app):
+    from app.roster import _claim_seats
+
+    students = [make_user(f"s{i}@test.com") for i in range(2)]
+    course = make_course("SMALL1", max_students=3)
+    free = 3
+    course.reserve_seat(students[0].id)     # taken after free was read
+
+    assert _claim_seats(course.id, 3, free) == 2
+    assert _claim_seats(course.id, 1, 1) == 0
+    db.session.commit()
+    db.session.expire_all()
+    assert db.session.get(Course, course.id).seats_taken == 3
+
+
+def test_batches_only_add_grade_rows_for_new_pairs(app, query_counter):
+    students = [make_user(f"s{i}@test.com") for i in range(3)]
+    course = make_course("CMPE131", max_students=None)
+    course.reserve_seat(students[0].id)
+    kept = CourseGrade.query.filter_by(user_id=students[0].id).one().id
+
+    with query_counter:
+        import_roster(_csv(["s1@test.com,CMPE131", "s2@test.com,CMPE131"]), batch_size=1)
+    assert not any(sql.lstrip().upper().startswith("DELETE") for sql in query_counter.statements)
+    assert CourseGrade.query.filter_by(course_id=course.id).count() == 3
+    assert CourseGrade.query.filter_by(user_id=students[0].id).one().id == kept
+
+
+def test_roster_endpoint_is_admin_only(app):
+    admin = make_user("a@test.com", role=User.ROLE_ADMIN)
+    student = make_user("s@test.com")
+    course = make_course("CMPE131")
+    body = "email,course_code\ns@test.com,CMPE131\n"
+
+    resp = app.test_client(user=student).post("/api/v1/rosters", data=body, content_type="text/csv")
+    assert resp.status_code == 403
+
+    resp = app.test_client(user=admin).post("/api/v1/rosters", data=body, content_type="text/csv")
+    assert resp.get_json()["enrolled"] == 1
+    assert student.is_enrolled_in(course)
+
+    resp = app.test_client(user=admin).post("/api/v1/rosters", data="course,email\n",
+                                            content_type="text/csv")
+    assert resp.status_code == 400
+
+
+def test_roster_endpoint_refuses_form_uploads(app):
+    # a cross-site form can send multipart without a preflight
+    admin = make_user("a@test.com", role=User.ROLE_ADMIN)
+    make_user("s@test.com")
+    make_course("CMPE131")
+    upload = {"file": (io.BytesIO(b"email,course_code\ns@test.com,CMPE131\n"), "roster.csv")}
+
+    resp = app.test_client(user=admin).post("/api/v1/rosters", data=upload,
+                                            content_type="multipart/form-data")
+    assert resp.status_code == 415
+    assert Enrollment.query.count() == 0
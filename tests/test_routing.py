@@ -0,0 +1,107 @@
+"""GET requests read from the replica; writes and their readers use the primary."""
+import pytest
+from flask import session
+
+from app import create_app
+from app.config import db
+from app.identity import load_user
+from app.models import Course, Notification, User
+from app.notifications import unread_previews
+from app.routing import refresh_sqlite_replica, replica_engine
+
+from conftest import TestConfig, LoginClient, make_user, make_course
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    class ReplicaConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        REPLICA_DATABASE_URI = f"sqlite:///{tmp_path / 'replica.db'}"
+        READ_YOUR_WRITES_SECONDS = 60
+
+    app = create_app(ReplicaConfig)
+    app.test_client_class = LoginClient
+    with app.app_context():
+        refresh = lambda: refresh_sqlite_replica(
+            ReplicaConfig.SQLALCHEMY_DATABASE_URI, ReplicaConfig.REPLICA_DATABASE_URI)
+        refresh()
+        yield app, refresh
+        db.session.remove()
+        for engine in [*db.engines.values(), replica_engine(app)]:
+            engine.dispose()
+
+
+def test_gets_read_from_the_refreshed_copy(replica_app):
+    app, refresh = replica_app
+    student = make_user("s@test.com")
+    make_course("OLD1")
+    refresh()
+    make_course("NEW1")  # on the primary only
+
+    client = app.test_client(user=student)
+    page = client.get("/courses/").data
+    assert b"OLD1" in page and b"NEW1" not in page
+
+    refresh()
+    assert b"NEW1" in client.get("/courses/").data
+
+
+def test_user_reads_own_writes_from_primary(replica_app):
+    app, refresh = replica_app
+    student, other = make_user("s@test.com"), make_user("o@test.com")
+    course = make_course("CMPE131")
+    refresh()
+
+    client = app.test_client(user=student)
+    assert client.post(f"/courses/{course.id}/enroll").status_code == 302
+
+    # the replica hasn't caught up, but this user's reads now stick to the primary
+    assert b"CMPE131" in client.get("/courses/my-courses").data
+    assert b"<strong>Enrolled:</strong> 1" in client.get("/courses/").data
+    # everyone else still reads the replica until it refreshes
+    other_client = app.test_client(user=other)
+    assert b"<strong>Enrolled:</strong> 0" in other_client.get("/courses/").data
+    refresh()
+    assert b"<strong>Enrolled:</strong> 1" in other_client.get("/courses/").data
+
+
+def test_writes_during_a_get_go_to_primary(replica_app):
+    app, refresh = replica_app
+    make_course("OLD1")
+    refresh()
+
+    with app.app_context(), app.test_request_context("/courses/", method="GET"):
+        app.preprocess_request()
+        db.session.add(Course(code="NEW1", title="New", credits=3, professor="Prof"))
+        db.session.flush()
+        # the flush pinned the rest of the request to the primary
+        codes = db.session.scalars(db.select(Course.code).order_by(Course.code)).all()
+        assert codes == ["NEW1", "OLD1"]
+        db.session.commit()
+        app.process_response(app.response_class())
+        # and the browser reads its own write from the primary next time
+        assert "_primary_until" in session
+    count = db.session.execute(db.text("SELECT count(*) FROM courses")).scalar()
+    assert count == 2
+
+
+def test_caches_refill_from_the_primary(replica_app):
+    app, refresh = replica_app
+    student = make_user("s@test.com")
+    refresh()
+
+    def in_a_get(fn):
+        with app.app_context(), app.test_request_context("/courses/", method="GET"):
+            app.preprocess_request()
+            return fn()
+
+    assert in_a_get(lambda: load_user(student.id).role) == User.ROLE_STUDENT
+    assert in_a_get(lambda: unread_previews(student.id)) == ()
+
+    # both commits invalidate; the replica still has the old rows
+    student.role = User.ROLE_PROFESSOR
+    db.session.add(Notification(user_id=student.id, message="Graded"))
+    db.session.commit()
+
+    assert in_a_get(lambda: load_user(student.id).role) == User.ROLE_PROFESSOR
+    assert [p.message for p in in_a_get(lambda: unread_previews(student.id))] == ["Graded"]
@@ -0,0 +1,44 @@
+"""create_app skips schema work on an up-to-date database and times its phases."""
+import subprocess
+import sys
+
+from app import create_app
+from app.config import db
+
+from conftest import TestConfig, PROJECT_ROOT
+
+
+def _file_config(tmp_path):
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'startup.db'}"
+    return FileConfig
+
+
+def test_current_schema_skips_create_all(tmp_path, monkeypatch):
+    config = _file_config(tmp_path)
+    create_app(config)  # fresh file: builds and stamps the schema
+
+    calls = []
+    monkeypatch.setattr(db, "create_all", lambda *a, **kw: calls.append(a))
+    app = create_app(config)
+
+    assert calls == []
+    timings = app.extensions["startup_timings"]
+    assert {"imports", "config", "extensions", "blueprints", "schema"} <= set(timings)
+    assert all(seconds >= 0 for seconds in timings.values())
+
+
+def test_fresh_database_still_gets_create_all(tmp_path, monkeypatch):
+    calls = []
+    real_create_all = db.create_all
+    monkeypatch.setattr(db, "create_all", lambda *a, **kw: calls.append(a) or real_create_all())
+
+    create_app(_file_config(tmp_path))
+    assert len(calls) == 1
+
+
+def test_numpy_is_not_imported_at_startup():
+    code = "import sys, app; print('numpy' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "False"